@@ -0,0 +1,186 @@
+import os
+import gzip
+import json
+import datetime
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from exceptions.exceptions import InvalidDateError
+
+def month_key(value):
+    """
+    YYYY-M or YYYY-M-D -> zero-padded YYYY-MM.
+    Raises:
+        InvalidDateError: if value is not such a date.
+    """
+    parts = str(value).strip().split("-")
+    try:
+        return datetime.date(int(parts[0]), int(parts[1]), 1).strftime("%Y-%m")
+    except (ValueError, IndexError):
+        raise InvalidDateError(f"Invalid month: '{value}'. Expected YYYY-MM.")
+
+def months_ago(months, today=None):
+    """The YYYY-MM month `months` calendar months before today's."""
+    today = today or datetime.date.today()
+    index = today.year * 12 + today.month - 1 - months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def archive_dir(storage):
+    """
+    The archive of a store lives next to its data file, named like its journal:
+    data/hospital-data.json -> data/hospital-data.archive/, data/hospital-data.hms -> data/hospital-data.hms.archive/.
+    """
+    path = getattr(storage, "path", None)
+    if not path:
+        return None
+    base, extension = os.path.splitext(path)
+    return base + ".archive" if extension == ".json" else path + ".archive"
+
+#? ####################################################################
+#? Start AppointmentArchive Class - compressed monthly cold partitions
+#? ####################################################################
+
+class AppointmentArchive:
+    """
+    Cold tier for past appointments: one gzip-compressed JSON-lines file per month
+    (YYYY-MM.jsonl.gz, records sorted by day), a small manifest read at startup, and
+    a patient -> months index read on the first patient history lookup.
+    Partitions are read on demand and the most recently used ones kept in memory.
+    """
+    cache_months = 12  #! decoded partitions kept in memory
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.cache = OrderedDict()  # month -> [(day, record)] sorted by day
+        self.refresh()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def refresh(self):
+        """Re-reads the manifest (another process may have archived more months); drops the cached partitions."""
+        self.cache.clear()
+        self.patient_months = None  # patient_id -> [months], read lazily
+        self.manifest = {"months": {}, "max_id": 0}
+        if self.directory:
+            try:
+                with open(self._path("manifest.json")) as f:
+                    self.manifest = json.load(f)
+            except FileNotFoundError:
+                pass
+        self.months = sorted(self.manifest["months"])
+
+    def __len__(self):
+        return sum(month["count"] for month in self.manifest["months"].values())
+
+    @property
+    def max_id(self):
+        return self.manifest["max_id"]
+
+    @property
+    def last_month(self):
+        """The newest archived month, or None; nothing at or before it can be booked any more."""
+        return self.months[-1] if self.months else None
+
+    def covers(self, day):
+        """Whether a YYYY-MM-DD day falls in (or before) the archived months."""
+        return bool(self.months) and day[:7] <= self.months[-1]
+
+    #? --- Reading ---
+    def _partition(self, month):
+        rows = self.cache.get(month)
+        if rows is None:
+            with gzip.open(self._path(f"{month}.jsonl.gz"), "rt") as f:
+                rows = [(record.pop("day"), record) for record in map(json.loads, f)]
+            self.cache[month] = rows
+            while len(self.cache) > self.cache_months:
+                self.cache.popitem(last=False)
+        self.cache.move_to_end(month)
+        return rows
+
+    def months_between(self, start=None, end=None):
+        """The archived months overlapping start..end (YYYY-MM-DD keys, inclusive)."""
+        lo = bisect_left(self.months, start[:7]) if start else 0
+        hi = bisect_right(self.months, end[:7]) if end else len(self.months)
+        return self.months[lo:hi]
+
+    def records_between(self, start=None, end=None):
+        """Yields the archived records dated start..end (YYYY-MM-DD keys, inclusive) in date order, loading only those months."""
+        for month in self.months_between(start, end):
+            rows = self._partition(month)
+            lo = bisect_left(rows, start, key=lambda row: row[0]) if start else 0
+            hi = bisect_right(rows, end, key=lambda row: row[0]) if end else len(rows)
+            for i in range(lo, hi):
+                yield rows[i][1]
+
+    def records_for_patient(self, patient_id):
+        """Yields the patient's archived records in date order; only the months they appear in are read."""
+        if self.patient_months is None:
+            self.patient_months = self._read_patient_index()
+        needle = f'"patient_id": {patient_id},'  #! as add() serializes it; only matching lines are parsed
+        for month in self.patient_months.get(patient_id, ()):
+            rows = self.cache.get(month)
+            if rows is not None:
+                yield from (record for _, record in rows if record["patient_id"] == patient_id)
+                continue
+            with gzip.open(self._path(f"{month}.jsonl.gz"), "rt") as f:
+                for line in f:
+                    if needle in line:
+                        record = json.loads(line)
+                        del record["day"]
+                        yield record
+
+    def _read_patient_index(self):
+        try:
+            with gzip.open(self._path("patients.json.gz"), "rt") as f:
+                return {int(patient_id): months for patient_id, months in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def iter_records(self):
+        """Streams every archived record, month by month, without caching the partitions."""
+        for month in self.months:
+            with gzip.open(self._path(f"{month}.jsonl.gz"), "rt") as f:
+                for record in map(json.loads, f):
+                    del record["day"]
+                    yield record
+
+    #? --- Writing ---
+    def add(self, records, day_of):
+        """
+        Files appointment records (the appointment_record layout) in their monthly partitions,
+        merging with what a month already holds. `day_of(record)` gives its YYYY-MM-DD key.
+        Partitions and the patient index are written (temp file + rename) before the manifest,
+        which is what readers go by.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        by_month = {}
+        for record in records:
+            day = day_of(record)
+            by_month.setdefault(day[:7], {})[record["id"]] = {**record, "day": day}
+        patient_months = self._read_patient_index()
+        for month, new in by_month.items():
+            merged = {record["id"]: {**record, "day": day} for day, record in self._partition(month)} if month in self.manifest["months"] else {}
+            merged.update(new)
+            rows = sorted(merged.values(), key=lambda record: (record["day"], record["id"]))
+            self._write(f"{month}.jsonl.gz", "".join(json.dumps(record) + "\n" for record in rows))
+            self.manifest["months"][month] = {"count": len(rows)}
+            self.manifest["max_id"] = max(self.manifest["max_id"], max(merged))
+            for patient_id in {record["patient_id"] for record in rows}:
+                months = patient_months.setdefault(patient_id, [])
+                if month not in months:
+                    months.append(month)
+                    months.sort()
+            self.cache.pop(month, None)
+        self._write("patients.json.gz", json.dumps(patient_months))
+        self._write("manifest.json", json.dumps(self.manifest, indent=4), compress=False)
+        self.months = sorted(self.manifest["months"])
+        self.patient_months = patient_months
+
+    def _write(self, name, text, compress=True):
+        tmp_file = self._path(f"{name}.{os.getpid()}.tmp")
+        data = text.encode()
+        with open(tmp_file, "wb") as f:
+            f.write(gzip.compress(data) if compress else data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._path(name))
@@ -0,0 +1,96 @@
+"""
+Hot/cold appointment tiering (archive.py): cost of routine operations with all
+history in the store against only the active window.
+
+Generates --years of appointments (benchmarks/synthetic.py), times load, save and
+booking with everything active, archives all but the last --keep-months months,
+then times the same operations again, plus queries that reach into the archive:
+a date range in an archived month (first touch, then cached) and patient histories.
+
+Usage: python benchmarks/archive.py [--patients 20000] [--years 4] [--keep-months 12] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate, write_hospital, date_string, SPECIALIZATIONS
+from manager import HospitalManager
+from storage import JSONStorage
+from archive import month_key
+
+
+def timed(body):
+    start = time.perf_counter()
+    result = body()
+    return result, time.perf_counter() - start
+
+
+def routine(path, rng, first_day, days, bookings):
+    """Load, book `bookings` appointments in the active days, save; returns the timings."""
+    hospital, load = timed(lambda: HospitalManager(JSONStorage(path)))
+    patient_ids = list(hospital.patient)
+
+    def book():
+        for _ in range(bookings):
+            slot = hospital.earliest_available(rng.choice(SPECIALIZATIONS), date_string(first_day + rng.randrange(days)))
+            if slot:
+                hospital.book_appointment(slot[1], hospital.patient[rng.choice(patient_ids)], slot[0], time=slot[2])
+    _, booking = timed(book)
+    _, save = timed(hospital.save_data)
+    return hospital, {"load_s": load, "book_ms": booking / bookings * 1000, "save_s": save,
+                      "active_appointments": len(hospital.appointment) + len(hospital.cancelled)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--years", type=int, default=4)
+    parser.add_argument("--per-year", type=int, default=40_000, help="appointments per year of history")
+    parser.add_argument("--keep-months", type=int, default=12)
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    days = 365 * args.years
+    data = generate(args.patients, args.doctors, args.per_year * args.years, days=days)
+    path = write_hospital(tempfile.mkdtemp(prefix="hms-archive-"), data)
+    active_days = args.keep_months * 30
+
+    _, everything = routine(path, rng, days - active_days, active_days, args.bookings)
+    hospital = HospitalManager(JSONStorage(path))
+    before = month_key(date_string(days - active_days))
+    moved, archive_seconds = timed(lambda: hospital.archive_appointments(before))
+    hospital, windowed = routine(path, rng, days - active_days, active_days, args.bookings)
+
+    old_day = date_string(rng.randrange(days - active_days))
+    first, cold_first = timed(lambda: hospital.appointments_between(old_day, old_day))
+    _, cold_cached = timed(lambda: hospital.appointments_between(old_day, old_day))
+    patients = rng.sample(list(hospital.patient), 100)
+    histories, history = timed(lambda: [hospital.appointments_for_patient(p) for p in patients])
+
+    archive_dir = hospital.archive.directory
+    results = {"years": args.years, "keep_months": args.keep_months, "archived": moved, "archive_s": archive_seconds,
+               "archive_mb": sum(os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir)) / 2**20,
+               "snapshot_mb": os.path.getsize(path) / 2**20,
+               **{f"all_active_{key}": value for key, value in everything.items()},
+               **{f"windowed_{key}": value for key, value in windowed.items()},
+               "cold_day_first_ms": cold_first * 1000, "cold_day_cached_ms": cold_cached * 1000, "cold_day_rows": len(first),
+               "patient_history_ms": history / len(patients) * 1000,
+               "patient_history_rows": sum(map(len, histories)) / len(patients)}
+    for key, value in results.items():
+        print(f"{key:<32}{value:10.3f}" if isinstance(value, float) else f"{key:<32}{value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
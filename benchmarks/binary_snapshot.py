@@ -0,0 +1,118 @@
+"""
+Load benchmark: JSON snapshot vs the memory-mapped binary snapshot (storage/binary_storage.py).
+
+For each size, writes a data file with that many patients (plus --doctors doctors
+and one appointment per --appointment-every patients) in both formats, then in a
+fresh process per format measures:
+  * load: HospitalManager() start-up until the records are usable
+  * peak RSS of that process (interpreter and imports included; Linux only)
+  * lookup: mean time of --lookups random search_patient_by_id() calls after the load
+The JSON file is written with indent=4, as JSONStorage does.
+
+Usage: python benchmarks/binary_snapshot.py [--sizes 100000,1000000,10000000] [--formats json,binary] [--json results.json]
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from storage.binary_storage import write_snapshot
+
+DISEASES = ["fever", "flu", "asthma", "diabetes", "migraine", "covid", "heart", "back pain"]
+FILES = {"json": "hospital-data.json", "binary": "hospital-data.hms"}
+
+#! run in a fresh interpreter so each measurement starts from the same RSS
+MEASURE = """
+import sys, json, time, random
+sys.path.insert(0, {root!r})
+from manager import HospitalManager
+from storage import storage_for_path
+start = time.perf_counter()
+hospital = HospitalManager(storage_for_path({path!r}))
+load = time.perf_counter() - start
+#! VmHWM rather than ru_maxrss, which Linux carries over from the forking parent across exec
+rss = next(int(line.split()[1]) for line in open("/proc/self/status") if line.startswith("VmHWM"))
+ids = random.Random(1).sample(range({patients}), {lookups})
+start = time.perf_counter()
+for patient_id in ids:
+    assert hospital.search_patient_by_id(patient_id) is not None
+lookup = (time.perf_counter() - start) / len(ids)
+print(json.dumps({{"load_s": load, "rss_mb": rss / 1024, "lookup_us": lookup * 1e6}}))
+"""
+
+
+def records(patients, doctors, appointment_every, rng):
+    """The three record lists as generators, so 10M-record files can be written without holding them."""
+    def patient_rows():
+        for i in range(patients):
+            yield {"name": f"patient {i}", "age": rng.randint(1, 95), "gender": rng.choice(("male", "female")),
+                   "id": i, "disease": rng.choice(DISEASES)}
+    def doctor_rows():
+        for i in range(doctors):
+            yield {"name": f"doctor {i}", "age": 45, "gender": "female", "id": i, "specialization": "general",
+                   "work_start": "09:00", "work_end": "17:00", "slot_minutes": 30}
+    def appointment_rows():
+        for n in range(patients // appointment_every):
+            day, slot = divmod(n // doctors, 16)
+            yield {"id": n + 1, "date": f"2025-{day // 28 % 12 + 1}-{day % 28 + 1}", "time": f"{9 + slot // 2:02d}:{slot % 2 * 30:02d}",
+                   "status": "booked", "patient_id": n * appointment_every, "doctor_id": n % doctors}
+    return {"patients": patient_rows(), "doctors": doctor_rows(), "appointments": appointment_rows()}
+
+
+def write_json(path, data):
+    """Streams the snapshot in json.dump(data, f, indent=4) layout."""
+    with open(path, "w") as f:
+        f.write("{")
+        for i, (kind, rows) in enumerate(data.items()):
+            f.write(f'{"," if i else ""}\n    "{kind}": [')
+            for j, row in enumerate(rows):
+                body = json.dumps(row, indent=4).replace("\n", "\n        ")
+                f.write(f'{"," if j else ""}\n        {body}')
+            f.write("\n    ]")
+        f.write("\n}")
+
+
+def measure(path, patients, lookups):
+    code = MEASURE.format(root=ROOT, path=path, patients=patients, lookups=lookups)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.path.dirname(path))
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000,10000000", help="comma-separated patient counts")
+    parser.add_argument("--formats", default="json,binary")
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--appointment-every", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'patients':>10} {'format':<8}{'file MB':>10}{'load s':>10}{'RSS MB':>10}{'lookup us':>11}")
+    for size in map(int, args.sizes.split(",")):
+        data_dir = tempfile.mkdtemp(prefix="hms-snapshot-")
+        for kind in args.formats.split(","):
+            path = os.path.join(data_dir, FILES[kind])
+            data = records(size, args.doctors, args.appointment_every, random.Random(size))
+            write_json(path, data) if kind == "json" else write_snapshot(path, data)
+            row = {"patients": size, "format": kind, "file_mb": os.path.getsize(path) / 2**20,
+                   **measure(path, size, min(args.lookups, size))}
+            os.remove(path)
+            results.append(row)
+            print(f"{size:>10} {kind:<8}{row['file_mb']:10.1f}{row['load_s']:10.2f}{row['rss_mb']:10.1f}{row['lookup_us']:11.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cascading delete benchmark: reverse indexes vs scanning every appointment.
+
+Seeds --patients patients, --doctors doctors and --appointments appointments, then
+deletes --delete patients with their appointments:
+  * scan: the cost of finding their appointments by scanning all of them
+  * indexed: HospitalManager.remove_patients(ids, cascade=True), one batch, one write
+and deletes one doctor with cascade. The indexed times should stay flat as
+--appointments grows; the scan grows with it.
+
+Usage: python benchmarks/deletes.py [--appointments 200000] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import Patient, Doctor
+from manager import HospitalManager
+from scheduler import to_clock
+from storage import JSONStorage
+from exceptions.exceptions import AppointmentConflictError
+
+
+def seed(patients, doctors, appointments, rng):
+    """Books up to `appointments` distinct (doctor, day, slot) triples; a patient already booked with that doctor that day is skipped."""
+    hospital = HospitalManager(JSONStorage(os.path.join(tempfile.mkdtemp(prefix="hms-deletes-"), "hospital-data.json")))
+    with hospital.batch():
+        for i in range(patients):
+            hospital.add_patient(Patient(f"patient {i}", rng.randint(1, 95), "male", i, "flu"))
+        for i in range(doctors):
+            hospital.add_doctor(Doctor(f"doctor {i}", 45, "female", i, "general"))
+        first_day = datetime.date(2025, 1, 1)
+        for n in range(appointments):
+            day, slot = divmod(n // doctors, 16)
+            try:
+                hospital.book_appointment((first_day + datetime.timedelta(days=day)).isoformat(), hospital.patient[n % patients],
+                                          hospital.doctor[n % doctors], time=to_clock(9 * 60 + slot * 30))
+            except AppointmentConflictError:
+                pass
+    return hospital
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--appointments", type=int, default=200_000)
+    parser.add_argument("--delete", type=int, default=100)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    hospital = seed(args.patients, args.doctors, args.appointments, rng)
+    booked = len(hospital.appointment)
+    ids = rng.sample(range(args.patients), args.delete)
+
+    start = time.perf_counter()
+    doomed = set(ids)
+    affected = [a for a in list(hospital.appointment.values()) + list(hospital.cancelled.values())
+                if a.patient.get_patient_id() in doomed]
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    hospital.remove_patients(ids, cascade=True)
+    indexed = time.perf_counter() - start
+
+    doctor_appointments = len(hospital.appointments_by_doctor[0])
+    start = time.perf_counter()
+    hospital.remove_doctor(0, cascade=True)
+    doctor = time.perf_counter() - start
+
+    results = {"appointments": booked, "patients_deleted": args.delete, "appointments_deleted": len(affected),
+               "scan_find_only_ms": scan * 1000, "indexed_delete_ms": indexed * 1000,
+               "doctor_appointments_deleted": doctor_appointments, "doctor_delete_ms": doctor * 1000}
+    for key, value in results.items():
+        print(f"{key:<30}{value:10.1f}" if isinstance(value, float) else f"{key:<30}{value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
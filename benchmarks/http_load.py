@@ -0,0 +1,109 @@
+"""
+Load generator for the HTTP API (server.py).
+
+Starts the API in-process on a throwaway data directory seeded with
+--patients/--doctors records (or targets a running server with --url), then
+runs --clients concurrent keep-alive clients for --seconds and reports
+throughput and latency percentiles. Request mix: 70% patient lookups,
+20% bookings, 10% appointment listings.
+
+Usage: python benchmarks/http_load.py [--clients 16] [--seconds 10] [--url http://127.0.0.1:8080]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+import http.client
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def start_local_server(patients, doctors):
+    from hospital import Patient, Doctor
+    from manager import HospitalManager
+    from server import make_server
+    from storage import JSONStorage
+
+    data_dir = tempfile.mkdtemp(prefix="hms-load-")
+    hospital = HospitalManager(JSONStorage(os.path.join(data_dir, "hospital-data.json")))
+    with hospital.batch():
+        for i in range(patients):
+            hospital.add_patient(Patient(f"patient {i}", 30, "male", i, "fever"))
+        for i in range(doctors):
+            hospital.add_doctor(Doctor(f"doctor {i}", 40, "female", i, f"specialization {i % 10}"))
+    server = make_server(hospital, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def client(url, patients, doctors, deadline, latencies, errors):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port)
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        roll = rng.random()
+        if roll < 0.7:
+            method, path, body = "GET", f"/patients/{rng.randrange(patients)}", None
+        elif roll < 0.9:
+            method, path = "POST", "/appointments"
+            body = json.dumps({"date": f"2025-{rng.randint(1, 12)}-{rng.randint(1, 28)}",
+                               "patient_id": rng.randrange(patients), "doctor_id": rng.randrange(doctors)})
+        else:
+            method, path, body = "GET", f"/appointments?doctor_id={rng.randrange(doctors)}", None
+        start = time.perf_counter()
+        conn.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 500:
+            errors.append(response.status)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target a running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--doctors", type=int, default=50)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    url = args.url or start_local_server(args.patients, args.doctors)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=client, args=(url, args.patients, args.doctors, deadline, latencies, errors))
+               for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    results = {
+        "clients": args.clients,
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / args.seconds, 1),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "server_errors": len(errors),
+    }
+    for key, value in results.items():
+        print(f"{key:<22}{value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
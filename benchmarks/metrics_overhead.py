@@ -0,0 +1,71 @@
+"""
+Overhead of the metrics layer (metrics.py) on HospitalManager calls.
+
+Times search_patient_by_id() and search_patients() with metrics off, on, and off
+again after being on (to check disable() really restores the original methods),
+and reports the p50/p95/p99 the histograms recorded against the measured means.
+
+Usage: python benchmarks/metrics_overhead.py [--patients 10000] [--calls 100000] [--json results.json]
+"""
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import Patient
+from manager import HospitalManager
+from metrics import METRICS
+from storage import JSONStorage
+
+DISEASES = ["fever", "flu", "asthma", "diabetes", "migraine"]
+
+
+def per_call_ns(function, calls):
+    return min(timeit.repeat(function, number=calls, repeat=5)) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    hospital = HospitalManager(JSONStorage(os.path.join(tempfile.mkdtemp(prefix="hms-metrics-"), "hospital-data.json")))
+    with hospital.batch():
+        for i in range(args.patients):
+            hospital.add_patient(Patient(f"patient {i}", rng.randint(1, 95), "male", i, rng.choice(DISEASES)))
+    ids = iter(rng.choices(range(args.patients), k=args.calls * 20))
+    cases = {
+        "search_patient_by_id": (lambda: hospital.search_patient_by_id(next(ids)), args.calls),
+        "search_patients": (lambda: hospital.search_patients("patien fevr"), max(args.calls // 100, 10)),
+    }
+
+    results = {}
+    for name, (call, calls) in cases.items():
+        off = per_call_ns(call, calls)
+        METRICS.reset()
+        METRICS.enable()
+        on = per_call_ns(call, calls)
+        METRICS.disable()
+        off_again = per_call_ns(call, calls)
+        recorded = METRICS.snapshot()["operations"][name]
+        results[name] = {"off_ns": off, "on_ns": on, "off_again_ns": off_again,
+                         **{key: recorded[key] for key in ("count", "p50_ms", "p95_ms", "p99_ms")}}
+
+    print(f"{'operation':<24}{'off ns':>10}{'on ns':>10}{'off again':>11}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, row in results.items():
+        print(f"{name:<24}{row['off_ns']:10.0f}{row['on_ns']:10.0f}{row['off_again_ns']:11.0f}{row['p50_ms']:10.4f}{row['p99_ms']:10.4f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Memory benchmark for the record classes in hospital.py.
+
+Compares the slotted Patient against an equivalent class with a per-instance
+__dict__ (the layout hospital.py used before), and the plain constructor
+against Patient.from_record.
+
+Usage: python benchmarks/record_memory.py [--count 100000] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hospital import Patient
+
+
+class DictPatient:
+    """Same attributes as Patient, stored in a __dict__."""
+    def __init__(self, name, age, gender, patient_id, disease):
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.__patient_id = patient_id
+        self.disaese = disease
+
+
+def make_records(count):
+    return [{"name": f"patient {i}", "age": i % 100 + 1, "gender": "male", "id": i, "disease": "fever"}
+            for i in range(count)]
+
+
+def measure(label, build, records):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(records)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {size / len(objects):8.1f} bytes/record {elapsed * 1000:10.1f} ms")
+    return size / len(objects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="patient records to build")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    records = make_records(args.count)
+    print(f"{args.count} patient records")
+    baseline = measure("__dict__ class", lambda rs: [DictPatient(p["name"], p["age"], p["gender"], p["id"], p["disease"]) for p in rs], records)
+    slotted = measure("slotted Patient()", lambda rs: [Patient(p["name"], p["age"], p["gender"], p["id"], p["disease"]) for p in rs], records)
+    from_record = measure("slotted Patient.from_record", lambda rs: [Patient.from_record(p) for p in rs], records)
+    print(f"saving: {baseline - slotted:.1f} bytes/record ({(1 - slotted / baseline) * 100:.0f}%)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"count": args.count, "dict_bytes_per_record": baseline, "slotted_bytes_per_record": slotted,
+                       "from_record_bytes_per_record": from_record}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
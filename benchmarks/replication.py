@@ -0,0 +1,166 @@
+"""
+Change-data-capture replication (replication.py): a primary publishing its changes
+and a warm standby, in another process, applying them to its own store.
+
+Generates a synthetic hospital (benchmarks/synthetic.py) as the primary's store,
+starts a ChangePublisher on it and a standby process on an empty store, then measures:
+  * catch-up from a snapshot: time for the new standby to copy the primary and be current
+  * apply throughput: --burst bookings made as fast as the primary can, and how fast the standby applies them
+  * replication lag: p50/p95/p99 from the primary persisting a change to the standby persisting it, at --rate changes/s
+  * resume from an offset: the standby is stopped, --burst changes are made, and it is restarted
+Finally the standby's store is loaded and compared with the primary's records.
+
+Usage: python benchmarks/replication.py [--patients 20000] [--format .json] [--rate 200] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate, write_hospital, date_string, SPECIALIZATIONS
+from manager import HospitalManager
+from storage import storage_for_path
+from replication import ChangePublisher, Standby
+from metrics import Histogram
+from exceptions.exceptions import AppointmentConflictError
+
+
+def run_standby(port, path):
+    """Worker: follows the primary; answers each "status" / "reset" line on stdin with the status as JSON."""
+    standby = Standby(HospitalManager(storage_for_path(path)), "127.0.0.1", port)
+    follower = threading.Thread(target=standby.run, daemon=True)
+    follower.start()
+    for command in sys.stdin:
+        if command.strip() == "reset":
+            standby.lag = Histogram()
+            standby.applied, standby.apply_seconds = 0, 0.0
+        print(json.dumps(standby.status()), flush=True)
+    standby.stop()
+    follower.join()
+
+
+class StandbyProcess:
+    def __init__(self, port, path):
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--standby", str(port), "--path", path],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(path))
+
+    def ask(self, command="status"):
+        self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def wait_for(self, publisher, timeout=600):
+        """Polls until the standby has applied the publisher's latest change; returns its status."""
+        seq, deadline = publisher.seq, time.perf_counter() + timeout
+        while True:
+            status = self.ask()
+            if (status["stream_id"] == publisher.stream_id and status["seq"] >= seq) or time.perf_counter() > deadline:
+                return status
+            time.sleep(0.005)
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=20_000)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--appointments", type=int, default=40_000)
+    parser.add_argument("--format", choices=(".json", ".hms", ".db"), default=".json", help="backend of both stores")
+    parser.add_argument("--burst", type=int, default=2000, help="changes made back to back")
+    parser.add_argument("--rate", type=float, default=200, help="changes per second while measuring lag")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--standby", type=int, help=argparse.SUPPRESS)  #! internal: run the standby on this port
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.standby:
+        run_standby(args.standby, args.path)
+        return
+
+    rng = random.Random(5)
+    data = generate(args.patients, args.doctors, args.appointments)
+    path = write_hospital(tempfile.mkdtemp(prefix="hms-primary-"), data)
+    if args.format != ".json":
+        from bulk import convert_snapshot
+        convert_snapshot(path, os.path.splitext(path)[0] + args.format)
+        path = os.path.splitext(path)[0] + args.format
+    standby_path = os.path.join(tempfile.mkdtemp(prefix="hms-standby-"), "hospital-data" + args.format)
+    primary = HospitalManager(storage_for_path(path))
+    publisher = ChangePublisher(primary, port=0)
+    port = publisher.address[1]
+    patient_ids = list(primary.patient)
+
+    def change():
+        slot = primary.earliest_available(rng.choice(SPECIALIZATIONS), date_string(rng.randrange(365)))
+        try:
+            appointment = primary.book_appointment(slot[1], primary.patient[rng.choice(patient_ids)], slot[0], time=slot[2])
+        except AppointmentConflictError:
+            return
+        if rng.random() < 0.2:
+            primary.cancel_appointment(appointment.number)
+
+    start = time.perf_counter()
+    standby = StandbyProcess(port, standby_path)
+    caught_up = standby.wait_for(publisher)
+    snapshot_catch_up = time.perf_counter() - start
+
+    standby.ask("reset")
+    first, start = publisher.seq, time.perf_counter()
+    for _ in range(args.burst):
+        change()
+    primary_seconds = time.perf_counter() - start
+    burst = standby.wait_for(publisher)
+    burst_seconds = time.perf_counter() - start
+    burst_changes = publisher.seq - first
+
+    standby.ask("reset")
+    interval, start, made = 1 / args.rate, time.perf_counter(), 0
+    while time.perf_counter() - start < args.seconds:
+        change()
+        made += 1
+        time.sleep(max(start + made * interval - time.perf_counter(), 0))
+    steady = standby.wait_for(publisher)
+    standby.close()
+
+    offline = publisher.seq
+    for _ in range(args.burst):
+        change()
+    start = time.perf_counter()
+    standby = StandbyProcess(port, standby_path)
+    resumed = standby.wait_for(publisher)
+    resume_seconds = time.perf_counter() - start
+    standby.close()
+
+    copy = HospitalManager(storage_for_path(standby_path))
+    records = lambda hospital: {kind: sorted(json.dumps(record, sort_keys=True) for record in rows) for kind, rows in hospital.snapshot().items()}
+    results = {"format": args.format, "records": sum(map(len, data.values())),
+               "snapshot_catch_up_s": snapshot_catch_up, "snapshot_seq": caught_up["seq"],
+               "burst_changes": burst_changes, "primary_changes_per_s": burst_changes / primary_seconds,
+               "standby_apply_per_s": burst["apply_per_s"], "burst_replicated_s": burst_seconds,
+               "burst_lag_p99_ms": burst["lag_p99_ms"],
+               "rate_changes_per_s": steady["applied"] / args.seconds, "lag_p50_ms": steady["lag_p50_ms"],
+               "lag_p95_ms": steady["lag_p95_ms"], "lag_p99_ms": steady["lag_p99_ms"], "lag_max_ms": steady["lag_max_ms"],
+               "resumed_changes": publisher.seq - offline, "resume_catch_up_s": resume_seconds,
+               "resume_snapshots": resumed["snapshots"], "standby_matches": records(copy) == records(primary)}
+    for key, value in results.items():
+        print(f"{key:<28}{value:10.3f}" if isinstance(value, float) else f"{key:<28}{value!s:>10}")
+    publisher.close()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Reporting benchmark: columnar snapshot (reports.py) vs naive loops.
+
+Seeds a throwaway data directory with --patients patients, --doctors doctors and
+--appointments appointments (some cancelled or marked no-show), then times:
+  * naive: each report as a Python loop over HospitalManager's objects
+  * snapshot build: copying the records into columns
+  * reports: the four grouped aggregates on a built snapshot, with NumPy and without
+Results are checked to agree with the naive loops.
+
+Usage: python benchmarks/reports.py [--appointments 200000] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import Patient, Doctor, NO_SHOW, CANCELLED
+from manager import HospitalManager
+from reports import ReportSnapshot, REPORTS, AGE_GROUPS, numpy
+from scheduler import to_clock
+from storage import JSONStorage
+
+DISEASES = ["fever", "flu", "asthma", "diabetes", "migraine", "covid", "heart", "back pain"]
+SPECIALIZATIONS = ["cardiology", "neurology", "dermatology", "pediatrics", "oncology", "orthopedics"]
+
+
+def seed(patients, doctors, appointments, rng):
+    data_dir = tempfile.mkdtemp(prefix="hms-reports-")
+    hospital = HospitalManager(JSONStorage(os.path.join(data_dir, "hospital-data.json")))
+    with hospital.batch():
+        for i in range(patients):
+            hospital.add_patient(Patient(f"patient {i}", rng.randint(1, 95), "male", i, rng.choice(DISEASES)))
+        for i in range(doctors):
+            hospital.add_doctor(Doctor(f"doctor {i}", 45, "female", i, rng.choice(SPECIALIZATIONS)))
+        slots_per_day = 16
+        for n in range(appointments):
+            doctor, day_slot = n % doctors, n // doctors
+            day, slot = divmod(day_slot, slots_per_day)
+            date = f"2025-{day // 28 % 12 + 1}-{day % 28 + 1}"
+            appointment = hospital.book_appointment(date, hospital.patient[n % patients], hospital.doctor[doctor],
+                                                    time=to_clock(9 * 60 + slot * 30))
+            roll = rng.random()
+            if roll < 0.08:
+                hospital.cancel_appointment(appointment.number)
+            elif roll < 0.13:
+                hospital.mark_no_show(appointment.number)
+    return hospital
+
+
+def naive_reports(hospital):
+    """The same figures as reports.py, computed the obvious way."""
+    per_doctor_day = defaultdict(int)
+    load = defaultdict(int)
+    attendance = defaultdict(lambda: [0, 0, 0])
+    for appointment in list(hospital.appointment.values()) + list(hospital.cancelled.values()):
+        doctor = appointment.doctor
+        specialization = doctor.specialization.strip().lower()
+        counts = attendance[specialization]
+        if appointment.status == CANCELLED:
+            counts[2] += 1
+            continue
+        counts[1 if appointment.status == NO_SHOW else 0] += 1
+        per_doctor_day[(doctor.get_doctor_id(), appointment.date)] += 1
+        load[specialization] += 1
+    ages = defaultdict(list)
+    for patient in hospital.patient.values():
+        ages[patient.disaese.strip().lower()].append(patient.age)
+    age_rows = {}
+    for disease, values in ages.items():
+        age_rows[disease] = (len(values), round(sum(values) / len(values), 1), min(values), max(values),
+                             [sum(1 for age in values if lo <= age <= hi) for _, lo, hi in AGE_GROUPS])
+    return per_doctor_day, load, attendance, age_rows
+
+
+def check(snapshot_reports, naive):
+    per_doctor_day, load, attendance, ages = naive
+    assert sum(row["appointments"] for row in snapshot_reports["doctor_days"]) == sum(per_doctor_day.values())
+    assert len(snapshot_reports["doctor_days"]) == len(per_doctor_day)
+    assert {row["specialization"]: row["appointments"] for row in snapshot_reports["specializations"]} == dict(load)
+    for row in snapshot_reports["attendance"][:-1]:
+        kept, no_shows, cancelled = attendance[row["specialization"]]
+        assert (row["no_shows"], row["cancelled"], row["booked"]) == (no_shows, cancelled, kept + no_shows + cancelled)
+    for row in snapshot_reports["ages"]:
+        count, mean, youngest, oldest, _ = ages[row["disease"]]
+        assert (row["patients"], row["mean_age"], row["min_age"], row["max_age"]) == (count, mean, youngest, oldest)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run_reports(snapshot):
+    return {name: (report(snapshot, None, None) if dated else report(snapshot)) for name, (_, report, dated) in REPORTS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--appointments", type=int, default=200_000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    hospital = seed(args.patients, args.doctors, args.appointments, random.Random(7))
+    naive, naive_seconds = timed(naive_reports, hospital)
+    results = {"appointments": args.appointments, "patients": args.patients, "naive_ms": naive_seconds * 1000}
+    for label, use_numpy in (("numpy", True), ("python", False)):
+        if use_numpy and numpy is None:
+            continue
+        snapshot, build_seconds = timed(ReportSnapshot, hospital, use_numpy)
+        reports, report_seconds = timed(run_reports, snapshot)
+        check(reports, naive)
+        results[f"{label}_snapshot_ms"] = build_seconds * 1000
+        results[f"{label}_reports_ms"] = report_seconds * 1000
+
+    for key, value in results.items():
+        print(f"{key:<24}{value:10.1f}" if isinstance(value, float) else f"{key:<24}{value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
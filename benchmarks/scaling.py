@@ -0,0 +1,258 @@
+"""
+Scaling benchmark for the whole system.
+
+For each size, generates a synthetic hospital (benchmarks/synthetic.py) with that
+many patients, --doctor-ratio doctors and --appointment-ratio appointments per
+patient, then:
+  * in a fresh process, drives HospitalManager through load, ID lookups, full-text
+    searches, earliest-slot searches, bookings, cancellations, no-shows, a full
+    save and the reports, recording throughput per phase, p50/p95/p99 per
+    operation (metrics.py) and the peak RSS of the process
+  * runs scripted sessions of the menu (`main.py --fast` with piped input) and
+    records their wall-clock time, start-up and data load included
+
+Everything is written to --out as JSON, with the git commit, so a later run can
+be checked against it with --compare (metrics more than --threshold worse are flagged).
+
+Usage: python benchmarks/scaling.py [--sizes 1000,10000,100000] [--out scaling.json] [--compare old.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate, write_hospital, date_string, FIRST_NAMES, LAST_NAMES, DISEASES, SPECIALIZATIONS
+
+ENV = dict(os.environ, PYTHONPATH=ROOT, PYTHONIOENCODING="utf-8", HMS_METRICS="0")
+
+
+def peak_rss_mb():
+    """Peak RSS of this process; VmHWM on Linux (ru_maxrss there includes the parent's peak before exec)."""
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+#? ######################################
+#? --- HospitalManager workload (worker)
+#? ######################################
+
+def run_workload(path, operations, seed):
+    """Runs every phase against the data file at `path`; returns the results dict."""
+    from manager import HospitalManager
+    from metrics import METRICS
+    from reports import build_reports
+    from storage import JSONStorage
+    from exceptions.exceptions import AppointmentConflictError
+
+    rng = random.Random(seed)
+    METRICS.enable()
+    phases = {}
+
+    def phase(name, count, body):
+        start = time.perf_counter()
+        result = body()
+        seconds = time.perf_counter() - start
+        phases[name] = {"operations": count, "seconds": round(seconds, 4), "ops_per_s": round(count / seconds, 1) if seconds else None}
+        return result
+
+    hospital = phase("load", 1, lambda: HospitalManager(JSONStorage(path)))
+    patient_ids, doctor_ids = list(hospital.patient), list(hospital.doctor)
+    days = sorted({appointment.date for appointment in hospital.appointment.values()}) or [date_string(0)]
+
+    def lookups():
+        for patient_id in rng.choices(patient_ids, k=operations):
+            hospital.search_patient_by_id(patient_id)
+        for doctor_id in rng.choices(doctor_ids, k=operations):
+            hospital.search_doctor_by_id(doctor_id)
+    phase("id_lookups", 2 * operations, lookups)
+
+    queries = max(operations // 10, 1)
+    def text_searches():
+        for _ in range(queries):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            typo = name[:2] + name[3:] if rng.random() < 0.3 else name  #! some queries carry a typo
+            hospital.search_patients(rng.choice([typo, rng.choice(list(DISEASES))]))
+            hospital.search_doctors(rng.choice([rng.choice(LAST_NAMES), rng.choice(SPECIALIZATIONS)]))
+    phase("text_searches", 2 * queries, text_searches)
+
+    phase("slot_searches", queries, lambda: [hospital.earliest_available(rng.choice(SPECIALIZATIONS), rng.choice(days))
+                                             for _ in range(queries)])
+
+    bookings, conflicts = [], 0
+    def book():
+        nonlocal conflicts
+        for _ in range(operations // 2):
+            patient = hospital.patient[rng.choice(patient_ids)]
+            slot = hospital.earliest_available(rng.choice(SPECIALIZATIONS), rng.choice(days))
+            try:
+                bookings.append(hospital.book_appointment(slot[1], patient, slot[0], time=slot[2]))
+            except AppointmentConflictError:
+                conflicts += 1
+    phase("book", operations // 2, book)
+    phases["book"]["conflicts"] = conflicts
+
+    cancelled = bookings[::2]
+    phase("cancel", len(cancelled), lambda: [hospital.cancel_appointment(a.number) for a in cancelled])
+    no_shows = bookings[1::4]
+    phase("no_show", len(no_shows), lambda: [hospital.mark_no_show(a.number) for a in no_shows])
+
+    def save():
+        with hospital.transaction():
+            hospital.save_data()
+    phase("save", 1, save)
+    phase("reports", 1, lambda: build_reports(hospital))
+
+    snapshot = METRICS.snapshot()
+    return {"phases": phases, "latency": snapshot["operations"], "counters": snapshot["counters"],
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "records": {"patients": len(hospital.patient), "doctors": len(hospital.doctor),
+                        "appointments": len(hospital.appointment), "cancelled": len(hospital.cancelled)}}
+
+#? ######################################
+#? --- Menu sessions
+#? ######################################
+
+def menu_scripts(data, run):
+    """Name -> stdin for one scripted menu session; IDs come from the generated data, new ones differ per run."""
+    patient = data["patients"][run % len(data["patients"])]
+    first_name = patient["name"].split()[0]
+    return {
+        "start_exit": "9\n",
+        "add_patient": f"1\n1\nbench patient {run}\n40\nmale\n{10**9 + run}\nflu\n3\n9\n",
+        "book_by_specialization": f"2\n{date_string(run)}\n{patient['id']}\n\n{SPECIALIZATIONS[run % len(SPECIALIZATIONS)]}\n\n9\n",
+        "search": f"4\n1\n{patient['id']}\n3\n{first_name}\n4\n{SPECIALIZATIONS[0]}\n5\n9\n",
+        "list_appointments": "3\n\n\n\n\nn\nq\n9\n",
+        "reports": "7\n\n\n9\n",
+    }
+
+
+def run_menu(data_dir, script):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), "--fast"], input=script, cwd=data_dir,
+                            capture_output=True, text=True, env=ENV)
+    seconds = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"menu session failed:\n{result.stdout[-2000:]}\n{result.stderr[-2000:]}")
+    return seconds
+
+
+def run_menus(data_dir, data, runs):
+    timings = {}
+    for run in range(runs):
+        for name, script in menu_scripts(data, run).items():
+            timings.setdefault(name, []).append(run_menu(data_dir, script))
+    return {name: {"median_ms": round(statistics.median(values) * 1000, 1), "max_ms": round(max(values) * 1000, 1)}
+            for name, values in timings.items()}
+
+#? ######################################
+#? --- Results and comparison
+#? ######################################
+
+def key_metrics(size_results):
+    """Flat {metric: value} used by --compare; lower is better for all of them."""
+    flat = {"peak_rss_mb": size_results["peak_rss_mb"]}
+    for name, phase in size_results["phases"].items():
+        flat[f"{name}.seconds"] = phase["seconds"]
+    for name, latency in size_results["latency"].items():
+        flat[f"{name}.p95_ms"] = latency["p95_ms"]
+    for name, menu in size_results.get("menu", {}).items():
+        flat[f"menu.{name}.median_ms"] = menu["median_ms"]
+    return flat
+
+
+def compare(previous, current, threshold):
+    """Prints every shared metric with its change; returns how many got worse by more than threshold."""
+    regressions = 0
+    print(f"\nCompared with {previous.get('commit') or 'unknown commit'} ({previous.get('timestamp')}):")
+    for size, results in current["sizes"].items():
+        if size not in previous["sizes"]:
+            continue
+        old, new = key_metrics(previous["sizes"][size]), key_metrics(results)
+        print(f"\n{'size ' + size:<40}{'before':>12}{'after':>12}{'change':>10}")
+        for metric in sorted(old.keys() & new.keys()):
+            before, after = old[metric], new[metric]
+            if not before:
+                continue
+            change = after / before - 1
+            flag = "  REGRESSION" if change > threshold else ""
+            regressions += bool(flag)
+            print(f"{metric:<40}{before:12.3f}{after:12.3f}{change:+9.0%}{flag}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated patient counts")
+    parser.add_argument("--doctor-ratio", type=float, default=0.01, help="doctors per patient (at least 12)")
+    parser.add_argument("--appointment-ratio", type=float, default=2.0, help="appointments per patient")
+    parser.add_argument("--operations", type=int, default=2000, help="ID lookups per phase; the other phases scale from it")
+    parser.add_argument("--menu-runs", type=int, default=3, help="runs of each menu session (0 skips them)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="scaling.json", help="results file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  #! internal: run the workload on this data file
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_workload(args.worker, args.operations, args.seed)))
+        return
+
+    report = {"commit": git_commit(), "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "python": platform.python_version(),
+              "platform": platform.platform(), "arguments": vars(args), "sizes": {}}
+    print(f"{'patients':>10}{'doctors':>9}{'appts':>9}{'load s':>9}{'save s':>9}{'book/s':>9}{'lookup/s':>11}{'search/s':>10}{'RSS MB':>9}")
+    for size in map(int, args.sizes.split(",")):
+        doctors = max(int(size * args.doctor_ratio), len(SPECIALIZATIONS))
+        data = generate(size, doctors, int(size * args.appointment_ratio), seed=args.seed)
+        data_dir = tempfile.mkdtemp(prefix="hms-scaling-")
+        path = write_hospital(data_dir, data)
+
+        worker = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", path, "--operations", str(args.operations),
+                                 "--seed", str(args.seed)], capture_output=True, text=True, env=ENV, cwd=data_dir)
+        if worker.returncode:
+            raise RuntimeError(worker.stderr)
+        results = json.loads(worker.stdout)
+        results["generated"] = {kind: len(rows) for kind, rows in data.items()}
+        if args.menu_runs:
+            write_hospital(data_dir, data)  #! the menu sessions start from the generated data, not the workload's changes
+            results["menu"] = run_menus(data_dir, data, args.menu_runs)
+        report["sizes"][str(size)] = results
+
+        phases = results["phases"]
+        print(f"{size:>10}{doctors:>9}{len(data['appointments']):>9}{phases['load']['seconds']:9.2f}{phases['save']['seconds']:9.2f}"
+              f"{phases['book']['ops_per_s']:9.0f}{phases['id_lookups']['ops_per_s']:11.0f}{phases['text_searches']['ops_per_s']:10.0f}"
+              f"{results['peak_rss_mb']:9.1f}")
+        for name, menu in results.get("menu", {}).items():
+            print(f"{'':>10}  menu {name:<24}{menu['median_ms']:9.0f} ms")
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"\nResults written to {args.out}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Earliest-free-slot benchmark for the scheduler (scheduler.py).
+
+Registers --doctors doctors in one specialization, fills their calendars for
+--days days at --fill occupancy, then times Scheduler.earliest() against a
+naive scan that walks every doctor's slots day by day.
+
+Usage: python benchmarks/scheduling.py [--doctors 200] [--days 90] [--fill 0.9] [--queries 2000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import Doctor, Patient, Appointment
+from scheduler import Scheduler, day_number, day_string, to_clock
+
+
+def build(doctors, days, fill, rng):
+    scheduler = Scheduler()
+    patient = Patient("benchmark", 30, "male", 1, "none")
+    first_day = day_number("2025-01-01")
+    for doctor_id in range(doctors):
+        doctor = Doctor(f"doctor {doctor_id}", 40, "female", doctor_id, "cardiology", "09:00", "17:00", 30)
+        scheduler.add_doctor(doctor)
+        schedule = scheduler.schedules[doctor_id]
+        for day in range(first_day, first_day + days):
+            #! most days are fully booked, so a naive search has to walk far
+            fully = rng.random() < fill
+            for minute in range(schedule.first, schedule.last + 1, schedule.step):
+                if fully or rng.random() < fill:
+                    scheduler.book(Appointment(day_string(day), patient, doctor, 0, to_clock(minute)))
+    return scheduler, first_day
+
+
+def naive_earliest(scheduler, day, minute):
+    best = None
+    for doctor_id, schedule in scheduler.schedules.items():
+        d, m = day, minute
+        while True:
+            taken = schedule.booked.get(d, ())
+            start = next((s for s in range(schedule.first, schedule.last + 1, schedule.step)
+                          if s >= m and s not in taken), None)
+            if start is not None:
+                break
+            d, m = d + 1, 0
+        if best is None or (d, start) < best[:2]:
+            best = (d, start, doctor_id)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--fill", type=float, default=0.9)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    scheduler, first_day = build(args.doctors, args.days, args.fill, rng)
+    queries = [(first_day + rng.randrange(args.days), rng.randrange(9 * 60, 17 * 60)) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    fast = [scheduler.earliest("cardiology", day_string(day), to_clock(minute)) for day, minute in queries]
+    indexed = time.perf_counter() - start
+    naive_queries = queries[:max(1, args.queries // 20)]
+    start = time.perf_counter()
+    slow = [naive_earliest(scheduler, day, minute) for day, minute in naive_queries]
+    naive = time.perf_counter() - start
+
+    for got, expected in zip(fast, slow):
+        assert (day_number(got[1]), int(got[2][:2]) * 60 + int(got[2][3:])) == expected[:2], (got, expected)
+    results = {
+        "doctors": args.doctors,
+        "booked_slots": sum(len(taken) for s in scheduler.schedules.values() for taken in s.booked.values()),
+        "indexed_us_per_query": round(indexed / len(queries) * 1e6, 1),
+        "naive_us_per_query": round(naive / len(naive_queries) * 1e6, 1),
+    }
+    for key, value in results.items():
+        print(f"{key:<24}{value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
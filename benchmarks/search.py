@@ -0,0 +1,90 @@
+"""
+Full-text search benchmark for the patient index (search.py).
+
+Indexes --records synthetic patients (benchmarks/synthetic.py: a few dozen common
+first and last names, so every name word is shared by tens of thousands of records)
+on name and disease, the way HospitalManager does, then times --queries queries of
+each kind: a first name, a full name, a name and a disease, a prefix, a typo and a
+disease. Reports the p50/p99/max latency per kind in milliseconds and exits with
+status 1 if any p99 is above --target-ms.
+
+Usage: python benchmarks/search.py [--records 1000000] [--queries 2000] [--target-ms 1.0] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate, FIRST_NAMES, LAST_NAMES, DISEASES
+from search import SearchIndex
+
+
+def typo(word, rng):
+    """The word with two neighbouring letters swapped."""
+    i = rng.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+QUERIES = {
+    "first_name": lambda rng: rng.choice(FIRST_NAMES),
+    "full_name": lambda rng: f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+    "name_and_disease": lambda rng: f"{rng.choice(LAST_NAMES)} {rng.choice(list(DISEASES))}",
+    "prefix": lambda rng: rng.choice(FIRST_NAMES + LAST_NAMES)[:3],
+    "typo": lambda rng: typo(rng.choice([name for name in FIRST_NAMES + LAST_NAMES if len(name) > 4]), rng),
+    "disease": lambda rng: rng.choice(list(DISEASES)),
+}
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000, help="queries of each kind")
+    parser.add_argument("--target-ms", type=float, default=1.0, help="p99 latency every kind must stay under")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    patients = generate(args.records, 12, 0, seed=args.seed)["patients"]
+    index = SearchIndex({"name": 2.0, "disease": 1.0})
+    start = time.perf_counter()
+    for record in patients:
+        index.add(record["id"], record)
+    build_seconds = time.perf_counter() - start
+    del patients
+
+    results = {"records": len(index), "build_s": round(build_seconds, 2), "target_ms": args.target_ms, "kinds": {}}
+    print(f"{len(index)} records indexed in {build_seconds:.1f}s\n")
+    print(f"{'query':<18}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}  example")
+    for kind, make in QUERIES.items():
+        texts = [make(rng) for _ in range(args.queries)]
+        latencies = []
+        for text in texts:
+            start = time.perf_counter()
+            index.search(text)
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results["kinds"][kind] = {"p50_ms": round(percentile(latencies, 0.50), 3), "p99_ms": round(percentile(latencies, 0.99), 3),
+                                  "max_ms": round(latencies[-1], 3)}
+        stats = results["kinds"][kind]
+        print(f"{kind:<18}{stats['p50_ms']:9.3f}{stats['p99_ms']:9.3f}{stats['max_ms']:9.3f}  {texts[0]!r}")
+
+    over = [kind for kind, stats in results["kinds"].items() if stats["p99_ms"] > args.target_ms]
+    results["meets_target"] = not over
+    print(f"\np99 under {args.target_ms} ms: " + ("yes" if not over else f"no ({', '.join(over)})"))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
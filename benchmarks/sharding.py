@@ -0,0 +1,93 @@
+"""
+Sharded stores (sharding.py) against one store holding the whole network.
+
+Generates a synthetic network (benchmarks/synthetic.py), splits it into shards
+(--by department or ids), then times:
+  * loading the single store, one shard, and every shard serially and with --workers processes
+  * routed ID lookups (the shard is already loaded) and doctor appointment lists
+  * saving after a booking: the single store, and the sharded network (only the touched shard is written)
+
+Usage: python benchmarks/sharding.py [--patients 50000] [--by department] [--workers 4] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import generate, write_hospital, date_string
+from manager import HospitalManager
+from sharding import ShardMap, ShardedHospital, plan_shards, split_hospital
+from storage import JSONStorage
+
+
+def timed(body):
+    start = time.perf_counter()
+    result = body()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=50_000)
+    parser.add_argument("--doctors", type=int, default=240)
+    parser.add_argument("--appointments", type=int, default=100_000)
+    parser.add_argument("--by", choices=("department", "ids"), default="department")
+    parser.add_argument("--count", type=int, default=8, help="--by ids: number of shards")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    data = generate(args.patients, args.doctors, args.appointments)
+    data_dir = tempfile.mkdtemp(prefix="hms-sharding-")
+    path = write_hospital(data_dir, data)
+    shard_map = ShardMap(plan_shards(data, args.by, args.count), os.path.join(data_dir, "data", "shards.json"))
+    split_hospital(data, shard_map)
+    names = shard_map.names()
+    doctor_ids = [d["id"] for d in data["doctors"]]
+    patient_ids = [p["id"] for p in data["patients"]]
+
+    single, single_load = timed(lambda: HospitalManager(JSONStorage(path)))
+    sharded = ShardedHospital(ShardMap.load(shard_map.path), args.workers)
+    doctor_id = rng.choice(doctor_ids)
+    _, one_shard_load = timed(lambda: sharded.shard(sharded.shard_of_doctor(doctor_id)))
+    sharded.close()
+    _, serial_load = timed(lambda: ShardedHospital(ShardMap.load(shard_map.path)).load(workers=1))
+    sharded = ShardedHospital(ShardMap.load(shard_map.path), args.workers)
+    _, parallel_load = timed(sharded.load)
+
+    ids = rng.choices(patient_ids, k=args.lookups)
+    _, single_lookups = timed(lambda: [single.search_patient_by_id(i) for i in ids])
+    _, sharded_lookups = timed(lambda: [sharded.search_patient_by_id(i) for i in ids])
+    doctors = rng.choices(doctor_ids, k=args.lookups // 10)
+    _, single_lists = timed(lambda: [single.appointments_for_doctor(d) for d in doctors])
+    _, sharded_lists = timed(lambda: [sharded.appointments_for_doctor(d) for d in doctors])
+
+    patient_id, day = rng.choice(patient_ids), date_string(400)
+    single.book_appointment(day, single.patient[patient_id], single.doctor[doctor_id])
+    _, single_save = timed(single.save_data)
+    touched = ShardedHospital(ShardMap.load(shard_map.path))
+    touched.book_appointment(day, patient_id, doctor_id)
+    _, sharded_save = timed(touched.save_data)
+
+    results = {"shards": len(names), "by": args.by, "workers": args.workers,
+               "single_load_s": single_load, "one_shard_load_s": one_shard_load,
+               "all_shards_serial_load_s": serial_load, "all_shards_parallel_load_s": parallel_load,
+               "single_lookup_us": single_lookups / args.lookups * 1e6, "sharded_lookup_us": sharded_lookups / args.lookups * 1e6,
+               "single_doctor_list_us": single_lists / len(doctors) * 1e6, "sharded_doctor_list_us": sharded_lists / len(doctors) * 1e6,
+               "single_save_s": single_save, "sharded_save_s": sharded_save, "shards_loaded_to_book": len(touched.loaded())}
+    for key, value in results.items():
+        print(f"{key:<30}{value:10.3f}" if isinstance(value, float) else f"{key:<30}{value:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Startup benchmark.
+
+Reports:
+  * `python -X importtime -c "import main"`: total import time and the slowest modules
+  * wall clock from launching `python main.py` until the menu prompt appears (rich and --fast menus)
+  * wall clock of a full HospitalManager() load of the data directory
+
+Run it from a directory containing the data/ folder to measure (the menu run
+writes to log/ there). Usage:
+    python benchmarks/startup.py [--runs 5] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+ENV = dict(os.environ, PYTHONPATH=ROOT, PYTHONIOENCODING="utf-8")
+
+
+def import_times(top=10):
+    """Returns (total microseconds for `import main`, [(cumulative us, module)] for the slowest modules)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True, env=ENV)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    total = next((us for us, name in rows if name == "main"), 0)
+    return total, sorted(rows, reverse=True)[1:top + 1]
+
+
+def time_to_menu(fast):
+    """Seconds from launching main.py until the menu prompt is printed."""
+    args = [sys.executable, MAIN] + (["--fast"] if fast else [])
+    start = time.perf_counter()
+    process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=ENV)
+    output = b""
+    while b"Enter your choice" not in output:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            break
+        output += chunk
+    elapsed = time.perf_counter() - start
+    process.communicate(b"9\n")
+    return elapsed
+
+
+def time_full_load():
+    code = ("import time; t = time.perf_counter(); from manager import HospitalManager; "
+            "HospitalManager(); print(time.perf_counter() - t)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=ENV)
+    return float(result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    total_us, slowest = import_times()
+    results = {
+        "import_main_ms": total_us / 1000,
+        "slowest_imports_ms": {name: us / 1000 for us, name in slowest},
+        "menu_rich_ms": statistics.median(time_to_menu(False) for _ in range(args.runs)) * 1000,
+        "menu_fast_ms": statistics.median(time_to_menu(True) for _ in range(args.runs)) * 1000,
+        "full_load_ms": statistics.median(time_full_load() for _ in range(args.runs)) * 1000,
+    }
+
+    print(f"import main:              {results['import_main_ms']:8.1f} ms")
+    for name, ms in results["slowest_imports_ms"].items():
+        print(f"  {name:<24}{ms:8.1f} ms")
+    print(f"time to menu (rich):      {results['menu_rich_ms']:8.1f} ms")
+    print(f"time to menu (--fast):    {results['menu_fast_ms']:8.1f} ms")
+    print(f"HospitalManager() load:   {results['full_load_ms']:8.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Synthetic hospital generator.
+
+Builds a hospital with N patients, M doctors and K appointments in the
+hospital-data.json schema: names drawn from common first/last names, ages
+that depend on the disease, doctors whose specializations match the diseases,
+varied working hours, and appointments spread over --days days in free slots
+only (no double-booked slot, no patient twice with one doctor on one day),
+about 8% of them cancelled and 5% marked no-show.
+
+The result is written with JSONStorage, so it is exactly what the app would save.
+
+Usage: python benchmarks/synthetic.py DATA_DIR [--patients 10000] [--doctors 100] [--appointments 20000] [--seed 1]
+"""
+import os
+import sys
+import random
+import argparse
+import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hospital import BOOKED, NO_SHOW, CANCELLED
+from scheduler import to_minutes, to_clock
+from storage import JSONStorage
+
+FIRST_NAMES = ["muhammad", "ali", "fatima", "ayesha", "ahmed", "sara", "hassan", "zainab", "omar", "maryam",
+               "john", "emma", "james", "olivia", "lucas", "mia", "noah", "sofia", "liam", "amina",
+               "yusuf", "hira", "bilal", "noor", "daniel", "grace", "ibrahim", "khadija", "david", "layla"]
+LAST_NAMES = ["khan", "ahmed", "ali", "hussain", "shah", "malik", "smith", "johnson", "brown", "garcia",
+              "iqbal", "raza", "chaudhry", "williams", "jones", "miller", "qureshi", "siddiqui", "sheikh", "butt"]
+#! disease -> (specialization treating it, typical age range, relative frequency)
+DISEASES = {
+    "flu": ("general medicine", (1, 90), 20), "fever": ("general medicine", (1, 90), 15),
+    "asthma": ("pulmonology", (3, 80), 8), "diabetes": ("endocrinology", (25, 90), 10),
+    "hypertension": ("cardiology", (30, 95), 10), "heart disease": ("cardiology", (40, 95), 6),
+    "migraine": ("neurology", (12, 70), 6), "back pain": ("orthopedics", (20, 85), 8),
+    "fracture": ("orthopedics", (5, 90), 5), "eczema": ("dermatology", (1, 60), 4),
+    "ear infection": ("pediatrics", (1, 12), 4), "depression": ("psychiatry", (15, 80), 4),
+}
+SPECIALIZATIONS = sorted({specialization for specialization, _, _ in DISEASES.values()})
+HOURS = [("08:00", "16:00", 20), ("09:00", "17:00", 30), ("09:00", "13:00", 15), ("12:00", "20:00", 30), ("10:00", "18:00", 20)]
+START_DATE = datetime.date(2025, 1, 1)
+
+
+def date_string(day):
+    """Day offset from START_DATE -> YYYY-M-D, the way dates are typed into the menu."""
+    date = START_DATE + datetime.timedelta(days=day)
+    return f"{date.year}-{date.month}-{date.day}"
+
+
+def generate(patients, doctors, appointments, days=365, seed=1):
+    """Returns {"patients": [...], "doctors": [...], "appointments": [...]} in the load() layout."""
+    rng = random.Random(seed)
+    diseases = list(DISEASES)
+    weights = [frequency for _, _, frequency in DISEASES.values()]
+
+    patient_rows = []
+    for patient_id, disease in enumerate(rng.choices(diseases, weights, k=patients), start=1):
+        low, high = DISEASES[disease][1]
+        patient_rows.append({"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "age": rng.randint(low, high),
+                             "gender": rng.choice(("male", "female")), "id": patient_id, "disease": disease})
+
+    doctor_rows = []
+    for n in range(doctors):
+        start, end, slot_minutes = rng.choice(HOURS)
+        doctor_rows.append({"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "age": rng.randint(28, 68),
+                            "gender": rng.choice(("male", "female")), "id": n + 1,
+                            "specialization": SPECIALIZATIONS[n % len(SPECIALIZATIONS)],  #! every specialization staffed
+                            "work_start": start, "work_end": end, "slot_minutes": slot_minutes})
+    by_specialization = {}
+    for doctor in doctor_rows:
+        by_specialization.setdefault(doctor["specialization"], []).append(doctor)
+
+    appointment_rows, next_slot, seen = [], {}, set()
+    capacity = sum((to_minutes(d["work_end"]) - to_minutes(d["work_start"])) // d["slot_minutes"] for d in doctor_rows) * days
+    for number in range(1, min(appointments, capacity) + 1):
+        while True:
+            patient = rng.choice(patient_rows)
+            candidates = by_specialization.get(DISEASES[patient["disease"]][0]) or doctor_rows
+            doctor, day = rng.choice(candidates), rng.randrange(days)
+            slots = (to_minutes(doctor["work_end"]) - to_minutes(doctor["work_start"])) // doctor["slot_minutes"]
+            slot = next_slot.get((doctor["id"], day), 0)
+            if slot < slots and (patient["id"], doctor["id"], day) not in seen:
+                break
+        next_slot[(doctor["id"], day)] = slot + 1
+        seen.add((patient["id"], doctor["id"], day))
+        roll = rng.random()
+        appointment_rows.append({"id": number, "date": date_string(day),
+                                 "time": to_clock(to_minutes(doctor["work_start"]) + slot * doctor["slot_minutes"]),
+                                 "status": CANCELLED if roll < 0.08 else NO_SHOW if roll < 0.13 else BOOKED,
+                                 "patient_id": patient["id"], "doctor_id": doctor["id"]})
+    return {"patients": patient_rows, "doctors": doctor_rows, "appointments": appointment_rows}
+
+
+def write_hospital(data_dir, data):
+    """Saves `data` as data_dir/data/hospital-data.json (where main.py looks when run from data_dir)."""
+    storage = JSONStorage(os.path.join(data_dir, "data", "hospital-data.json"))
+    storage.save(data)
+    return storage.path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("data_dir")
+    parser.add_argument("--patients", type=int, default=10_000)
+    parser.add_argument("--doctors", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    data = generate(args.patients, args.doctors, args.appointments, args.days, args.seed)
+    path = write_hospital(args.data_dir, data)
+    print(f"Wrote {len(data['patients'])} patients, {len(data['doctors'])} doctors and "
+          f"{len(data['appointments'])} appointments to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmarks for the validators in exceptions/main.py.
+
+Each case is timed with timeit against the implementation it replaced
+(function-local imports, a set built per call, strptime), and the batch API
+(validate_records) is timed against validating the same rows one by one with
+exceptions. Reports nanoseconds per call, or per row for the batch cases.
+
+Usage: python benchmarks/validators.py [--rows 10000] [--json results.json]
+"""
+import os
+import sys
+import json
+import random
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exceptions.exceptions import InvalidAgeError, InvalidGenderError, InvalidDateError
+from exceptions.main import validate_gender, validate_date, validate_time, validate_patient_age, validate_records
+
+
+#? --- The previous implementations, for comparison ---
+def old_validate_gender(gender):
+    allowed_genders = {"male", "female", "other"}
+    if gender.lower() not in allowed_genders:
+        raise InvalidGenderError(gender)
+
+def old_validate_date(date):
+    try:
+        import datetime
+        datetime.datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise InvalidDateError("Date format must be YYYY-MM-DD.")
+
+def old_validate_time(time):
+    try:
+        import datetime
+        datetime.datetime.strptime(time, "%H:%M")
+    except ValueError:
+        raise InvalidDateError("Time format must be HH:MM.")
+
+def swallow(validator, value):
+    try:
+        validator(value)
+    except Exception:
+        pass
+
+
+def per_call_ns(function, *args, number=20_000):
+    return min(timeit.repeat(lambda: function(*args), number=number, repeat=5)) / number * 1e9
+
+
+def old_rows(kind, rows):
+    """Row-at-a-time validation with the old validators, one exception per bad row."""
+    errors = []
+    for row in rows:
+        try:
+            if kind == "patients":
+                validate_patient_age(int(row["age"]))
+                old_validate_gender(row["gender"])
+            else:
+                old_validate_date(row["date"])
+            errors.append(None)
+        except (InvalidAgeError, InvalidGenderError, InvalidDateError, KeyError, ValueError) as e:
+            errors.append(str(e))
+    return errors
+
+
+def make_rows(count, rng):
+    patients = [{"id": str(i), "name": f"patient {i}", "age": str(rng.choice([rng.randint(1, 99), 150])),
+                 "gender": rng.choice(["male", "female", "Other", "x"]), "disease": "flu"} for i in range(count)]
+    appointments = [{"id": str(i), "patient_id": "1", "doctor_id": "2",
+                     "date": rng.choice([f"2025-{rng.randint(1, 12)}-{rng.randint(1, 28)}", "2025-2-30", "bad"])}
+                    for i in range(count)]
+    return patients, appointments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = {
+        "gender_valid": (per_call_ns(old_validate_gender, "Female"), per_call_ns(validate_gender, "Female")),
+        "gender_invalid": (per_call_ns(swallow, old_validate_gender, "x"), per_call_ns(swallow, validate_gender, "x")),
+        "date_valid": (per_call_ns(old_validate_date, "2025-3-14"), per_call_ns(validate_date, "2025-3-14")),
+        "date_invalid": (per_call_ns(swallow, old_validate_date, "2025-2-30"), per_call_ns(swallow, validate_date, "2025-2-30")),
+        "time_valid": (per_call_ns(old_validate_time, "09:30"), per_call_ns(validate_time, "09:30")),
+    }
+    patients, appointments = make_rows(args.rows, random.Random(3))
+    for kind, rows in (("patients", patients), ("appointments", appointments)):
+        old = min(timeit.repeat(lambda: old_rows(kind, rows), number=1, repeat=3)) / len(rows) * 1e9
+        new = min(timeit.repeat(lambda: validate_records(kind, rows), number=1, repeat=3)) / len(rows) * 1e9
+        results[f"batch_{kind}_per_row"] = (old, new)
+
+    print(f"{'case':<28}{'before ns':>12}{'after ns':>12}{'speedup':>10}")
+    for case, (before, after) in results.items():
+        print(f"{case:<28}{before:12.0f}{after:12.0f}{before / after:9.1f}x")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({case: {"before_ns": before, "after_ns": after} for case, (before, after) in results.items()}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import csv
+import json
+import time
+import logging
+from itertools import islice, chain
+from hospital import Patient, Doctor, WORK_START, WORK_END, SLOT_MINUTES, CANCELLED
+from scheduler import to_minutes, to_clock
+from exceptions.exceptions import AppointmentConflictError
+from exceptions.main import validate_records, ERROR_MESSAGES
+from storage import storage_for_path
+from manager import HospitalManager
+
+#! columns written on export / expected on import, per record kind
+FIELDS = {
+    "patients": ("id", "name", "age", "gender", "disease"),
+    "doctors": ("id", "name", "age", "gender", "specialization", "work_start", "work_end", "slot_minutes"),
+    "appointments": ("id", "date", "time", "patient_id", "doctor_id"),
+}
+
+#? ########################
+#? --- Reading / writing ---
+#? ########################
+
+def read_rows(path):
+    """Streams rows from a .csv or .jsonl file as dicts."""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def _write_rows(path, kind, rows):
+    count = 0
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=FIELDS[kind])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                count += 1
+    return count
+
+#? ########################
+#? --- Row import ---
+#? ########################
+#! rows reach the importers already checked by validate_records()
+
+def _import_patient(hospital, row):
+    patient_id, age = int(row["id"]), int(row["age"])
+    if hospital.search_patient_by_id(patient_id):
+        return False
+    hospital.add_patient(Patient(row["name"].lower().strip(), age, row["gender"], patient_id, row["disease"]))
+    return True
+
+def _import_doctor(hospital, row):
+    doctor_id, age = int(row["id"]), int(row["age"])
+    #! the hour columns are optional; empty cells get the defaults
+    work_start, work_end = row.get("work_start") or WORK_START, row.get("work_end") or WORK_END
+    slot_minutes = int(row.get("slot_minutes") or SLOT_MINUTES)
+    if hospital.search_doctor_by_id(doctor_id):
+        return False
+    hospital.add_doctor(Doctor(row["name"].lower().strip(), age, row["gender"], doctor_id, row["specialization"],
+                               to_clock(to_minutes(work_start)), to_clock(to_minutes(work_end)), slot_minutes))
+    return True
+
+def _import_appointment(hospital, row):
+    time = row.get("time") or None  #! without a time the first free slot that day is taken
+    appointment_id = int(row["id"]) if row.get("id") else None
+    if appointment_id is not None and (appointment_id in hospital.appointment or appointment_id in hospital.cancelled):
+        return False
+    patient = hospital.search_patient_by_id(int(row["patient_id"]))
+    doctor = hospital.search_doctor_by_id(int(row["doctor_id"]))
+    if not (patient and doctor):
+        raise ValueError(f"unknown patient {row['patient_id']} or doctor {row['doctor_id']}")
+    hospital.book_appointment(row["date"], patient, doctor, appointment_id, time)
+    return True
+
+IMPORTERS = {"patients": _import_patient, "doctors": _import_doctor, "appointments": _import_appointment}
+
+#? ########################
+#? --- Import / export ---
+#? ########################
+
+def import_records(hospital, kind, path, batch_size=1000):
+    """
+    Streams records of `kind` from a CSV/JSONL file into the hospital.
+    Invalid rows are logged and skipped, rows whose ID already exists are counted as duplicates,
+    and every `batch_size` rows are persisted with a single write.
+    Returns a dict of counts plus elapsed seconds and rows per second.
+    """
+    importer = IMPORTERS[kind]
+    stats = {"imported": 0, "duplicates": 0, "invalid": 0}
+    start = time.perf_counter()
+    rows = enumerate(read_rows(path), start=1)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        codes = validate_records(kind, [row for _, row in chunk])
+        with hospital.batch():
+            for (line_no, row), code in zip(chunk, codes):
+                if code:
+                    stats["invalid"] += 1
+                    logging.warning(f"Skipping {kind} row {line_no}: {ERROR_MESSAGES[code]}")
+                    continue
+                try:
+                    stats["imported" if importer(hospital, row) else "duplicates"] += 1
+                except (AppointmentConflictError, ValueError) as e:  #! slot taken, unknown patient/doctor
+                    stats["invalid"] += 1
+                    logging.warning(f"Skipping {kind} row {line_no}: {e}")
+    return _with_throughput(stats, start)
+
+def export_records(hospital, kind, path):
+    """Streams every record of `kind` (archived appointments included) to a CSV/JSONL file. Returns the row count, elapsed seconds and rows per second."""
+    if kind == "patients" and hospital.storage.lazy:
+        rows = hospital.storage.all_patients()  #! lazy backends only hold looked-up patients in memory
+    elif kind == "patients":
+        rows = (hospital.patient_record(p) for p in hospital.patient.values())
+    elif kind == "doctors":
+        rows = (hospital.doctor_record(d) for d in hospital.doctor.values())
+    else:
+        #! archived months first, streamed partition by partition
+        archived = (record for record in hospital.archive.iter_records() if record["status"] != CANCELLED)
+        rows = chain(archived, (hospital.appointment_record(a) for a in hospital.appointment.values()))
+    start = time.perf_counter()
+    return _with_throughput({"exported": _write_rows(path, kind, rows)}, start)
+
+def convert_snapshot(source, target):
+    """
+    Copies every record from one data file to another, each opened with the backend matching
+    its extension (.json, .hms or .db) - e.g. hospital-data.json to the binary hospital-data.hms.
+    The source's journal is replayed first; the target is overwritten. Returns the record count, elapsed seconds and rows per second.
+    """
+    start = time.perf_counter()
+    hospital = HospitalManager(storage_for_path(source))
+    data = {kind: list(records) for kind, records in hospital.snapshot().items()}
+    output = storage_for_path(target)
+    output.save(data)
+    output.close()
+    hospital.storage.close()
+    return _with_throughput({"converted": sum(map(len, data.values()))}, start)
+
+def _with_throughput(stats, start):
+    seconds = time.perf_counter() - start
+    rows = sum(stats.values())
+    stats["seconds"] = round(seconds, 3)
+    stats["rows_per_second"] = round(rows / seconds) if seconds else rows
+    return stats
@@ -1,16 +1,43 @@
 from color.color import red,reset
 
 # Custom Exceptions
-class InvalidAgeError(Exception):
+class ColoredError(Exception):
+    """Base for the custom errors; the colored text is only built when the error is printed."""
+    label = "Error"
+
     def __init__(self, message):
-        super().__init__(f"{red}[Age Error]{reset} {message}")
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self):
+        return f"{red}[{self.label}]{reset} {self.message}"
+
+class InvalidAgeError(ColoredError):
+    label = "Age Error"
+
+class InvalidGenderError(ColoredError):
+    label = "Gender Error"
 
-class InvalidGenderError(Exception):
     def __init__(self, gender):
-        super().__init__(f"{red}[Gender Error]{reset} Invalid gender entered: '{gender}'. Allowed values: Male, Female, Other.")
+        super().__init__(f"Invalid gender entered: '{gender}'. Allowed values: Male, Female, Other.")
 
-class InvalidDateError(Exception):
-    def __init__(self, message):
-        super().__init__(f"{red}[Date Error]{reset} {message}")
+class InvalidDateError(ColoredError):
+    label = "Date Error"
+
+class AppointmentConflictError(ColoredError):
+    label = "Appointment Error"
+
+class CorruptDataError(ColoredError):
+    label = "Data Error"
+
+class InvalidScheduleError(ColoredError):
+    label = "Schedule Error"
+
+class ReferentialIntegrityError(ColoredError):
+    label = "Integrity Error"
 
+class ShardRoutingError(ColoredError):
+    label = "Shard Error"
 
+class ReplicationError(ColoredError):
+    label = "Replication Error"
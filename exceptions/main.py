@@ -1,4 +1,48 @@
-from exceptions.exceptions import InvalidAgeError , InvalidGenderError,InvalidDateError
+import re
+from functools import lru_cache
+from operator import itemgetter
+from hospital import WORK_START, WORK_END, SLOT_MINUTES
+from exceptions.exceptions import InvalidAgeError , InvalidGenderError,InvalidDateError,InvalidScheduleError
+
+#! compiled once at import; the validators below run for every typed value and imported row
+GENDERS = frozenset({"male", "female", "other"})
+DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+TIME = re.compile(r"(\d{1,2}):(\d{1,2})")
+WHOLE_NUMBER = re.compile(r"\s*[+-]?[0-9]+\s*")  #! ASCII digits only: int() also reads other scripts' digits
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+@lru_cache(maxsize=4096) #! dates repeat a lot in bulk data
+def is_valid_date(date):
+    """Whether date is a real calendar date written YYYY-M-D (what strptime("%Y-%m-%d") accepts)."""
+    match = DATE.fullmatch(date)
+    if not match:
+        return False
+    year, month, day = int(match[1]), int(match[2]), int(match[3])
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    leap = month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    return day <= DAYS_IN_MONTH[month] + leap
+
+@lru_cache(maxsize=2048) #! a day has 1440 distinct times
+def time_minutes(time):
+    """Minutes since midnight for an H:MM/HH:MM time, or None if it is not a valid time of day."""
+    match = TIME.fullmatch(time)
+    if not match:
+        return None
+    hours, minutes = int(match[1]), int(match[2])
+    return hours * 60 + minutes if hours < 24 and minutes < 60 else None
+
+def whole_number(value):
+    """
+    value as an int if it is an int or a string of ASCII digits (optionally signed, spaces around allowed), else None.
+    true/false and floats are refused rather than truncated, as are digits of other scripts ("١").
+    """
+    if type(value) is int:
+        return value
+    if type(value) is str and WHOLE_NUMBER.fullmatch(value):
+        return int(value)
+    return None
+
 # Validation Functions
 def validate_doctor_age(age: int):
     """
@@ -24,8 +68,7 @@ def validate_gender(gender: str):
     Raises:
         InvalidGenderError: if gender is not Male/Female/Other.
     """
-    allowed_genders = {"male", "female", "other"}
-    if gender.lower() not in allowed_genders:
+    if gender.lower() not in GENDERS:
         raise InvalidGenderError(gender)
 
 def validate_date(date: str):
@@ -34,9 +77,134 @@ def validate_date(date: str):
     Raises:
         InvalidDateError: if date is not in valid format.
     """
-    try:
-        import datetime
-        datetime.datetime.strptime(date, "%Y-%m-%d")
-    except ValueError:
+    if not is_valid_date(date):
         raise InvalidDateError("Date format must be YYYY-MM-DD.")
-    
+
+def validate_time(time: str):
+    """
+    Validates a time of day.
+    Raises:
+        InvalidScheduleError: if time is not in HH:MM format.
+    """
+    if time_minutes(time) is None:
+        raise InvalidScheduleError("Time format must be HH:MM.")
+
+def validate_working_hours(start: str, end: str, slot_minutes: int):
+    """
+    Validates a doctor's working hours and appointment length.
+    Raises:
+        InvalidScheduleError: if the times are malformed or no slot fits between them.
+    """
+    code = hours_error(start, end, slot_minutes)
+    if code:
+        raise InvalidScheduleError(ERROR_MESSAGES[code])
+
+#? ####################################################
+#? Batch validation - error codes instead of exceptions
+#? ####################################################
+
+#! per-row error codes returned by the batch validators (OK means the row is valid)
+OK, MISSING_FIELD, BAD_NUMBER, BAD_AGE, BAD_GENDER, BAD_DATE, BAD_TIME, BAD_SLOT_LENGTH, BAD_HOURS = range(9)
+
+ERROR_MESSAGES = {
+    MISSING_FIELD: "A required field is missing.",
+    BAD_NUMBER: "A numeric field is not a whole number.",
+    BAD_AGE: "Age is out of range.",
+    BAD_GENDER: "Gender must be Male, Female or Other.",
+    BAD_DATE: "Date format must be YYYY-MM-DD.",
+    BAD_TIME: "Time format must be HH:MM.",
+    BAD_SLOT_LENGTH: "Slot length must be between 5 and 480 minutes.",
+    BAD_HOURS: "Working hours must end at least one slot after they start.",
+}
+
+#! inclusive age range per record kind
+AGE_LIMITS = {"patients": (1, 120), "doctors": (25, 70)}
+
+def hours_error(start, end, slot_minutes):
+    """Error code for a doctor's working hours and slot length (OK if valid)."""
+    first, last = time_minutes(start), time_minutes(end)
+    if first is None or last is None:
+        return BAD_TIME
+    if not (5 <= slot_minutes <= 480):
+        return BAD_SLOT_LENGTH
+    return OK if last - first >= slot_minutes else BAD_HOURS
+
+def check_required(rows, fields):
+    """MISSING_FIELD for each row lacking one of `fields` or having it empty, else OK."""
+    values_of = itemgetter(*fields)
+    codes = []
+    for row in rows:
+        try:
+            values = values_of(row)
+        except KeyError:
+            codes.append(MISSING_FIELD)
+            continue
+        codes.append(MISSING_FIELD if None in values or "" in values else OK)
+    return codes
+
+def check_integers(values):
+    """Error code per value of an optional whole-number column (empty values are valid)."""
+    codes = []
+    for value in values:
+        if value is None or value == "" or type(value) is int or (type(value) is str and value.isascii() and value.isdigit()):
+            codes.append(OK)
+        else:
+            codes.append(OK if whole_number(value) is not None else BAD_NUMBER)  #! signs and spaces
+    return codes
+
+def check_ages(ages, low, high):
+    """Error code per value of an age column (ints or numeric strings)."""
+    codes = []
+    for age in ages:
+        age = whole_number(age)
+        codes.append(BAD_NUMBER if age is None else OK if low <= age <= high else BAD_AGE)
+    return codes
+
+def check_genders(genders):
+    """Error code per value of a gender column."""
+    return [OK if type(gender) is str and gender.lower() in GENDERS else BAD_GENDER for gender in genders]
+
+def check_dates(dates):
+    """Error code per value of a date column."""
+    return [OK if type(date) is str and is_valid_date(date) else BAD_DATE for date in dates]
+
+def check_times(times):
+    """Error code per value of an optional time column (empty values are valid)."""
+    return [OK if not time or (type(time) is str and time_minutes(time) is not None) else BAD_TIME for time in times]
+
+#! required fields per record kind, as imported/exported by bulk.py
+REQUIRED = {
+    "patients": ("id", "name", "age", "gender", "disease"),
+    "doctors": ("id", "name", "age", "gender", "specialization"),
+    "appointments": ("date", "patient_id", "doctor_id"),
+}
+NUMERIC = {"patients": ("id",), "doctors": ("id",), "appointments": ("id", "patient_id", "doctor_id")}
+
+def validate_records(kind, rows):
+    """
+    Validates a list of `kind` records (dicts as read from CSV/JSONL) column by column.
+    Returns one error code per row, the first problem found (OK if the row is valid).
+    """
+    columns = [check_required(rows, REQUIRED[kind])]
+    columns += [check_integers([row.get(field) for row in rows]) for field in NUMERIC[kind]]
+    if kind in AGE_LIMITS:
+        columns.append(check_ages([row.get("age") for row in rows], *AGE_LIMITS[kind]))
+        columns.append(check_genders([row.get("gender") for row in rows]))
+    if kind == "doctors":
+        columns.append([_row_hours_error(row) for row in rows])
+    if kind == "appointments":
+        columns.append(check_dates([row.get("date") for row in rows]))
+        columns.append(check_times([row.get("time") for row in rows]))
+    codes = columns[0]
+    for column in columns[1:]:
+        codes = [code or other for code, other in zip(codes, column)]
+    return codes
+
+def _row_hours_error(row):
+    #! the hour columns are optional; empty cells get the defaults when imported
+    if not (row.get("work_start") or row.get("work_end") or row.get("slot_minutes")):
+        return OK
+    slot_minutes = whole_number(row.get("slot_minutes") or SLOT_MINUTES)
+    if slot_minutes is None:
+        return BAD_NUMBER
+    return hours_error(row.get("work_start") or WORK_START, row.get("work_end") or WORK_END, slot_minutes)
@@ -1,10 +1,14 @@
 from abc import ABC ,abstractmethod
+from functools import lru_cache
+import datetime
 import logging
 
 #? ######################################
 #? Start Person Class - Base Class
 #? #######################################
 class Person:
+    __slots__ = ("name", "age", "gender") #! no per-instance __dict__
+
     def __init__(self,name,age, gender): #! define attributes
         self.name = name 
         self.age = age
@@ -19,15 +23,28 @@ class Person:
 #? Start Patient Class and Inheritance from Person Class
 #? #####################################################
 class Patient(Person):
+    __slots__ = ("__patient_id", "disaese")
+
     def __init__(self, name, age, gender,patient_id,disease):
         super().__init__(name, age, gender) #! Call the parent class constructor
         self.__patient_id = patient_id
         self.disaese = disease
 
+    @classmethod
+    def from_record(cls, p):
+        """Builds a Patient from a stored record, filling the slots directly (used when loading)."""
+        patient = cls.__new__(cls)
+        patient.name = p["name"]
+        patient.age = p["age"]
+        patient.gender = p["gender"]
+        patient.__patient_id = p["id"]
+        patient.disaese = p["disease"]
+        return patient
+
     #? --- Getters and Setters Methods ---
     def get_details(self): #! Overriding - Polymorphism
         print(f'Patient ID: {self.__patient_id}\nName: {self.name}\nDisease: {self.disaese}')
-        logging.info(f'Patient ID: {self.__patient_id}\nName: {self.name}\nDisease: {self.disaese}')
+        logging.info(f'Patient ID: {self.__patient_id}\nName: {self.name}\nDisease: {self.disaese}', extra={"event": "patient.viewed", "patient_id": self.__patient_id})
 
     def get_patient_id(self):
         return self.__patient_id
@@ -35,15 +52,38 @@ class Patient(Person):
 #? #####################################################
 #? Start Doctor Class and Inheritance from Person Class
 #? #####################################################
+WORK_START = "09:00" #! default working hours and appointment length
+WORK_END = "17:00"
+SLOT_MINUTES = 30
+
 class Doctor(Person):
-    def __init__(self, name, age, gender,doctor_id,specialization):
+    __slots__ = ("__doctor_id", "specialization", "work_start", "work_end", "slot_minutes")
+
+    def __init__(self, name, age, gender,doctor_id,specialization,work_start=WORK_START,work_end=WORK_END,slot_minutes=SLOT_MINUTES):
         super().__init__(name, age, gender) #! Call the parent class constructor
         self.__doctor_id = doctor_id
         self.specialization = specialization
+        self.work_start = work_start
+        self.work_end = work_end
+        self.slot_minutes = slot_minutes
+
+    @classmethod
+    def from_record(cls, d):
+        """Builds a Doctor from a stored record, filling the slots directly (used when loading)."""
+        doctor = cls.__new__(cls)
+        doctor.name = d["name"]
+        doctor.age = d["age"]
+        doctor.gender = d["gender"]
+        doctor.__doctor_id = d["id"]
+        doctor.specialization = d["specialization"]
+        doctor.work_start = d.get("work_start") or WORK_START
+        doctor.work_end = d.get("work_end") or WORK_END
+        doctor.slot_minutes = d.get("slot_minutes") or SLOT_MINUTES
+        return doctor
 
     def get_details(self): #! Overriding - Polymorphism
-        print(f'Doctor ID: {self.__doctor_id}\nName: {self.name}\nSpecialization: {self.specialization}')
-        logging.info(f'Doctor ID: {self.__doctor_id}\nName: {self.name}\nSpecialization: {self.specialization}')
+        print(f'Doctor ID: {self.__doctor_id}\nName: {self.name}\nSpecialization: {self.specialization}\nHours: {self.work_start}-{self.work_end} ({self.slot_minutes} min slots)')
+        logging.info(f'Doctor ID: {self.__doctor_id}\nName: {self.name}\nSpecialization: {self.specialization}', extra={"event": "doctor.viewed", "doctor_id": self.__doctor_id})
 
 
     def get_doctor_id(self):
@@ -52,21 +92,34 @@ class Doctor(Person):
     def get_specialization(self):
         return self.specialization
 
+@lru_cache(maxsize=4096)
+def date_key(date):
+    """Normalizes a YYYY-M-D date string to zero-padded YYYY-MM-DD so it sorts chronologically."""
+    return datetime.datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+
+BOOKED, NO_SHOW, CANCELLED = "booked", "no_show", "cancelled" #! appointment statuses
+
 #? ########################
 #? Start Appointment Class
 #? ########################
 class Appointment:
-    total = 1
-    def __init__(self,date,patient,doctor):
+    __slots__ = ("date", "patient", "doctor", "number", "time", "status")
+    total = 1 #! next free appointment number
+    def __init__(self,date,patient,doctor,number=None,time=None,status=BOOKED):
         self.date = date 
+        self.time = time #! HH:MM slot start; None for appointments booked before slots existed
+        self.status = status
         self.patient = patient
         self.doctor = doctor
-        self.number = Appointment.total
-        Appointment.total += 1
+        if number is None:
+            number = Appointment.total
+        self.number = number
+        Appointment.total = max(Appointment.total, number + 1)
 
     def get_appointment_details(self):
-        print(f"\nAppointment ID: {self.number}\nDate: {self.date}.\nPatient: {self.patient.name}.\nDoctor: {self.doctor.name}.\nSpecialization: {self.doctor.specialization}.")
-        logging.info(f"\nAppointment ID: {self.number}\nDate: {self.date}.\nPatient: {self.patient.name}.\nDoctor: {self.doctor.name}.\nSpecialization: {self.doctor.specialization}.")
+        print(f"\nAppointment ID: {self.number}\nDate: {self.date}{f' {self.time}' if self.time else ''}.\nPatient: {self.patient.name}.\nDoctor: {self.doctor.name}.\nSpecialization: {self.doctor.specialization}.")
+        logging.info(f"\nAppointment ID: {self.number}\nDate: {self.date}.\nPatient: {self.patient.name}.\nDoctor: {self.doctor.name}.\nSpecialization: {self.doctor.specialization}.",
+                     extra={"event": "appointment.viewed", "appointment_id": self.number})
         
 #? ############################################
 #? Start Hospital Class and use Abstract Class
@@ -74,14 +127,14 @@ class Appointment:
 
 class Hospital(ABC):
     def __init__(self):
-        self.patient = []
-        self.doctor = []
-        self.appointment = []
+        self.patient = {}  #! patient_id -> Patient
+        self.doctor = {}  #! doctor_id -> Doctor
+        self.appointment = {}  #! appointment number -> Appointment
 
     @abstractmethod
     def book_appointment(self,date,patient,doctor):
         pass
 
     @abstractmethod
-    def cancel_appointment(self):
+    def cancel_appointment(self,appointment_id):
         pass
@@ -0,0 +1,133 @@
+import os
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+#? ####################################################
+#? Start ReadWriteLock Class - many readers, one writer
+#? ####################################################
+
+class ReadWriteLock:
+    """
+    Lets any number of threads read at once while writers get exclusive access.
+    Waiting writers block new readers, so a steady stream of reads cannot starve a write.
+    Both sides are reentrant, and the writing thread may also take the read side.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._write_depth = 0
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        me = threading.get_ident()
+        depth = getattr(self._local, "reads", 0)
+        if self._writer != me and depth == 0:
+            with self._cond:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        self._local.reads = depth + 1
+        try:
+            yield
+        finally:
+            self._local.reads = depth
+            if self._writer != me and depth == 0:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+            return
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = me
+            self._write_depth = 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._write_depth = 0
+                self._writer = None
+                self._cond.notify_all()
+
+    @property
+    def write_depth(self):
+        """How many nested write() blocks the calling thread is in (0 if it is not the writer)."""
+        return self._write_depth if self._writer == threading.get_ident() else 0
+
+def reads(method):
+    """Runs a HospitalManager method under the read side of self.lock."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def writes(method):
+    """Runs a HospitalManager method inside self.transaction()."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+#? ####################################################
+#? Start FileLock Class - exclusive lock across processes
+#? ####################################################
+
+class FileLock:
+    """
+    Advisory lock on a file (flock on POSIX, msvcrt.locking on Windows).
+    Reentrant within one process; callers serialize threads themselves.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._depth = 0
+
+    def __getstate__(self):
+        return {"path": self.path, "_fd": None, "_depth": 0}  #! a descriptor and a held lock do not cross processes
+
+    @contextmanager
+    def hold(self):
+        if self._depth == 0:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)  #! kept open between holds
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                if fcntl:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(self._fd, 0, os.SEEK_SET)
+                    msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener, MemoryHandler, RotatingFileHandler, TimedRotatingFileHandler
+
+#! attributes passed through `extra=` that the JSON-lines format copies into each event
+ENTITY_FIELDS = ("patient_id", "doctor_id", "appointment_id")
+
+#? ##################################################
+#? Start file handlers that flush once per batch
+#? ##################################################
+
+class _DeferredFlush:
+    """StreamHandler flushes after every record; these handlers leave it to BatchingHandler."""
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+class BatchedRotatingFileHandler(_DeferredFlush, RotatingFileHandler):
+    pass
+
+class BatchedTimedRotatingFileHandler(_DeferredFlush, TimedRotatingFileHandler):
+    pass
+
+class BatchingHandler(MemoryHandler):
+    """
+    Buffers records and hands them to the file handler in batches:
+    when `capacity` records are waiting, an ERROR arrives, or `flush_interval` seconds have passed.
+    """
+    def __init__(self, capacity, target, flush_interval=1.0):
+        super().__init__(capacity, flushLevel=logging.ERROR, target=target, flushOnClose=True)
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+    def shouldFlush(self, record):
+        return super().shouldFlush(record) or time.monotonic() - self.last_flush >= self.flush_interval
+
+    def flush(self):
+        with self.lock:
+            if self.target:
+                super().flush()
+                self.target.flush_batch()
+            self.last_flush = time.monotonic()
+
+class JSONLinesFormatter(logging.Formatter):
+    """One JSON object per line: time, level, event type, entity IDs and the message."""
+    def format(self, record):
+        event = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "event": getattr(record, "event", None),
+        }
+        for field in ENTITY_FIELDS:
+            if hasattr(record, field):
+                event[field] = getattr(record, field)
+        event["message"] = record.getMessage()
+        return json.dumps(event)
+
+#? ########################
+#? Start setup_logging
+#? ########################
+
+def setup_logging(path="log/hospital.log", structured=None, rotation="size", max_bytes=5_000_000,
+                  backup_count=5, batch_size=100, flush_interval=1.0):
+    """
+    Routes the root logger through a queue so callers never wait on disk.
+    A background QueueListener batches records into a rotating log file
+    (rotation="size" rolls at max_bytes, rotation="time" rolls at midnight).
+    structured=True (or HMS_LOG_FORMAT=json) writes JSON lines instead of plain text.
+    Returns the started listener; it is stopped and flushed at exit.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if structured is None:
+        structured = os.environ.get("HMS_LOG_FORMAT", "").lower() == "json"
+
+    if rotation == "time":
+        file_handler = BatchedTimedRotatingFileHandler(path, when="midnight", backupCount=backup_count)
+    else:
+        file_handler = BatchedRotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(JSONLinesFormatter() if structured
+                              else logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    batching_handler = BatchingHandler(batch_size, file_handler, flush_interval)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, batching_handler, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+
+    #! flush quiet periods too, not only when the next record arrives
+    stopped = threading.Event()
+    def flush_periodically():
+        while not stopped.wait(flush_interval):
+            batching_handler.flush()
+    threading.Thread(target=flush_periodically, name="log-flush", daemon=True).start()
+
+    def shutdown():
+        stopped.set()
+        listener.stop()
+        batching_handler.close()
+        file_handler.close()
+    atexit.register(shutdown)
+    return listener
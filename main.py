@@ -1,51 +1,264 @@
 import os
+import sys
 import logging
-from rich import box
-from rich.panel import Panel
-from rich.console import Console
+import argparse
 from hospital import Patient,Doctor
 from manager import HospitalManager
-from exceptions.exceptions import InvalidAgeError,InvalidGenderError,InvalidDateError
-from exceptions.main import validate_gender, validate_doctor_age, validate_patient_age,validate_date
+from logger import setup_logging
+from metrics import METRICS
+from hospital import WORK_START,WORK_END,SLOT_MINUTES
+from scheduler import to_minutes,to_clock
+from exceptions.exceptions import InvalidAgeError,InvalidGenderError,InvalidDateError,AppointmentConflictError,CorruptDataError,InvalidScheduleError
+from exceptions.main import validate_gender, validate_doctor_age, validate_patient_age,validate_date,validate_time,validate_working_hours
 
-#? ✅ Ensure the 'log' directory exists
-os.makedirs('log', exist_ok=True)
+#? ✅ Set up non-blocking logging (creates the 'log' directory; HMS_LOG_FORMAT=json for JSON lines)
+setup_logging('log/hospital.log')
 
-#? ✅ Set up basic logging configuration
-logging.basicConfig(    
-    filename='log/hospital.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+#? The console is created on first use so that importing rich does not delay startup
+_console = None
 
-#? Initialize the console
-console = Console()
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
 
+MENU_ITEMS = [
+    ("➕", "green", "Add (Patient/Doctor)"),
+    ("📅", "yellow", "Book Appointment"),
+    ("📋", "blue", "Show All Appointments"),
+    ("🔍", "magenta", "Search (Patient/Doctor)"),
+    ("⚙️", "bright_cyan", " Settings (Patient/Doctor)"),
+    ("❌", "red", "Cancel Appointment / No-show"),
+    ("📊", "bright_green", "Reports"),
+    ("🩺", "bright_blue", "Diagnostics"),
+    ("🚪", "bold white", "Exit"),
+]
+
+def render_menu(fast=False):
+    """Prints the main menu; in fast mode as plain text, without loading rich."""
+    print("="*50)
+    if fast:
+        print("Hospital Management System")
+        for number, (_, _, label) in enumerate(MENU_ITEMS, start=1):
+            print(f"{number}. {label.strip()}")
+    else:
+        from rich import box
+        from rich.panel import Panel
+        get_console().print(Panel.fit(
+        "\n".join(f"[bold cyan]{number}.[/] {icon} [{style}]{label}[/]" for number, (icon, style, label) in enumerate(MENU_ITEMS, start=1)),
+        title="🏥 [bold underline magenta]Welcome to the Hospital Management System[/]",
+        subtitle="Press a number to continue...",
+        box=box.DOUBLE
+        ))
+    print("="*50)
+
+PAGE_SIZE = 20
+
+def ask_optional_id(prompt):
+    value = input(prompt).strip()
+    return int(value) if value else None
+
+def ask_optional_date(prompt):
+    while True:
+        value = input(prompt).strip()
+        if not value:
+            return None
+        try:
+            validate_date(value)
+            return value
+        except InvalidDateError as e:
+            print(e)
+            logging.error(e)
+
+def ask_optional_time(prompt):
+    while True:
+        value = input(prompt).strip()
+        if not value:
+            return None
+        try:
+            validate_time(value)
+            return to_clock(to_minutes(value))
+        except InvalidScheduleError as e:
+            print(e)
+            logging.error(e)
+
+def show_appointments(hospital):
+    """Lists appointments one page at a time; only the visible page is formatted."""
+    from rich import box
+    from rich.table import Table
+    print("Leave a filter empty to skip it.")
+    filters = {
+        "doctor_id": ask_optional_id("Filter by doctor ID: "),
+        "patient_id": ask_optional_id("Filter by patient ID: "),
+        "start": ask_optional_date("From date (YYYY-MM-DD): "),
+        "end": ask_optional_date("To date (YYYY-MM-DD): "),
+    }
+    page = 1
+    while True:
+        rows, has_more = hospital.page_appointments(page, PAGE_SIZE, **filters)
+        if not rows and page == 1:
+            print("No appointments found.")
+            logging.warning("No appointments found.")
+            return
+        table = Table(title=f"📋 Appointments - page {page}", box=box.SIMPLE_HEAVY)
+        for column in ("ID", "Date", "Time", "Patient", "Doctor", "Specialization"):
+            table.add_column(column)
+        for app in rows:
+            table.add_row(str(app.number), app.date, app.time or "-", app.patient.name, app.doctor.name, app.doctor.specialization)
+        get_console().print(table)
+        logging.info(f"Listed appointments page {page} ({len(rows)} rows)")
+
+        options = (["[n]ext"] if has_more else []) + (["[p]revious"] if page > 1 else []) + ["[q]uit"]
+        choice = input(" ".join(options) + ": ").strip().lower()
+        if choice == "n" and has_more:
+            page += 1
+        elif choice == "p" and page > 1:
+            page -= 1
+        elif choice == "q":
+            return
+
+def report_table(title, rows):
+    from rich import box
+    from rich.table import Table
+    table = Table(title=f"📊 {title}", box=box.SIMPLE_HEAVY)
+    for column in rows[0] if rows else ():
+        table.add_column(column.replace("_", " ").title())
+    for row in rows:
+        table.add_row(*(str(value) for value in row.values()))
+    return table
+
+def print_reports(reports):
+    """Prints build_reports() output, one table per report."""
+    for title, rows in reports.values():
+        if rows:
+            get_console().print(report_table(title, rows))
+        else:
+            get_console().print(report_table(title, rows), "No data.")
+
+def export_reports(reports, path):
+    """Writes every row of build_reports() output to a JSON file."""
+    import json
+    with open(path, "w") as f:
+        json.dump({name: rows for name, (_, rows) in reports.items()}, f, indent=4)
+
+REPORTS_FILE = "reports.json"
+
+def show_reports(hospital):
+    """Shows each report one page at a time; the full tables are only written out, with [e]xport."""
+    from reports import build_reports
+    print("Leave a date empty to include all appointments.")
+    start = ask_optional_date("From date (YYYY-MM-DD): ")
+    end = ask_optional_date("To date (YYYY-MM-DD): ")
+    reports = build_reports(hospital, start, end)
+    logging.info(f"Reports shown for {start or 'start'} to {end or 'end'}", extra={"event": "reports.viewed"})
+    for title, rows in reports.values():
+        if not rows:
+            get_console().print(report_table(title, rows), "No data.")
+            continue
+        pages = (len(rows) + PAGE_SIZE - 1) // PAGE_SIZE
+        page = 1
+        while True:
+            shown = rows[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            get_console().print(report_table(f"{title} - page {page} of {pages}" if pages > 1 else title, shown))
+            if pages == 1:
+                break
+            options = (["[n]ext"] if page < pages else []) + (["[p]revious"] if page > 1 else []) + ["[s]kip", "[e]xport all", "[q]uit"]
+            choice = input(" ".join(options) + ": ").strip().lower()
+            if choice == "n" and page < pages:
+                page += 1
+            elif choice == "p" and page > 1:
+                page -= 1
+            elif choice == "s":
+                break
+            elif choice == "e":
+                path = input(f"File ({REPORTS_FILE}): ").strip() or REPORTS_FILE
+                export_reports(reports, path)
+                print(f"Reports saved to {path}.")
+                logging.info(f"Reports saved to {path}", extra={"event": "reports.exported"})
+                return
+            elif choice == "q":
+                return
+
+METRICS_FILE = "log/metrics.json"
+PROFILE_FILE = "log/profile.prof"
+
+def print_metrics():
+    """Prints the per-operation latencies and the counters collected so far."""
+    from rich import box
+    from rich.table import Table
+    snapshot = METRICS.snapshot()
+    table = Table(title=f"🩺 Operations since {snapshot['since']} (collection {'on' if snapshot['enabled'] else 'off'})", box=box.SIMPLE_HEAVY)
+    for column in ("Operation", "Calls", "Errors", "Mean ms", "p50 ms", "p95 ms", "p99 ms", "Max ms"):
+        table.add_column(column)
+    for name, stats in snapshot["operations"].items():
+        table.add_row(name, *(str(stats[key]) for key in ("count", "errors", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")))
+    get_console().print(table)
+    for name, value in snapshot["counters"].items():
+        print(f"{name}: {value}")
+    if not snapshot["operations"]:
+        print("No operations recorded yet." if METRICS.enabled else "Turn metrics on, then use the menu to collect some.")
+
+def show_diagnostics():
+    while True:
+        print(f"\n1. Show Metrics\n2. Turn Metrics {'Off' if METRICS.enabled else 'On'}"
+              f"\n3. {'Stop' if METRICS.profiler else 'Start'} Profiling (cProfile + tracemalloc)"
+              f"\n4. Save Metrics as JSON\n5. Reset Metrics\n6. Back")
+        choice = input("\nEnter your choice: ")
+        if choice == "1":
+            print_metrics()
+        elif choice == "2":
+            METRICS.disable() if METRICS.enabled else METRICS.enable()
+            print(f"Metrics collection is {'on' if METRICS.enabled else 'off'}.")
+            logging.info(f"Metrics collection turned {'on' if METRICS.enabled else 'off'}", extra={"event": "metrics.toggled"})
+        elif choice == "3":
+            if METRICS.profiler:
+                print(METRICS.stop_profile(PROFILE_FILE))
+                print(f"Profile saved to {PROFILE_FILE} (open it with python -m pstats).")
+                logging.info(f"Profile saved to {PROFILE_FILE}", extra={"event": "profile.saved"})
+            else:
+                METRICS.start_profile()
+                print("Profiling started; use the menu, then come back here to stop it.")
+        elif choice == "4":
+            path = input(f"File ({METRICS_FILE}): ").strip() or METRICS_FILE
+            METRICS.dump(path)
+            print(f"Metrics saved to {path}.")
+            logging.info(f"Metrics saved to {path}", extra={"event": "metrics.saved"})
+        elif choice == "5":
+            METRICS.reset()
+            print("Metrics reset.")
+        elif choice == "6":
+            return
+        else:
+            print("Invalid choice. Please try again.")
 
 #?#############################
 #? --- Start Main Function ---
 #?#############################
 
-def main():
-    hospital = HospitalManager()
+def main(fast=False, storage=None, publish=None):
+    """
+    Runs the interactive menu. The data store loads on a background thread while
+    the menu is shown; the first choice that needs it waits for the load to finish.
+    With publish=(host, port), standbys can follow the changes made here (see replication.py).
+    """
+    hospital = HospitalManager(storage, autoload=False)
+    if publish:
+        from replication import ChangePublisher
+        ChangePublisher(hospital, *publish)
+    hospital.load_in_background()
     while True:
-
-        print("="*50)
-        console.print(Panel.fit(
-        "[bold cyan]1.[/] ➕ [green]Add (Patient/Doctor)[/]\n"
-        "[bold cyan]2.[/] 📅 [yellow]Book Appointment[/]\n"
-        "[bold cyan]3.[/] 📋 [blue]Show All Appointments[/]\n"
-        "[bold cyan]4.[/] 🔍 [magenta]Search (Patient/Doctor)[/]\n"
-        "[bold cyan]5.[/] ⚙️ [bright_cyan] Settings (Patient/Doctor)[/]\n"
-        "[bold cyan]6.[/] ❌ [red]Cancel Appointment[/]\n"
-        "[bold cyan]7.[/] 🚪 [bold white]Exit[/]",
-        title="🏥 [bold underline magenta]Welcome to the Hospital Management System[/]",
-        subtitle="Press a number to continue...",
-        box=box.DOUBLE
-        ))
-        print("="*50)
+        render_menu(fast)
 
         choice = input("\nEnter your choice: ")
+        if choice not in ("8", "9"):
+            try:
+                hospital.wait_until_loaded()
+            except CorruptDataError as e:
+                print(e)
+                logging.error(e)
+                exit(1)
 
         if choice == "1":
             while True:
@@ -77,15 +290,16 @@ def main():
                     patient_id = int(input("Enter patient ID: "))
                     disease = input("Enter patient disease: ")
                     patient = Patient(name,age,gender,patient_id,disease)
-                    for pat in hospital.patient:
-                        if pat.get_patient_id() == patient_id:
-                            print(f"\nPatient with ID {patient_id} already exists!\n")
-                            break
+                    #! check and add in one transaction, so another desk cannot add this ID in between
+                    with hospital.transaction():
+                        exists = hospital.search_patient_by_id(patient_id) is not None
+                        if not exists:
+                            hospital.add_patient(patient)
+                    if exists:
+                        print(f"\nPatient with ID {patient_id} already exists!\n")
                     else:
-                        hospital.add_patient(patient)
-                        hospital.save_data()
                         print(f"\nPatient {patient.name} added successfully!\n")
-                        logging.info(f"Patient {patient.name} added successfully!")
+                        logging.info(f"Patient {patient.name} added successfully!", extra={"event": "patient.added", "patient_id": patient_id})
                 elif choice == "2":
                     name = input("Enter doctor name: ").lower().strip()
                     # Input and validate age
@@ -109,18 +323,27 @@ def main():
 
                     doctor_id = int(input("Enter doctor ID: "))    
                     specialization = input("Enter doctor specialization: ")
-                    doctor = Doctor(name,age,gender,doctor_id,specialization)
-                    is_doctor_id_exists = any(doc.get_doctor_id() == doctor_id for doc in hospital.doctor)
-                    is_specialization_exists = any(doc.get_specialization() == specialization for doc in hospital.doctor)
-                    if is_doctor_id_exists and is_specialization_exists:
-                        print(f"\nDoctor {doctor.name} already exists!\n")
-                    elif is_doctor_id_exists or is_specialization_exists:
-                        print(f"\nDoctor with ID {doctor_id} or Specialization {specialization} already exists!\n")
+                    # Input and validate working hours
+                    while True:
+                        try:
+                            work_start = input(f"Enter working hours start (HH:MM) [{WORK_START}]: ").strip() or WORK_START
+                            work_end = input(f"Enter working hours end (HH:MM) [{WORK_END}]: ").strip() or WORK_END
+                            slot_minutes = int(input(f"Enter slot length in minutes [{SLOT_MINUTES}]: ").strip() or SLOT_MINUTES)
+                            validate_working_hours(work_start, work_end, slot_minutes)
+                            break
+                        except InvalidScheduleError as e:
+                            print(e)
+                            logging.error(e)
+                    doctor = Doctor(name,age,gender,doctor_id,specialization,to_clock(to_minutes(work_start)),to_clock(to_minutes(work_end)),slot_minutes)
+                    with hospital.transaction():
+                        exists = hospital.search_doctor_by_id(doctor_id) is not None
+                        if not exists:
+                            hospital.add_doctor(doctor)
+                    if exists:
+                        print(f"\nDoctor with ID {doctor_id} already exists!\n")
                     else:
-                        hospital.add_doctor(doctor)
-                        hospital.save_data()
                         print(f"\nDoctor {doctor.name} added successfully!\n")
-                        logging.info(f"\nDoctor {doctor.name} added successfully!\n")
+                        logging.info(f"Doctor {doctor.name} added successfully!", extra={"event": "doctor.added", "doctor_id": doctor_id})
                 elif choice == "3":
                     break
                 else:
@@ -135,21 +358,42 @@ def main():
                         print(e)
                         logging.error(e)    
             patient_id = int(input("Enter patient ID: "))
-            doctor_id = int(input("Enter doctor ID: ")) 
+            doctor_id = ask_optional_id("Enter doctor ID (leave empty to find the first free doctor by specialization): ")
             patient = hospital.search_patient_by_id(patient_id)
-            doctor = hospital.search_doctor_by_id(doctor_id)
-            if patient and doctor:
-                hospital.book_appointment(date,patient,doctor)
-                hospital.save_data()
-                print(f"Appointment booked successfully for {patient.name} with {doctor.name}!")
-                logging.info(f"Appointment booked successfully for {patient.name} with {doctor.name}!")
+            if doctor_id is None:
+                specialization = input("Enter specialization: ")
+                time = ask_optional_time("Earliest time (HH:MM, leave empty for any): ")
+                slot = hospital.earliest_available(specialization, date, time)
+                if slot:
+                    doctor, date, time = slot
+                else:
+                    doctor = None
+                    print(f"No doctor with specialization {specialization}.")
             else:
+                doctor = hospital.search_doctor_by_id(doctor_id)
+                time = ask_optional_time("Enter time (HH:MM, leave empty for the first free slot that day): ")
+            if patient and doctor:
+                try:
+                    appointment = hospital.book_appointment(date,patient,doctor,time=time)
+                    print(f"Appointment booked successfully for {patient.name} with {doctor.name} on {appointment.date} at {appointment.time}!")
+                    logging.info(f"Appointment booked successfully for {patient.name} with {doctor.name}!",
+                                 extra={"event": "appointment.booked", "patient_id": patient_id, "doctor_id": doctor.get_doctor_id()})
+                except AppointmentConflictError as e:
+                    print(e)
+                    logging.error(e)
+                    if doctor_id is not None:
+                        slot = hospital.next_free_slot(doctor_id, date, time)
+                        if slot:
+                            print(f"Next free slot with {doctor.name}: {slot[0]} at {slot[1]}")
+            elif doctor_id is not None:
                 print(f"Not found patient {patient_id} or doctor {doctor_id}")
+            elif not patient:
+                print(f"Not found patient {patient_id}")
         elif choice == "3":
-            hospital.show_all_appointments()
+            show_appointments(hospital)
         elif choice == "4":
             while True:
-                print("\n1. Search by Patient ID\n2. Search by Doctor ID\n3. Back")
+                print("\n1. Search by Patient ID\n2. Search by Doctor ID\n3. Find Patients (name/disease)\n4. Find Doctors (name/specialization)\n5. Back")
                 choice = input("\nEnter your choice: ")
                 if choice == "1":
                     patient_id = int(input("Enter patient ID to search: "))
@@ -158,7 +402,7 @@ def main():
                         patient.get_details()
                     else:
                         print("Patient not found.")
-                        logging.warning(f"Patient not found: {patient_id}")
+                        logging.warning(f"Patient not found: {patient_id}", extra={"event": "patient.not_found", "patient_id": patient_id})
                 elif choice == "2":
                     doctor_id = int(input("Enter doctor ID: "))
                     doctor = hospital.search_doctor_by_id(doctor_id)
@@ -166,28 +410,212 @@ def main():
                         doctor.get_details()
                     else:
                         print("Doctor not found.")
-                        logging.warning(f"Patient not found: {doctor_id}")
+                        logging.warning(f"Doctor not found: {doctor_id}", extra={"event": "doctor.not_found", "doctor_id": doctor_id})
                 elif choice == "3":
+                    text = input("Search patients: ")
+                    patients = hospital.search_patients(text)
+                    for patient in patients:
+                        print(f"{patient.get_patient_id()}: {patient.name} ({patient.disaese})")
+                    if not patients:
+                        print("No matching patients.")
+                    logging.info(f"Patient search '{text}': {len(patients)} results", extra={"event": "patient.searched"})
+                elif choice == "4":
+                    text = input("Search doctors: ")
+                    doctors = hospital.search_doctors(text)
+                    for doctor in doctors:
+                        print(f"{doctor.get_doctor_id()}: {doctor.name} ({doctor.specialization})")
+                    if not doctors:
+                        print("No matching doctors.")
+                    logging.info(f"Doctor search '{text}': {len(doctors)} results", extra={"event": "doctor.searched"})
+                elif choice == "5":
                     break
                 else:
                     print("Invalid choice. Please try again.")
         elif choice == "5":
             hospital.settings()
-            hospital.save_data()
         elif choice == "6":
-            try:    
-              hospital.cancel_appointment()
-              hospital.save_data()
-              print("Appointment canceled successfully!")        
-            except IndexError:
-                print("No appointments found.")
-                logging.warning("No appointments found.")
+            print("\n1. Cancel Appointment\n2. Mark Patient as No-show\n3. Back")
+            choice = input("\nEnter your choice: ")
+            if choice == "1":
+                appointment_id = int(input("Enter appointment ID to cancel: "))
+                if hospital.cancel_appointment(appointment_id):
+                    print(f"Appointment {appointment_id} canceled successfully!")
+                    logging.info(f"Appointment {appointment_id} canceled successfully!", extra={"event": "appointment.cancelled", "appointment_id": appointment_id})
+                else:
+                    print(f"Appointment with ID {appointment_id} not found!")
+                    logging.warning(f"Appointment with ID {appointment_id} not found!", extra={"event": "appointment.not_found", "appointment_id": appointment_id})
+            elif choice == "2":
+                appointment_id = int(input("Enter appointment ID: "))
+                if hospital.mark_no_show(appointment_id):
+                    print(f"Appointment {appointment_id} marked as a no-show.")
+                    logging.info(f"Appointment {appointment_id} marked as a no-show", extra={"event": "appointment.no_show", "appointment_id": appointment_id})
+                else:
+                    print(f"Appointment with ID {appointment_id} not found!")
+                    logging.warning(f"Appointment with ID {appointment_id} not found!", extra={"event": "appointment.not_found", "appointment_id": appointment_id})
+            elif choice != "3":
+                print("Invalid choice. Please try again.")
         elif choice == "7":
+            show_reports(hospital)
+        elif choice == "8":
+            show_diagnostics()
+        elif choice == "9":
             print("Thanks for using the Hospital Management System.... Goodbye!")
             exit(0)
         else:
             print("Invalid choice. Please try again.")
 
+#?#############################
+#? --- Command line ---
+#?#############################
+
+#! record kinds of import/export (bulk.FIELDS); bulk itself is only imported by those commands
+RECORD_KINDS = ("patients", "doctors", "appointments")
+
+def show_shards(args, storage=None):
+    """`shards split` writes the shard stores and data/shards.json from the current store; `shards status` lists them."""
+    import time
+    from sharding import ShardMap, ShardedHospital, plan_shards, split_hospital, SHARD_MAP
+    if args.action == "split":
+        hospital = HospitalManager(storage)
+        data = {kind: list(records) for kind, records in hospital.snapshot().items()}
+        counts = split_hospital(data, ShardMap(plan_shards(data, args.by, args.count, args.format)))
+        for name, records in counts.items():
+            print(f"{name}: {records['patients']} patients, {records['doctors']} doctors, {records['appointments']} appointments")
+        print(f"Shard map written to {SHARD_MAP}; open a shard with: python main.py --shard NAME")
+        logging.info(f"Split the store into {len(counts)} shards by {args.by}", extra={"event": "shards.split"})
+        return
+    sharded = ShardedHospital(ShardMap.load(), args.workers)
+    if args.load:
+        start = time.perf_counter()
+        sharded.load()
+        print(f"Loaded {len(sharded.loaded())} shards in {time.perf_counter() - start:.2f}s ({sharded.workers} workers)")
+    for row in sharded.status():
+        counts = f"{row['patients']} patients, {row['doctors']} doctors, {row['appointments']} appointments" if row["loaded"] else "not loaded"
+        print(f"{row['shard']}: {row['path']} - patient IDs {row['patient_ids']}, doctor IDs {row['doctor_ids']}, "
+              f"specializations {row['specializations']} - {counts}")
+
+def run_standby(args, storage=None):
+    """Follows a primary started with --publish, printing the replication status every --status-every seconds."""
+    import time
+    import threading
+    from replication import Standby, parse_address
+    standby = Standby(HospitalManager(storage), *parse_address(args.primary))
+    follower = threading.Thread(target=standby.run, name="standby", daemon=True)
+    follower.start()
+    print(f"Following the primary at {args.primary} (Ctrl+C to stop)")
+    try:
+        while follower.is_alive():
+            follower.join(args.status_every)
+            status = standby.status()
+            print(f"{'connected' if status['connected'] else 'disconnected'}: change {status['seq']} of {status['primary_seq']} "
+                  f"({status['behind']} behind), {status['applied']} applied in {status['batches']} batches, "
+                  f"{status['apply_per_s'] or 0} changes/s, lag p50 {status['lag_p50_ms']} ms p99 {status['lag_p99_ms']} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standby.stop()
+
+def run(argv=None):
+    """Without a command, starts the interactive menu."""
+    parser = argparse.ArgumentParser(description="Hospital Management System")
+    parser.add_argument("--fast", action="store_true", help="plain-text menu without rich (or set HMS_FAST_START=1)")
+    parser.add_argument("--metrics", metavar="FILE", help="collect operation metrics (or set HMS_METRICS=1) and save them as JSON at exit")
+    parser.add_argument("--shard", help="work on this shard of data/shards.json instead of the whole store")
+    parser.add_argument("--publish", metavar="[HOST:]PORT", help="menu and serve: stream every change to standbys on this local port")
+    commands = parser.add_subparsers(dest="command")
+    import_parser = commands.add_parser("import", help="bulk import records from a .csv or .jsonl file")
+    import_parser.add_argument("kind", choices=RECORD_KINDS)
+    import_parser.add_argument("path")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser = commands.add_parser("export", help="export records to a .csv or .jsonl file")
+    export_parser.add_argument("kind", choices=RECORD_KINDS)
+    export_parser.add_argument("path")
+    serve_parser = commands.add_parser("serve", help="run the HTTP JSON API")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    report_parser = commands.add_parser("report", help="print the analytics reports")
+    report_parser.add_argument("--start", help="first appointment date (YYYY-MM-DD)")
+    report_parser.add_argument("--end", help="last appointment date (YYYY-MM-DD)")
+    report_parser.add_argument("--only", nargs="+", choices=("doctor_days", "specializations", "ages", "attendance"))
+    report_parser.add_argument("--json", help="write the reports to this file instead of printing them")
+    convert_parser = commands.add_parser("convert", help="copy the data to another format (.json, .hms binary snapshot or .db)")
+    convert_parser.add_argument("source")
+    convert_parser.add_argument("target")
+    archive_parser = commands.add_parser("archive", help="move old appointments to the compressed monthly archive")
+    archive_parser.add_argument("--before", help="archive the months before this one (YYYY-MM)")
+    archive_parser.add_argument("--keep-months", type=int, default=12, help="without --before: months kept active, this one included")
+    shards_parser = commands.add_parser("shards", help="split the store into shards (data/shards.json) or show them")
+    shards_parser.add_argument("action", choices=("split", "status"))
+    shards_parser.add_argument("--by", choices=("department", "ids"), default="department", help="split: one shard per specialization, or blocks of IDs")
+    shards_parser.add_argument("--count", type=int, default=4, help="split --by ids: number of shards")
+    shards_parser.add_argument("--format", choices=(".json", ".hms", ".db"), default=".json", help="split: backend of the shard stores")
+    shards_parser.add_argument("--load", action="store_true", help="status: load every shard (in parallel) and count its records")
+    shards_parser.add_argument("--workers", type=int, help="status --load: worker processes (default: one per CPU)")
+    standby_parser = commands.add_parser("standby", help="keep this store a warm copy of a primary started with --publish")
+    standby_parser.add_argument("primary", metavar="[HOST:]PORT")
+    standby_parser.add_argument("--status-every", type=float, default=10, help="seconds between status lines")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        import atexit
+        METRICS.enable()
+        atexit.register(METRICS.dump, args.metrics)
+    publish = None
+    if args.publish:
+        from replication import parse_address
+        publish = parse_address(args.publish)
+    storage = None
+    if args.shard:
+        from sharding import ShardMap
+        storage = ShardMap.load().storage(args.shard)
+
+    if args.command == "import":
+        from bulk import import_records
+        stats = import_records(HospitalManager(storage), args.kind, args.path, args.batch_size)
+        print(f"Imported {stats['imported']} {args.kind} ({stats['duplicates']} duplicates, {stats['invalid']} invalid) "
+              f"in {stats['seconds']}s - {stats['rows_per_second']} rows/s")
+        logging.info(f"Bulk import of {args.kind} from {args.path}: {stats}")
+    elif args.command == "export":
+        from bulk import export_records
+        stats = export_records(HospitalManager(storage), args.kind, args.path)
+        print(f"Exported {stats['exported']} {args.kind} in {stats['seconds']}s - {stats['rows_per_second']} rows/s")
+    elif args.command == "report":
+        from reports import build_reports
+        for date in (args.start, args.end):
+            if date:
+                validate_date(date)
+        reports = build_reports(HospitalManager(storage), args.start, args.end, args.only)
+        if args.json:
+            export_reports(reports, args.json)
+        else:
+            print_reports(reports)
+    elif args.command == "convert":
+        from bulk import convert_snapshot
+        stats = convert_snapshot(args.source, args.target)
+        print(f"Converted {stats['converted']} records from {args.source} to {args.target} in {stats['seconds']}s")
+    elif args.command == "archive":
+        import time
+        from archive import months_ago
+        hospital = HospitalManager(storage)
+        before = args.before or months_ago(args.keep_months - 1)
+        start = time.perf_counter()
+        moved = hospital.archive_appointments(before)
+        print(f"Archived {moved} appointments dated before {before} in {time.perf_counter() - start:.2f}s; "
+              f"{len(hospital.archive)} archived in {len(hospital.archive.months)} months, {len(hospital.appointment)} active.")
+        logging.info(f"Archived {moved} appointments dated before {before}", extra={"event": "appointments.archived"})
+    elif args.command == "shards":
+        show_shards(args, storage)
+    elif args.command == "serve":
+        from server import serve
+        hospital = HospitalManager(storage)
+        if publish:
+            from replication import ChangePublisher
+            ChangePublisher(hospital, *publish)
+        serve(hospital, args.host, args.port)
+    elif args.command == "standby":
+        run_standby(args, storage)
+    else:
+        main(fast=args.fast or os.environ.get("HMS_FAST_START") == "1", storage=storage, publish=publish)
+
 #? Run the main function      
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run(sys.argv[1:])
\ No newline at end of file
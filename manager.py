@@ -1,115 +1,791 @@
-import os
-import json
 import logging
-from hospital import Hospital,Patient,Doctor,Appointment
-from exceptions.exceptions import InvalidAgeError,InvalidGenderError
-from exceptions.main import validate_gender, validate_doctor_age, validate_patient_age
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from bisect import bisect_left, bisect_right, insort
+from hospital import Hospital,Patient,Doctor,Appointment,date_key,BOOKED,NO_SHOW,CANCELLED
+from exceptions.exceptions import InvalidAgeError,InvalidGenderError,AppointmentConflictError,InvalidScheduleError,ReferentialIntegrityError
+from exceptions.main import validate_gender, validate_doctor_age, validate_patient_age, validate_working_hours
+from storage import open_storage
+from locks import ReadWriteLock, reads, writes
+from search import SearchIndex
+from scheduler import Scheduler, to_minutes, to_clock
+from archive import AppointmentArchive, archive_dir, month_key
+from metrics import METRICS, timed
+
+#! JSON field name -> object attribute (the patient attribute keeps its historical spelling)
+PATIENT_FIELDS = {"name": "name", "age": "age", "gender": "gender", "disease": "disaese"}
+DOCTOR_FIELDS = {"name": "name", "age": "age", "gender": "gender", "specialization": "specialization",
+                 "work_start": "work_start", "work_end": "work_end", "slot_minutes": "slot_minutes"}
 
 #? #############################################
 #? Start HospitalManager Class inheriting from Hospital
 #? #############################################
 
+@METRICS.instrument
 class HospitalManager(Hospital):
-    def __init__(self):
+    """
+    Safe to share between threads: lookups take the read side of self.lock and
+    changes run in a transaction (write side plus the storage's cross-process lock).
+    Methods marked @timed are timed while metrics are enabled (see metrics.py).
+    """
+    def __init__(self, storage=None, autoload=True):
         super().__init__()
-        os.makedirs("data", exist_ok=True)  # safe for nested folders too
-        self.storage_file = os.path.join("data", "hospital-data.json")
-        self.load_data()
+        self.storage = storage or open_storage()
+        self.archive = AppointmentArchive(archive_dir(self.storage))
+        self.lock = ReadWriteLock()
+        self._index_lock = threading.Lock()  #! one thread builds the stored-patient index (see search_patients)
+        self._replaying = False
+        self._batch = None
+        self._compact_after_batch = False  #! an archive run inside a batch compacts once the batch is persisted
+        self.listeners = []  #! called with each change once it is persisted, in order (see replication.py)
+        self._reset()
+        self._loader = None
+        self._load_error = None
+        if autoload:
+            self.load_data()
+
+    def __getstate__(self):
+        """Pickled without the thread state, so a store loaded in a worker process can be handed back (see sharding.py)."""
+        state = self.__dict__.copy()
+        for name in ("lock", "_index_lock", "_loader", "_load_error", "listeners"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = ReadWriteLock()
+        self._index_lock = threading.Lock()
+        self._loader = None
+        self._load_error = None
+        self.listeners = []
+        #! unpickled appointments skip Appointment.__init__, which keeps the next free number
+        Appointment.total = max(Appointment.total, max(self.appointment, default=0) + 1, max(self.cancelled, default=0) + 1)
+
+    def _reset(self):
+        self.patient = {}
+        self.doctor = {}
+        self.appointment = {}
+        self.cancelled = {}  #! appointment number -> cancelled Appointment, kept for reports
+        #! secondary appointment indexes, kept in sync by book/cancel
+        self.appointments_by_doctor = {}  # doctor_id -> [(day, number, appointment)] sorted by day
+        self.appointments_by_patient = {}  # patient_id -> {number: appointment}
+        self.appointments_by_date = {}  # day -> {number: appointment}
+        self.appointment_days = []  # sorted days that have at least one appointment
+        self.cancelled_by_patient = {}  # patient_id -> {number: cancelled appointment}, for cascading deletes
+        self.cancelled_by_doctor = {}  # doctor_id -> {number: cancelled appointment}
+        #! full-text indexes, kept in sync by add/update/remove
+        self.patient_search = SearchIndex({"name": 2.0, "disease": 1.0})
+        self.doctor_search = SearchIndex({"name": 2.0, "specialization": 1.5})
+        self.stored_patients_indexed = False  #! lazy backends: patients still in storage join patient_search on the first search
+        #! slot availability per doctor, kept in sync by add/update/remove and book/cancel
+        self.scheduler = Scheduler()
 
+    #? --- Persistence (see storage/) ---
+    @contextmanager
+    def transaction(self):
+        """
+        Holds the write lock for this process and the storage's lock against other processes.
+        The outermost transaction first applies whatever other processes have written since.
+        """
+        with self.lock.write():
+            if self.lock.write_depth > 1:
+                yield
+                return
+            with self.storage.exclusive():
+                self._sync()
+                yield
+
+    def _sync(self):
+        changes = self.storage.sync()
+        if changes is None:
+            METRICS.count("storage.reloads")
+            self.load_data()
+            return
+        if changes:
+            METRICS.count("storage.synced_changes", len(changes))
+        self._replaying = True
+        try:
+            for change in changes:
+                self.apply_change(change)
+        finally:
+            self._replaying = False
+
+    @timed
     def load_data(self):
+        """
+        Replaces the in-memory records with the stored ones, then replays the changes recorded since the last snapshot.
+        With a lazy backend, patients are left in storage until they are looked up.
+        """
+        with self.lock.write(), self.storage.exclusive():
+            self._load()
+
+    def _load(self):
+        self._reset()
+        self.archive.refresh()
+        self._replaying = True
         try:
-            with open(self.storage_file,'r') as f:
-                data = json.load(f)
+            data = self.storage.load()
 
             # load patient
             for p in data.get("patients",[]):
-                patient = Patient(p["name"],p["age"],p["gender"],p["id"],p["disease"])
-                self.patient.append(patient)
+                patient = Patient.from_record(p)
+                self.add_patient(patient)
 
             # load doctor
             for d in data.get("doctors",[]):
-                doctor = Doctor(d["name"],d["age"],d["gender"],d["id"],d["specialization"])
-                self.doctor.append(doctor)
+                doctor = Doctor.from_record(d)
+                self.add_doctor(doctor)
 
             # load appointment
             for app in data.get("appointments",[]):
-                pat = self.search_patient_by_id(app["patient_id"])
-                doc = self.search_doctor_by_id(app["doctor_id"])
-                if pat and doc:
-                    appointment = Appointment(app["date"],pat,doc)
-                    self.appointment.append(appointment)
-            
-        except (FileNotFoundError,json.JSONDecodeError):
-            self.patient = []
-            self.doctor = []
-            self.appointment = []
+                self._restore_appointment(app)
 
+            # replay changes
+            for change in self.storage.changes():
+                self.apply_change(change)
+        finally:
+            self._replaying = False
+        #! archived appointments keep their numbers
+        Appointment.total = max(Appointment.total, self.archive.max_id + 1)
+
+    def load_in_background(self):
+        """Starts load_data on a background thread; call wait_until_loaded() before touching the records."""
+        def load():
+            try:
+                self.load_data()
+            except Exception as e:
+                self._load_error = e
+        self._loader = threading.Thread(target=load, name="hospital-load", daemon=True)
+        self._loader.start()
+
+    def wait_until_loaded(self):
+        if self._loader:
+            self._loader.join()
+            self._loader = None
+            if self._load_error:
+                raise self._load_error
+
+    @timed
+    @writes
     def save_data(self):
-        data = {
-            "patients": [
-                {
-                "name": p.name,
-                "age": p.age,
-                "gender": p.gender,
-                "id": p.get_patient_id(),
-                "disease": p.disaese
-                } for p in self.patient],
-
-            "doctors": [
-                {
-                "name": d.name,
-                "age": d.age,
-                "gender": d.gender,
-                "id": d.get_doctor_id(),
-                "specialization": d.specialization
-                } for d in self.doctor],
-
-            "appointments": [
-                {
-                "date": a.date,
-                "patient_id": a.patient.get_patient_id(),
-                "doctor_id": a.doctor.get_doctor_id()
-                } for a in self.appointment]
+        """Writes a full snapshot (compaction). Row-level backends (SQLite) persist each change in place and have nothing to compact."""
+        if self.storage.row_level:
+            return
+        self.storage.save(self.snapshot())
+
+    @reads
+    def snapshot(self):
+        """All records in the Storage.load() layout; with a lazy backend the patients are streamed from storage."""
+        return {
+            "patients": self.storage.all_patients() if self.storage.lazy else [self.patient_record(p) for p in self.patient.values()],
+            "doctors": [self.doctor_record(d) for d in self.doctor.values()],
+            "appointments": [self.appointment_record(a) for a in self.appointment.values()]
+                            + [self.appointment_record(a) for a in self.cancelled.values()]
+        }
+
+    def record_change(self, change):
+        """Persists one mutation; compacts once the backend asks for it."""
+        if self._replaying:
+            return
+        if self._batch is not None:
+            self._batch.append(change)
+            return
+        with METRICS.timer("storage.append"):
+            self.storage.append(change)
+        for listener in self.listeners:
+            listener(change)
+        if self.storage.should_compact():
+            self.save_data()
+
+    @contextmanager
+    def batch(self):
+        """
+        Runs the block as one transaction and persists the changes made in it with a single write.
+        A batch inside a batch joins the outer one.
+        """
+        with self.transaction():
+            if self._batch is not None:
+                yield
+                return
+            self._batch = []
+            try:
+                yield
+            finally:
+                changes, self._batch = self._batch, None
+                compact, self._compact_after_batch = self._compact_after_batch, False
+                if changes:
+                    with METRICS.timer("storage.append_many"):
+                        self.storage.append_many(changes)
+                    METRICS.count("storage.batched_changes", len(changes))
+                    for change in changes:
+                        for listener in self.listeners:
+                            listener(change)
+                if compact or (changes and self.storage.should_compact()):
+                    self.save_data()
+
+    @timed
+    @writes
+    def apply_change(self, change):
+        """Applies a journal entry to the in-memory state."""
+        op = change["op"]
+        if op == "add_patient":
+            p = change["patient"]
+            self.add_patient(Patient.from_record(p))
+        elif op == "add_doctor":
+            d = change["doctor"]
+            self.add_doctor(Doctor.from_record(d))
+        elif op == "update_patient":
+            self.update_patient(change["id"], **change["fields"])
+        elif op == "update_doctor":
+            self.update_doctor(change["id"], **change["fields"])
+        elif op == "delete_patient":
+            #! journals written before deletes cascaded left the appointments behind; drop them now
+            self.remove_patient(change["id"], cascade=True)
+        elif op == "delete_doctor":
+            self.remove_doctor(change["id"], cascade=True)
+        elif op == "book_appointment":
+            self._restore_appointment(change["appointment"])
+        elif op == "cancel_appointment":
+            #! journals written before appointment IDs were persisted cancel the latest booking
+            appointment_id = change.get("id") or max(self.appointment, default=None)
+            self.cancel_appointment(appointment_id)
+        elif op == "mark_no_show":
+            self.mark_no_show(change["id"])
+        elif op == "archive_appointments":
+            moving = [a for i in change["ids"] if (a := self.appointment.get(i) or self.cancelled.get(i))]
+            if self._replaying:
+                #! written by another process on this store: the shared archive already holds them
+                self.archive.refresh()
+                self._drop_appointments(moving)
+            elif moving:
+                self._move_to_archive(moving)  #! replicated from another store: archive them in ours
+        else:
+            logging.warning(f"Unknown journal operation: {op}")
+
+    def _restore_appointment(self, app):
+        """
+        Re-creates a stored appointment record; cancelled ones go to self.cancelled, outside the indexes.
+        A record whose ID is already held (a change the snapshot already contains) is skipped.
+        """
+        if app.get("id") in self.appointment or app.get("id") in self.cancelled:
+            return
+        pat = self.search_patient_by_id(app["patient_id"])
+        doc = self.search_doctor_by_id(app["doctor_id"])
+        if not (pat and doc):
+            return
+        status = app.get("status") or BOOKED
+        if status == CANCELLED:
+            self._keep_cancelled(Appointment(app["date"],pat,doc,app.get("id"),app.get("time"),status))
+        else:
+            self.book_appointment(app["date"],pat,doc,app.get("id"),app.get("time")).status = status
+
+    @staticmethod
+    def patient_record(p):
+        return {
+            "name": p.name,
+            "age": p.age,
+            "gender": p.gender,
+            "id": p.get_patient_id(),
+            "disease": p.disaese
         }
 
-        with open(self.storage_file, 'w') as f:
-            json.dump(data, f, indent=4)
+    @staticmethod
+    def doctor_record(d):
+        return {
+            "name": d.name,
+            "age": d.age,
+            "gender": d.gender,
+            "id": d.get_doctor_id(),
+            "specialization": d.specialization,
+            "work_start": d.work_start,
+            "work_end": d.work_end,
+            "slot_minutes": d.slot_minutes
+        }
+
+    @staticmethod
+    def appointment_record(a):
+        return {
+            "id": a.number,
+            "date": a.date,
+            "time": a.time,
+            "status": a.status,
+            "patient_id": a.patient.get_patient_id(),
+            "doctor_id": a.doctor.get_doctor_id()
+        }
 
+    #? --- CRUD ---
+    @timed
+    @writes
     def add_patient(self,patient):
-        return self.patient.append(patient)
+        record = self.patient_record(patient)
+        self.patient[record["id"]] = patient
+        self.patient_search.add(record["id"], record)
+        self.record_change({"op": "add_patient", "patient": record})
     
+    @timed
+    @writes
     def add_doctor(self,doctor):
-        self.doctor.append(doctor)
+        record = self.doctor_record(doctor)
+        self.doctor[record["id"]] = doctor
+        self.doctor_search.add(record["id"], record)
+        self.scheduler.add_doctor(doctor)
+        self.record_change({"op": "add_doctor", "doctor": record})
+
+    @timed
+    @writes
+    def update_patient(self,patient_id,**fields):
+        patient = self.search_patient_by_id(patient_id)
+        if patient:
+            for field, value in fields.items():
+                setattr(patient, PATIENT_FIELDS[field], value)
+            self.patient_search.add(patient_id, self.patient_record(patient))
+            self.record_change({"op": "update_patient", "id": patient_id, "fields": fields})
+        return patient
+
+    @timed
+    @writes
+    def update_doctor(self,doctor_id,**fields):
+        doctor = self.search_doctor_by_id(doctor_id)
+        if doctor:
+            for field, value in fields.items():
+                setattr(doctor, DOCTOR_FIELDS[field], value)
+            self.doctor_search.add(doctor_id, self.doctor_record(doctor))
+            self.scheduler.add_doctor(doctor)
+            self.record_change({"op": "update_doctor", "id": doctor_id, "fields": fields})
+        return doctor
+
+    @timed
+    @writes
+    def remove_patient(self,patient_id,cascade=False):
+        """
+        Deletes the patient; returns it, or None if there is no such patient.
+        With cascade=True the patient's appointments are deleted too.
+        Raises:
+            ReferentialIntegrityError: if cascade is False and the patient still has appointments.
+        """
+        removed = self.remove_patients([patient_id], cascade)
+        return removed[0] if removed else None
+
+    @timed
+    @writes
+    def remove_doctor(self,doctor_id,cascade=False):
+        """
+        Deletes the doctor; returns them, or None if there is no such doctor.
+        With cascade=True the doctor's appointments are deleted too.
+        Raises:
+            ReferentialIntegrityError: if cascade is False and the doctor still has appointments.
+        """
+        removed = self.remove_doctors([doctor_id], cascade)
+        return removed[0] if removed else None
+
+    @timed
+    @writes
+    def remove_patients(self, patient_ids, cascade=False):
+        """
+        Deletes several patients in one pass, persisted with a single write; unknown IDs are skipped.
+        Uses the reverse indexes, so the cost is proportional to the patients and appointments affected.
+        Returns the deleted patients.
+        Raises:
+            ReferentialIntegrityError: if cascade is False and any of them still has appointments (nothing is deleted).
+        """
+        patients = {}
+        for patient_id in patient_ids:
+            patient = self.search_patient_by_id(patient_id)
+            if patient:
+                patients[patient_id] = patient
+        if not cascade:
+            self._check_unreferenced("Patient", patients, self.appointments_by_patient)
+        with self.batch():
+            for patient_id in patients:
+                self._drop_appointments(self.appointments_by_patient.get(patient_id, {}).values())
+                self.appointments_by_patient.pop(patient_id, None)
+                self._drop_appointments(self.cancelled_by_patient.pop(patient_id, {}).values())
+                del self.patient[patient_id]
+                self.patient_search.remove(patient_id)
+                self.record_change({"op": "delete_patient", "id": patient_id})
+        return list(patients.values())
+
+    @timed
+    @writes
+    def remove_doctors(self, doctor_ids, cascade=False):
+        """
+        Deletes several doctors in one pass, persisted with a single write; unknown IDs are skipped.
+        Returns the deleted doctors.
+        Raises:
+            ReferentialIntegrityError: if cascade is False and any of them still has appointments (nothing is deleted).
+        """
+        doctors = {}
+        for doctor_id in doctor_ids:
+            doctor = self.search_doctor_by_id(doctor_id)
+            if doctor:
+                doctors[doctor_id] = doctor
+        if not cascade:
+            self._check_unreferenced("Doctor", doctors, self.appointments_by_doctor)
+        with self.batch():
+            for doctor_id in doctors:
+                #! newest first: each removal from the doctor's sorted list is then at its end
+                entries = self.appointments_by_doctor.get(doctor_id, [])
+                self._drop_appointments([appointment for _, _, appointment in reversed(entries)])
+                self.appointments_by_doctor.pop(doctor_id, None)
+                self._drop_appointments(self.cancelled_by_doctor.pop(doctor_id, {}).values())
+                del self.doctor[doctor_id]
+                self.doctor_search.remove(doctor_id)
+                self.scheduler.remove_doctor(doctor_id)
+                self.record_change({"op": "delete_doctor", "id": doctor_id})
+        return list(doctors.values())
+
+    @staticmethod
+    def _check_unreferenced(kind, records, appointments_by):
+        blocked = {record_id: len(appointments_by[record_id]) for record_id in records if appointments_by.get(record_id)}
+        if blocked:
+            details = ", ".join(f"{record_id} ({count})" for record_id, count in blocked.items())
+            raise ReferentialIntegrityError(f"{kind} still has appointments - ID (appointments): {details}. "
+                                            f"Cancel them first or delete with cascade.")
+
+    def _drop_appointments(self, appointments):
+        """Deletes appointments outright (no cancellation history). O(1) each, apart from the sorted-list removals."""
+        for appointment in list(appointments):
+            if appointment.status == CANCELLED:
+                del self.cancelled[appointment.number]
+                self.cancelled_by_patient.get(appointment.patient.get_patient_id(), {}).pop(appointment.number, None)
+                self.cancelled_by_doctor.get(appointment.doctor.get_doctor_id(), {}).pop(appointment.number, None)
+            else:
+                del self.appointment[appointment.number]
+                self._unindex_appointment(appointment)
     
-    def book_appointment(self, date, patient, doctor):
-        new_appointment = Appointment(date,patient,doctor)
-        new_appointment.patient = patient
-        new_appointment.doctor = doctor
-        return self.appointment.append(new_appointment)
-
-    def cancel_appointment(self):
-        return self.appointment.pop()
+    @timed
+    @writes
+    def book_appointment(self, date, patient, doctor, appointment_id=None, time=None):
+        """
+        Books an appointment in one of the doctor's slots (the first free one that day if no time is given)
+        and adds it to the secondary indexes.
+        Raises:
+            AppointmentConflictError: if the patient is already booked with this doctor on that date,
+            or the slot is taken, outside working hours, or the day is full.
+        """
+        if not self._replaying:
+            if self.archive.covers(date_key(date)):
+                raise AppointmentConflictError(f"{date} is in an archived month (up to {self.archive.last_month}); it can no longer be booked.")
+            if self.find_conflict(date, patient, doctor):
+                raise AppointmentConflictError(f"{patient.name} is already booked with {doctor.name} on {date}.")
+            time = self._claim_slot(date, doctor, time)
+        new_appointment = Appointment(date,patient,doctor,appointment_id,time)
+        self.appointment[new_appointment.number] = new_appointment
+        self._index_appointment(new_appointment)
+        self.record_change({"op": "book_appointment", "appointment": self.appointment_record(new_appointment)})
+        return new_appointment
+
+    @timed
+    @writes
+    def cancel_appointment(self, appointment_id):
+        """Cancels the appointment with this ID, freeing its slot; returns it, or None if there is no such appointment."""
+        appointment = self.appointment.pop(appointment_id, None)
+        if appointment:
+            self._unindex_appointment(appointment)
+            appointment.status = CANCELLED
+            self._keep_cancelled(appointment)
+            self.record_change({"op": "cancel_appointment", "id": appointment_id})
+        return appointment
+
+    @timed
+    @writes
+    def mark_no_show(self, appointment_id):
+        """Records that the patient did not come; returns the appointment, or None if there is no such appointment."""
+        appointment = self.appointment.get(appointment_id)
+        if appointment:
+            appointment.status = NO_SHOW
+            self.record_change({"op": "mark_no_show", "id": appointment_id})
+        return appointment
+
+    @timed
+    @writes
+    def archive_appointments(self, before):
+        """
+        Moves the appointments (cancelled ones included) dated before the month `before` (YYYY-MM)
+        to the compressed monthly archive, then compacts the store without them, so loads and saves
+        no longer carry them. They stay readable through date-range and patient history queries.
+        Returns the number of appointments moved.
+        """
+        month = month_key(before)
+        days = self.appointment_days[:bisect_left(self.appointment_days, month)]
+        moving = [a for day in days for a in self.appointments_by_date[day].values()]
+        moving += [a for a in self.cancelled.values() if date_key(a.date) < month]
+        if moving:
+            self._move_to_archive(moving)
+        return len(moving)
+
+    def _move_to_archive(self, moving):
+        with METRICS.timer("archive.write"):
+            self.archive.add([self.appointment_record(a) for a in moving], lambda record: date_key(record["date"]))
+        self._drop_appointments(moving)
+        self.record_change({"op": "archive_appointments", "ids": [a.number for a in moving]})
+        if self._batch is not None:
+            #! compacting now would snapshot changes the batch has yet to append; compact once it is persisted
+            self._compact_after_batch = True
+        else:
+            self.save_data()
+        METRICS.count("archive.appointments_moved", len(moving))
+
+    def archived_appointments(self, start=None, end=None, patient_id=None, include_cancelled=False):
+        """
+        Yields archived appointments in date order: those between start and end (YYYY-MM-DD), or a patient's
+        whole archived history. Only the monthly partitions involved are read. Appointments whose patient
+        or doctor has since been deleted are skipped.
+        """
+        if patient_id is not None:
+            records = self.archive.records_for_patient(patient_id)
+            start_key, end_key = date_key(start) if start else None, date_key(end) if end else None
+        else:
+            records = self.archive.records_between(date_key(start) if start else None, date_key(end) if end else None)
+            start_key = end_key = None
+        for record in records:
+            if record["status"] == CANCELLED and not include_cancelled:
+                continue
+            if record["id"] in self.appointment or record["id"] in self.cancelled:
+                continue  #! still in the store: an archive run stopped before compacting
+            if start_key or end_key:
+                day = date_key(record["date"])
+                if (start_key and day < start_key) or (end_key and day > end_key):
+                    continue
+            patient = self.search_patient_by_id(record["patient_id"])
+            doctor = self.search_doctor_by_id(record["doctor_id"])
+            if patient and doctor:
+                yield Appointment(record["date"], patient, doctor, record["id"], record.get("time"), record["status"])
+
+    def reaches_archive(self, start):
+        """Whether a query from `start` needs the archive; without a start date only the active window is searched."""
+        return bool(start) and self.archive.covers(date_key(start))
+
+    def _claim_slot(self, date, doctor, time):
+        doctor_id = doctor.get_doctor_id()
+        if time is None:
+            slot = self.scheduler.earliest_for(doctor_id, date)
+            if slot is None or slot[0] != date_key(date):
+                raise AppointmentConflictError(f"{doctor.name} has no free slot on {date}.")
+            return slot[1]
+        time = to_clock(to_minutes(time))
+        if not self.scheduler.is_free(doctor_id, date, time):
+            raise AppointmentConflictError(f"{doctor.name} is not available on {date} at {time}.")
+        return time
+
+    @timed
+    @reads
+    def earliest_available(self, specialization, date, time=None):
+        """
+        (doctor, date, time) of the first free slot at or after date/time with any doctor
+        of this specialization, or None if there is no such doctor.
+        """
+        slot = self.scheduler.earliest(specialization, date, time)
+        if slot is None:
+            return None
+        doctor_id, date, time = slot
+        return self.doctor[doctor_id], date, time
+
+    @timed
+    @reads
+    def next_free_slot(self, doctor_id, date, time=None):
+        """(date, time) of the doctor's first free slot at or after date/time, or None."""
+        return self.scheduler.earliest_for(doctor_id, date, time)
+
+    #? --- Appointment indexes ---
+    def _index_appointment(self, appointment):
+        day = date_key(appointment.date)
+        insort(self.appointments_by_doctor.setdefault(appointment.doctor.get_doctor_id(), []), (day, appointment.number, appointment))
+        self.appointments_by_patient.setdefault(appointment.patient.get_patient_id(), {})[appointment.number] = appointment
+        if day not in self.appointments_by_date:
+            self.appointments_by_date[day] = {}
+            insort(self.appointment_days, day)
+        self.appointments_by_date[day][appointment.number] = appointment
+        self.scheduler.book(appointment)
+
+    def _keep_cancelled(self, appointment):
+        """Files a cancelled appointment in the history, by patient and by doctor."""
+        self.cancelled[appointment.number] = appointment
+        self.cancelled_by_patient.setdefault(appointment.patient.get_patient_id(), {})[appointment.number] = appointment
+        self.cancelled_by_doctor.setdefault(appointment.doctor.get_doctor_id(), {})[appointment.number] = appointment
+
+    def _unindex_appointment(self, appointment):
+        self.scheduler.release(appointment)
+        day = date_key(appointment.date)
+        entries = self.appointments_by_doctor[appointment.doctor.get_doctor_id()]
+        del entries[bisect_left(entries, (day, appointment.number))]
+        del self.appointments_by_patient[appointment.patient.get_patient_id()][appointment.number]
+        same_day = self.appointments_by_date[day]
+        del same_day[appointment.number]
+        if not same_day:
+            del self.appointments_by_date[day]
+            del self.appointment_days[bisect_left(self.appointment_days, day)]
+
+    @reads
+    def find_conflict(self, date, patient, doctor):
+        """Returns the existing appointment of this patient with this doctor on this date, if any. O(log n)."""
+        entries = self.appointments_by_doctor.get(doctor.get_doctor_id(), [])
+        day = date_key(date)
+        patient_id = patient.get_patient_id()
+        for i in range(bisect_left(entries, (day,)), len(entries)):
+            entry_day, _, appointment = entries[i]
+            if entry_day != day:
+                break
+            if appointment.patient.get_patient_id() == patient_id:
+                return appointment
+        return None
+
+    @timed
+    @reads
+    def appointments_for_doctor(self, doctor_id, start=None, end=None):
+        """
+        Returns the doctor's appointments between start and end (inclusive, YYYY-MM-DD), in date order.
+        Archived months are read when start falls in them.
+        """
+        entries = self.appointments_by_doctor.get(doctor_id, [])
+        lo = bisect_left(entries, (date_key(start),)) if start else 0
+        hi = bisect_left(entries, (date_key(end), float("inf"))) if end else len(entries)
+        archived = [a for a in self.archived_appointments(start, end) if a.doctor.get_doctor_id() == doctor_id] if self.reaches_archive(start) else []
+        return archived + [appointment for _, _, appointment in entries[lo:hi]]
+
+    @timed
+    @reads
+    def appointments_for_patient(self, patient_id):
+        """The patient's whole history: archived appointments (read from the months they appear in), then current ones."""
+        return list(self.archived_appointments(patient_id=patient_id)) + list(self.appointments_by_patient.get(patient_id, {}).values())
+
+    @timed
+    @reads
+    def appointments_between(self, start=None, end=None):
+        """Returns all appointments between start and end (inclusive, YYYY-MM-DD), in date order; archived months are read when start falls in them."""
+        lo = bisect_left(self.appointment_days, date_key(start)) if start else 0
+        hi = bisect_right(self.appointment_days, date_key(end)) if end else len(self.appointment_days)
+        archived = list(self.archived_appointments(start, end)) if self.reaches_archive(start) else []
+        return archived + [appointment for day in self.appointment_days[lo:hi] for appointment in self.appointments_by_date[day].values()]
     
-    def show_all_appointments(self):
-        if self.appointment:
-            for app in self.appointment:
+    def iter_appointments(self, doctor_id=None, patient_id=None, start=None, end=None):
+        """
+        Yields the appointments matching the filters, lazily, using the narrowest index.
+        Filtered by doctor or date the order is chronological; otherwise it is booking order.
+        Archived appointments come first, for a patient's history or when start falls in an archived month.
+        """
+        if self.reaches_archive(start) or (patient_id is not None and not start):
+            for appointment in self.archived_appointments(start, end, patient_id):
+                if doctor_id is None or appointment.doctor.get_doctor_id() == doctor_id:
+                    yield appointment
+        if doctor_id is not None:
+            entries = self.appointments_by_doctor.get(doctor_id, [])
+            lo = bisect_left(entries, (date_key(start),)) if start else 0
+            end_key = date_key(end) if end else None
+            for i in range(lo, len(entries)):
+                day, _, appointment = entries[i]
+                if end_key and day > end_key:
+                    break
+                if patient_id is None or appointment.patient.get_patient_id() == patient_id:
+                    yield appointment
+        elif patient_id is not None:
+            start_key = date_key(start) if start else None
+            end_key = date_key(end) if end else None
+            for appointment in self.appointments_by_patient.get(patient_id, {}).values():
+                day = date_key(appointment.date)
+                if (start_key is None or day >= start_key) and (end_key is None or day <= end_key):
+                    yield appointment
+        elif start or end:
+            lo = bisect_left(self.appointment_days, date_key(start)) if start else 0
+            hi = bisect_right(self.appointment_days, date_key(end)) if end else len(self.appointment_days)
+            for i in range(lo, hi):
+                yield from self.appointments_by_date[self.appointment_days[i]].values()
+        else:
+            yield from self.appointment.values()
+
+    @timed
+    @reads
+    def page_appointments(self, page=1, page_size=20, **filters):
+        """Returns (appointments on this page, whether a next page exists); only this page is materialized."""
+        offset = (page - 1) * page_size
+        rows = list(islice(self.iter_appointments(**filters), offset, offset + page_size + 1))
+        return rows[:page_size], len(rows) > page_size
+
+    def show_all_appointments(self, page=1, page_size=20, **filters):
+        rows, has_more = self.page_appointments(page, page_size, **filters)
+        if rows:
+            for app in rows:
                 app.get_appointment_details()
+            if has_more:
+                print(f"\n-- more on page {page + 1} --")
         else:
             print("No appointments found.")
             logging.warning("No appointments found.")
+        return has_more
 
+    @timed
+    @reads
     def search_patient_by_id(self,patient_id):
-        for patient in self.patient:
-            if patient.get_patient_id() == patient_id:
-                return patient
-        return None
+        patient = self.patient.get(patient_id)
+        if patient is None and self.storage.lazy:
+            p = self.storage.get_patient(patient_id)
+            METRICS.count("storage.patient_fetches")
+            if p:
+                patient = Patient.from_record(p)
+                self.patient[patient_id] = patient
+        return patient
     
+    @timed
+    @reads
     def search_doctor_by_id(self,doctor_id):
-        for doctor in self.doctor:
-            if doctor.get_doctor_id() == doctor_id:
-                return doctor
-        return None
+        doctor = self.doctor.get(doctor_id)
+        if doctor is None and self.storage.lazy:
+            d = self.storage.get_doctor(doctor_id)
+            if d:
+                doctor = Doctor.from_record(d)
+                self.doctor[doctor_id] = doctor
+        return doctor
         
+    @timed
+    @reads
+    def search_patients(self, text, limit=10):
+        """
+        Ranked patients whose name or disease matches `text` (prefixes and small typos allowed).
+        With a lazy backend the first search indexes the stored patients (one pass over storage.all_patients());
+        the matches are then fetched by ID.
+        """
+        if self.storage.lazy and not self.stored_patients_indexed:
+            self._index_stored_patients()
+        return [self.search_patient_by_id(patient_id) for patient_id, _ in self.patient_search.search(text, limit)]
+
+    def _index_stored_patients(self):
+        #! under the read lock no writer touches the index; the index lock keeps two searches from both building it
+        with self._index_lock:
+            if self.stored_patients_indexed:
+                return
+            for record in self.storage.all_patients():
+                if record["id"] not in self.patient:  #! loaded patients are indexed already, with any unsaved fields
+                    self.patient_search.add(record["id"], record)
+            self.stored_patients_indexed = True
+
+    @timed
+    @reads
+    def search_doctors(self, text, limit=10):
+        """Ranked doctors whose name or specialization matches `text` (prefixes and small typos allowed)."""
+        return [self.doctor[doctor_id] for doctor_id, _ in self.doctor_search.search(text, limit)]
+
+    def _delete_from_menu(self, kind):
+        """Settings > Delete for "patient" or "doctor": one or several IDs, asking before their appointments go too."""
+        label, remove = ("Patient", self.remove_patients) if kind == "patient" else ("Doctor", self.remove_doctors)
+        ids = [int(value) for value in input(f"Enter {kind} ID(s) to delete (separate several with commas): ").replace(",", " ").split()]
+        try:
+            removed = remove(ids)
+        except ReferentialIntegrityError as e:
+            print(e)
+            logging.warning(e)
+            if input("Delete their appointments as well? (y/n): ").strip().lower() != "y":
+                return
+            removed = remove(ids, cascade=True)
+        deleted = {getattr(record, f"get_{kind}_id")() for record in removed}
+        for record_id in ids:
+            if record_id in deleted:
+                print(f"\n{label} with ID {record_id} deleted successfully!\n")
+                logging.info(f"{label} with ID {record_id} deleted successfully!", extra={"event": f"{kind}.deleted", f"{kind}_id": record_id})
+            else:
+                print(f"{label} with ID {record_id} not found!")
+                logging.warning(f"{label} with ID {record_id} not found!", extra={"event": f"{kind}.not_found", f"{kind}_id": record_id})
+
     def settings(self):
         while True:
             print("\n1. Patient\n2. Doctor\n3. Back")
@@ -122,48 +798,37 @@ class HospitalManager(Hospital):
 
                     if choice == "1":
                         patient_id = int(input("Enter patient ID to update details: "))
-                        for patient in self.patient:
-                            if patient.get_patient_id() == patient_id:
-                                print("Leave the field empty if you don't want to update it.")
-                                patient.name = input(f"Enter the new patient name ({patient.name}): ") or patient.name
-                                 # Input and validate age
-                                while True:
-                                    try:
-                                        patient.age = int(input(f"Enter the new patient age ({patient.age}): ")) or patient.age
-                                        validate_patient_age(patient.age)
-                                        break
-                                    except InvalidAgeError as e:
-                                        print(e)
-                                        logging.error(e)
-                                # Input and validate gender
-                                while True:
-                                    try:
-                                        patient.gender = input(f"Enter the new patient gender (M/F/O) ({patient.gender}): ") or patient.gender
-                                        validate_gender(patient.gender)
-                                        break
-                                    except InvalidGenderError as e:
-                                        print(e)
-                                        logging.error(e)
-                                patient.disaese = input(f"Enter the new patient disaese ({patient.disaese}): ") or patient.disaese
-                                print(f"\nPatient with ID {patient_id} updated successfully!\n")
-                                logging.info(f"Patient with ID {patient_id} updated successfully!")
-                                self.save_data()
-                                break
-                            else:
-                                print(f"Patient with ID {patient_id} not found!")
+                        patient = self.search_patient_by_id(patient_id)
+                        if patient:
+                            print("Leave the field empty if you don't want to update it.")
+                            name = input(f"Enter the new patient name ({patient.name}): ") or patient.name
+                             # Input and validate age
+                            while True:
+                                try:
+                                    age = int(input(f"Enter the new patient age ({patient.age}): ") or patient.age)
+                                    validate_patient_age(age)
+                                    break
+                                except InvalidAgeError as e:
+                                    print(e)
+                                    logging.error(e)
+                            # Input and validate gender
+                            while True:
+                                try:
+                                    gender = input(f"Enter the new patient gender (M/F/O) ({patient.gender}): ") or patient.gender
+                                    validate_gender(gender)
+                                    break
+                                except InvalidGenderError as e:
+                                    print(e)
+                                    logging.error(e)
+                            disease = input(f"Enter the new patient disaese ({patient.disaese}): ") or patient.disaese
+                            self.update_patient(patient_id, name=name, age=age, gender=gender, disease=disease)
+                            print(f"\nPatient with ID {patient_id} updated successfully!\n")
+                            logging.info(f"Patient with ID {patient_id} updated successfully!", extra={"event": "patient.updated", "patient_id": patient_id})
+                        else:
+                            print(f"Patient with ID {patient_id} not found!")
 
                     elif choice == "2":
-                        patient_id = int(input("Enter patient ID to delete: "))
-                        for patient in self.patient:
-                            if patient.get_patient_id() == patient_id:
-                                self.patient.remove(patient)
-                                print(f"\nPatient with ID {patient_id} deleted successfully!\n")
-                                logging.info(f"Patient with ID {patient_id} deleted successfully!")
-                                self.save_data()
-                                break
-                            else:
-                                print(f"Patient with ID {patient_id} not found!")
-                                logging.warning(f"Patient with ID {patient_id} not found!")
+                        self._delete_from_menu("patient")
                     elif choice == "3":
                         break
                     else:
@@ -177,47 +842,48 @@ class HospitalManager(Hospital):
 
                     if choice == "1":
                         doctor_id = int(input("Enter doctor ID to update details: "))
-                        for doctor in self.doctor:
-                            if doctor.get_doctor_id() == doctor_id:
-                                print("Leave the field empty if you don't want to update it.")
-                                doctor.name = input(f"Enter the new doctor name ({doctor.name}): ") or doctor.name
-                                # Input and validate age
-                                while True:
-                                    try:
-                                        doctor.age = int(input(f"Enter the new doctor age ({patient.age}): ")) or doctor.age
-                                        validate_doctor_age(doctor.age)
-                                        break
-                                    except InvalidAgeError as e:
-                                        print(e)
-                                        logging.error(e)
-                                # Input and validate gender
-                                while True:
-                                    try:
-                                        doctor.gender = input(f"Enter the new doctor gender (M/F/O) ({doctor.gender}): ") or doctor.gender
-                                        validate_gender(doctor.gender)
-                                        break
-                                    except InvalidGenderError as e:
-                                        print(e)
-                                        logging.error(e)
-                                doctor.specialization = input(f"Enter the new doctor specialization ({doctor.specialization}): ") or doctor.specialization
-                                print(f"\nDoctor with ID {doctor_id} updated successfully!\n")
-                                logging.info(f"Doctor with ID {doctor_id} updated successfully!")
-                                self.save_data()
-                                break
-                            else:
-                                print(f"Doctor with ID {doctor_id} not found!")
+                        doctor = self.search_doctor_by_id(doctor_id)
+                        if doctor:
+                            print("Leave the field empty if you don't want to update it.")
+                            name = input(f"Enter the new doctor name ({doctor.name}): ") or doctor.name
+                            # Input and validate age
+                            while True:
+                                try:
+                                    age = int(input(f"Enter the new doctor age ({doctor.age}): ") or doctor.age)
+                                    validate_doctor_age(age)
+                                    break
+                                except InvalidAgeError as e:
+                                    print(e)
+                                    logging.error(e)
+                            # Input and validate gender
+                            while True:
+                                try:
+                                    gender = input(f"Enter the new doctor gender (M/F/O) ({doctor.gender}): ") or doctor.gender
+                                    validate_gender(gender)
+                                    break
+                                except InvalidGenderError as e:
+                                    print(e)
+                                    logging.error(e)
+                            specialization = input(f"Enter the new doctor specialization ({doctor.specialization}): ") or doctor.specialization
+                            # Input and validate working hours
+                            while True:
+                                try:
+                                    work_start = input(f"Enter the new working hours start (HH:MM) ({doctor.work_start}): ") or doctor.work_start
+                                    work_end = input(f"Enter the new working hours end (HH:MM) ({doctor.work_end}): ") or doctor.work_end
+                                    slot_minutes = int(input(f"Enter the new slot length in minutes ({doctor.slot_minutes}): ") or doctor.slot_minutes)
+                                    validate_working_hours(work_start, work_end, slot_minutes)
+                                    break
+                                except InvalidScheduleError as e:
+                                    print(e)
+                                    logging.error(e)
+                            self.update_doctor(doctor_id, name=name, age=age, gender=gender, specialization=specialization,
+                                               work_start=to_clock(to_minutes(work_start)), work_end=to_clock(to_minutes(work_end)), slot_minutes=slot_minutes)
+                            print(f"\nDoctor with ID {doctor_id} updated successfully!\n")
+                            logging.info(f"Doctor with ID {doctor_id} updated successfully!", extra={"event": "doctor.updated", "doctor_id": doctor_id})
+                        else:
+                            print(f"Doctor with ID {doctor_id} not found!")
                     elif choice == "2":
-                        doctor_id = int(input("Enter doctor ID to delete: "))
-                        for doctor in self.doctor:
-                            if doctor.get_doctor_id() == doctor_id:
-                                self.doctor.remove(doctor)
-                                print(f"\nDoctor with ID {doctor_id} deleted successfully!\n")
-                                logging.info(f"Doctor with ID {doctor_id} deleted successfully!")
-                                self.save_data()
-                                break
-                            else:
-                                print(f"Doctor with ID {doctor_id} not found!") 
-                                logging.warning(f"Doctor with ID {doctor_id} not found!")
+                        self._delete_from_menu("doctor")
                     elif choice == "3":
                         break
                     else:
@@ -225,5 +891,4 @@ class HospitalManager(Hospital):
             elif choice == "3":
                 break
             else:
-                print("\nInvalid choice please try again!\n")
-
+                print("\nInvalid choice please try again!\n")
\ No newline at end of file
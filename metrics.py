@@ -0,0 +1,230 @@
+import os
+import io
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+#? ####################################################
+#? Start Histogram Class - log-bucketed latencies
+#? ####################################################
+
+SUB_BUCKETS = 16  #! per power of two, so a reported percentile is within ~4% of the true value
+
+class Histogram:
+    """Latency histogram with logarithmic buckets: constant memory however many samples it holds."""
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        mantissa, exponent = math.frexp(ns or 1)
+        index = exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ns
+        self.max = max(self.max, ns)
+
+    def percentile(self, fraction):
+        """Nanoseconds at or below which `fraction` of the samples fall (bucket midpoint)."""
+        if not self.count:
+            return 0
+        rank, seen = fraction * self.count, 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                exponent, step = divmod(index, SUB_BUCKETS)
+                return min(math.ldexp(0.5 + (step + 0.5) / (2 * SUB_BUCKETS), exponent), self.max)
+        return self.max
+
+#? ####################################################
+#? Start Metrics Class - counters and timings
+#? ####################################################
+
+class Metrics:
+    """
+    Per-operation counts, errors and latency histograms, plus free-form counters.
+    Disabled by default (HMS_METRICS=1 enables it at startup): methods marked with
+    @timed are only wrapped while collection is on, so when it is off they run
+    exactly as written, and timer()/count() return after a single flag check.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.classes = []
+        self.originals = {}  # (class, method name) -> unwrapped function
+        self.profiler = None
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.operations = {}  # name -> [errors, Histogram]
+            self.counters = {}
+            self.started = time.time()
+
+    #? --- Switching on and off ---
+    def enable(self):
+        """Starts collecting: wraps every @timed method of the instrumented classes."""
+        with self.lock:
+            if self.enabled:
+                return
+            for cls in self.classes:
+                self._wrap(cls)
+            self.enabled = True
+
+    def disable(self):
+        """Stops collecting and restores the original methods; the figures so far are kept."""
+        with self.lock:
+            for (cls, name), method in self.originals.items():
+                setattr(cls, name, method)
+            self.originals.clear()
+            self.enabled = False
+
+    def instrument(self, cls):
+        """Class decorator: registers a class whose @timed methods are wrapped while metrics are enabled."""
+        self.classes.append(cls)
+        if self.enabled:
+            self._wrap(cls)
+        return cls
+
+    def _wrap(self, cls):
+        for name, method in list(vars(cls).items()):
+            operation = getattr(method, "timed_as", None)
+            if operation:
+                self.originals[(cls, name)] = method
+                setattr(cls, name, self._timing(method, operation))
+
+    def _timing(self, method, operation):
+        clock, record = time.perf_counter_ns, self.record
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                record(operation, clock() - start, failed=True)
+                raise
+            record(operation, clock() - start)
+            return result
+        return wrapper
+
+    #? --- Recording ---
+    def record(self, operation, ns, failed=False):
+        with self.lock:
+            entry = self.operations.get(operation)
+            if entry is None:
+                entry = self.operations[operation] = [0, Histogram()]
+            entry[0] += failed
+            entry[1].add(ns)
+
+    def timer(self, operation):
+        """Context manager timing a block as `operation` (a shared no-op while disabled)."""
+        return self._timed_block(operation) if self.enabled else NOT_TIMED
+
+    @contextmanager
+    def _timed_block(self, operation):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException:
+            self.record(operation, time.perf_counter_ns() - start, failed=True)
+            raise
+        self.record(operation, time.perf_counter_ns() - start)
+
+    def count(self, counter, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[counter] = self.counters.get(counter, 0) + n
+
+    #? --- Reading ---
+    def snapshot(self):
+        """The collected figures as a JSON-serializable dict (times in milliseconds)."""
+        with self.lock:
+            operations = {}
+            for name, (errors, histogram) in sorted(self.operations.items()):
+                operations[name] = {
+                    "count": histogram.count, "errors": errors,
+                    "total_ms": round(histogram.total / 1e6, 3),
+                    "mean_ms": round(histogram.total / histogram.count / 1e6, 4),
+                    "p50_ms": round(histogram.percentile(0.50) / 1e6, 4),
+                    "p95_ms": round(histogram.percentile(0.95) / 1e6, 4),
+                    "p99_ms": round(histogram.percentile(0.99) / 1e6, 4),
+                    "max_ms": round(histogram.max / 1e6, 4),
+                }
+            return {"enabled": self.enabled, "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                    "operations": operations, "counters": dict(sorted(self.counters.items()))}
+
+    def dump(self, path):
+        """Writes snapshot() to a JSON file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+    #? --- Profiling capture ---
+    def start_profile(self):
+        """Starts cProfile (on the calling thread) and tracemalloc, until stop_profile()."""
+        import cProfile
+        import tracemalloc
+        if self.profiler:
+            return
+        tracemalloc.start()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, path=None, top=15):
+        """
+        Stops the capture. Returns a text report: the slowest functions by cumulative time
+        and the lines that allocated the most memory still alive. `path` also saves the raw .prof file.
+        """
+        import pstats
+        import tracemalloc
+        if not self.profiler:
+            return ""
+        self.profiler.disable()
+        allocations = tracemalloc.take_snapshot().statistics("lineno")[:top]
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.profiler.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        self.profiler = None
+        out.write(f"Top allocations (peak traced memory {peak / 2**20:.1f} MiB):\n")
+        for stat in allocations:
+            out.write(f"  {stat}\n")
+        return out.getvalue()
+
+    @contextmanager
+    def profile(self, path=None, report=print):
+        """Profiles the block with start_profile()/stop_profile() and passes the report to `report`."""
+        self.start_profile()
+        try:
+            yield
+        finally:
+            report(self.stop_profile(path))
+
+NOT_TIMED = nullcontext()
+
+#! the process-wide registry used by HospitalManager, the menu and the HTTP API
+METRICS = Metrics()
+
+def timed(operation=None):
+    """
+    Marks a method to be timed as `operation` (default: its name) while metrics are enabled.
+    The method itself is returned unchanged; Metrics.enable() wraps it.
+    """
+    def mark(method):
+        method.timed_as = operation or method.__name__
+        return method
+    if callable(operation):
+        method, operation = operation, None
+        return mark(method)
+    return mark
+
+if os.environ.get("HMS_METRICS") == "1":
+    METRICS.enable()
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import uuid
+import queue
+import socket
+import logging
+import threading
+from collections import deque
+from itertools import islice
+from metrics import METRICS, Histogram
+from exceptions.exceptions import ReplicationError
+
+PORT = 9100
+HEARTBEAT = 1.0  #! seconds of silence before the primary sends its position anyway
+
+def parse_address(value, default_host="127.0.0.1"):
+    """
+    "HOST:PORT", ":PORT" or "PORT" -> (host, port).
+    Raises:
+        ReplicationError: if there is no valid port.
+    """
+    host, _, port = str(value).rpartition(":")
+    try:
+        return host or default_host, int(port)
+    except ValueError:
+        raise ReplicationError(f"Invalid address: '{value}'. Expected HOST:PORT.")
+
+def position_path(storage):
+    """Where a standby records how far it has applied the stream: next to its data file (data/hospital-data.json.replica)."""
+    path = getattr(storage, "path", None)
+    return path + ".replica" if path else None
+
+#? ####################################################################
+#? Start ChangePublisher Class - the primary's change stream
+#? ####################################################################
+
+class ChangePublisher:
+    """
+    Publishes every change a HospitalManager persists as an ordered stream over a local TCP socket.
+
+    Changes are numbered 1, 2, 3... within a stream, whose ID is drawn when the
+    publisher starts; the last `retain` of them are kept in memory. Protocol, one
+    JSON object per line:
+      * standby -> primary: {"stream_id", "seq"} - the last change it applied (null / 0 for none)
+      * primary -> standby: {"type": "resume", "stream_id", "seq"} when that change is still retained,
+        otherwise {"type": "snapshot", "stream_id", "seq", "data"} with all records as of seq;
+        then {"type": "change", "seq", "ts", "change"} for every later change, and
+        {"type": "heartbeat", "seq", "ts"} after HEARTBEAT seconds without one.
+    Only this process's changes are published: run one primary writer per store.
+    """
+    def __init__(self, hospital, host="127.0.0.1", port=PORT, retain=100_000):
+        self.hospital = hospital
+        self.stream_id = uuid.uuid4().hex
+        self.seq = 0
+        self.retain = retain
+        self.recent = deque(maxlen=retain)  # (seq, ts, change), consecutive seqs
+        self.subscribers = set()
+        self.guard = threading.Lock()  #! the subscriber set; publishing itself is ordered by the manager's write lock
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        hospital.listeners.append(self.publish)
+        self._thread = threading.Thread(target=self._accept, name="replication-publisher", daemon=True)
+        self._thread.start()
+        logging.info(f"Publishing changes on {self.address[0]}:{self.address[1]} (stream {self.stream_id})")
+
+    def publish(self, change):
+        """Manager listener: called with the write lock held, right after the change is persisted."""
+        self.seq += 1
+        entry = (self.seq, time.time(), change)
+        self.recent.append(entry)
+        with self.guard:
+            for subscriber in self.subscribers:
+                subscriber.push(entry)
+        METRICS.count("replication.published")
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return  #! closed
+            threading.Thread(target=self._serve, args=(conn,), name="replication-subscriber", daemon=True).start()
+
+    def _serve(self, conn):
+        peer = "%s:%s" % conn.getpeername()[:2]
+        try:
+            hello = json.loads(conn.makefile("rb").readline() or b"{}")
+            subscriber = Subscriber(self, conn, peer)
+            #! under the read lock no change is published, so the snapshot or backlog and the live stream join up exactly
+            with self.hospital.lock.read():
+                position = hello.get("seq") or 0
+                first = self.seq - len(self.recent)  #! the oldest retained change is first + 1
+                if hello.get("stream_id") == self.stream_id and first <= position <= self.seq:
+                    header = {"type": "resume", "stream_id": self.stream_id, "seq": position}
+                    subscriber.backlog(islice(self.recent, position - first, None))
+                else:
+                    data = {kind: list(records) for kind, records in self.hospital.snapshot().items()}
+                    header = {"type": "snapshot", "stream_id": self.stream_id, "seq": self.seq, "data": data}
+                with self.guard:
+                    self.subscribers.add(subscriber)
+            logging.info(f"Standby {peer} connected: {header['type']} from change {header['seq']}")
+            METRICS.count(f"replication.{header['type']}s")
+            subscriber.run(header)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Standby {peer} disconnected: {e}")
+        finally:
+            with self.guard:
+                self.subscribers = {s for s in self.subscribers if s.conn is not conn}
+            conn.close()
+
+    def status(self):
+        with self.guard:
+            subscribers = [{"standby": s.peer, "sent": s.sent, "queued": s.queue.qsize()} for s in self.subscribers]
+        return {"address": "%s:%s" % self.address, "stream_id": self.stream_id, "seq": self.seq,
+                "retained": len(self.recent), "standbys": subscribers}
+
+    def close(self):
+        if self.publish in self.hospital.listeners:
+            self.hospital.listeners.remove(self.publish)
+        self.server.close()
+        with self.guard:
+            for subscriber in self.subscribers:
+                subscriber.stop()
+
+class Subscriber:
+    """One connected standby: changes are queued by publish() and written to the socket by this connection's thread."""
+    def __init__(self, publisher, conn, peer):
+        self.publisher = publisher
+        self.conn = conn
+        self.peer = peer
+        self.queue = queue.SimpleQueue()
+        self.sent = 0
+        self.dropped = False
+
+    def backlog(self, entries):
+        for entry in entries:
+            self.queue.put(entry)
+
+    def push(self, entry):
+        if self.dropped:
+            return
+        if self.queue.qsize() >= self.publisher.retain:
+            #! too far behind: cut it off rather than buffer without bound; it resumes or resyncs on reconnecting
+            logging.warning(f"Standby {self.peer} fell {self.publisher.retain} changes behind; disconnecting it")
+            self.stop()
+            return
+        self.queue.put(entry)
+
+    def stop(self):
+        self.dropped = True
+        self.queue.put(None)
+
+    def run(self, header):
+        self.conn.sendall(json.dumps(header).encode() + b"\n")
+        self.sent = header["seq"]
+        while True:
+            try:
+                entries = [self.queue.get(timeout=HEARTBEAT)]
+            except queue.Empty:
+                heartbeat = {"type": "heartbeat", "seq": self.publisher.seq, "ts": time.time()}
+                self.conn.sendall(json.dumps(heartbeat).encode() + b"\n")
+                continue
+            while len(entries) < 1000 and not self.queue.empty():
+                entries.append(self.queue.get())
+            if None in entries:
+                return
+            self.conn.sendall(b"".join(json.dumps({"type": "change", "seq": seq, "ts": ts, "change": change}).encode() + b"\n"
+                                       for seq, ts, change in entries))
+            self.sent = entries[-1][0]
+
+#? ####################################################################
+#? Start Standby Class - applies a primary's stream to its own store
+#? ####################################################################
+
+class Standby:
+    """
+    Keeps a HospitalManager on its own store in step with a primary's ChangePublisher.
+
+    Each read from the socket is applied as one batch (one journal write), then the
+    stream ID and last applied seq are written to position_path(), so a restarted
+    standby resumes from that offset instead of copying a snapshot. A change delivered
+    twice (applied, then the position lost in a crash) is skipped. Lag is the time
+    from the primary persisting a change to this store persisting it.
+    """
+    def __init__(self, hospital, host="127.0.0.1", port=PORT):
+        self.hospital = hospital
+        self.address = (host, port)
+        self.position_file = position_path(hospital.storage)
+        self.stream_id, self.seq = self._read_position()
+        self.primary_seq = self.seq
+        self.connected = False
+        self.lag = Histogram()  # ns
+        self.applied = 0
+        self.batches = 0
+        self.snapshots = 0
+        self.apply_seconds = 0.0
+        self._stop = threading.Event()
+        self._sock = None
+
+    def _read_position(self):
+        try:
+            with open(self.position_file) as f:
+                position = json.load(f)
+            return position["stream_id"], position["seq"]
+        except (TypeError, OSError, ValueError, KeyError):
+            return None, 0
+
+    def _write_position(self):
+        if not self.position_file:
+            return
+        tmp_file = f"{self.position_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"stream_id": self.stream_id, "seq": self.seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.position_file)
+
+    #? --- Connection ---
+    def run(self, max_backoff=5.0):
+        """Follows the primary until stop(), reconnecting with backoff whenever the connection drops."""
+        backoff = 0.1
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                backoff = 0.1
+            except (OSError, ValueError, ReplicationError) as e:
+                if self._stop.is_set():
+                    break
+                logging.warning(f"Replication from {self.address[0]}:{self.address[1]} interrupted: {e}")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    def run_once(self):
+        """
+        One connection: hello, snapshot or resume, then changes until the primary goes away.
+        Raises:
+            ReplicationError: on a gap in the stream or an unexpected message.
+            OSError: if the primary cannot be reached or stops answering.
+        """
+        with socket.create_connection(self.address, timeout=5 * HEARTBEAT) as sock:
+            self._sock = sock
+            sock.sendall(json.dumps({"stream_id": self.stream_id, "seq": self.seq}).encode() + b"\n")
+            self.connected = True
+            buffer = bytearray()
+            try:
+                while not self._stop.is_set():
+                    data = sock.recv(1 << 16)
+                    if not data:
+                        raise ConnectionError("the primary closed the connection")
+                    buffer += data
+                    end = buffer.rfind(b"\n", max(len(buffer) - len(data), 0))
+                    if end < 0:
+                        continue  #! a snapshot spans many reads
+                    lines = bytes(buffer[:end]).split(b"\n")
+                    del buffer[:end + 1]
+                    self._handle([json.loads(line) for line in lines])
+            finally:
+                self.connected = False
+                self._sock = None
+
+    def stop(self):
+        self._stop.set()
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    #? --- Applying ---
+    def _handle(self, messages):
+        changes = []
+        for message in messages:
+            kind = message.get("type")
+            if kind == "change":
+                changes.append(message)
+            elif kind == "heartbeat":
+                self.primary_seq = message["seq"]
+            elif kind == "snapshot":
+                self._apply(changes)
+                changes = []
+                self._restore(message)
+            elif kind == "resume":
+                if message["stream_id"] != self.stream_id or message["seq"] != self.seq:
+                    raise ReplicationError(f"Primary resumed at {message['seq']} of stream {message['stream_id']}; this standby is at {self.seq} of {self.stream_id}.")
+            else:
+                raise ReplicationError(f"Unexpected message from the primary: {kind}")
+        self._apply(changes)
+
+    def _restore(self, message):
+        """Replaces this store with the primary's snapshot."""
+        start = time.perf_counter()
+        hospital = self.hospital
+        with hospital.transaction():
+            hospital.storage.save(message["data"])
+            hospital.load_data()
+        self.stream_id = message["stream_id"]
+        self.seq = self.primary_seq = message["seq"]
+        self._write_position()
+        self.snapshots += 1
+        logging.info(f"Standby restored a snapshot of stream {self.stream_id} at change {self.seq} in {time.perf_counter() - start:.2f}s")
+
+    def _apply(self, messages):
+        if not messages:
+            return
+        start = time.perf_counter()
+        hospital = self.hospital
+        applied = self.seq
+        with hospital.batch():
+            for message in messages:
+                seq = message["seq"]
+                if seq <= applied:
+                    continue  #! sent again after a reconnect
+                if seq != applied + 1:
+                    raise ReplicationError(f"Change {seq} arrived after change {applied}; the stream has a gap.")
+                change = message["change"]
+                if not (change["op"] == "book_appointment" and self._holds(change["appointment"].get("id"))):
+                    hospital.apply_change(change)
+                applied = seq
+        self.seq = applied  #! only once the batch is persisted
+        self._write_position()
+        now = time.time()
+        self.apply_seconds += time.perf_counter() - start
+        self.applied += len(messages)
+        self.batches += 1
+        self.primary_seq = max(self.primary_seq, self.seq)
+        for message in messages:
+            ns = max(int((now - message["ts"]) * 1e9), 0)
+            self.lag.add(ns)
+            if METRICS.enabled:
+                METRICS.record("replication.lag", ns)
+        METRICS.count("replication.applied", len(messages))
+
+    def _holds(self, appointment_id):
+        return appointment_id in self.hospital.appointment or appointment_id in self.hospital.cancelled
+
+    def status(self):
+        return {"primary": "%s:%s" % self.address, "connected": self.connected, "stream_id": self.stream_id,
+                "seq": self.seq, "primary_seq": self.primary_seq, "behind": max(self.primary_seq - self.seq, 0),
+                "applied": self.applied, "batches": self.batches, "snapshots": self.snapshots,
+                "apply_per_s": round(self.applied / self.apply_seconds, 1) if self.apply_seconds else None,
+                "lag_p50_ms": round(self.lag.percentile(0.50) / 1e6, 3), "lag_p95_ms": round(self.lag.percentile(0.95) / 1e6, 3),
+                "lag_p99_ms": round(self.lag.percentile(0.99) / 1e6, 3), "lag_max_ms": round(self.lag.max / 1e6, 3)}
@@ -0,0 +1,232 @@
+from array import array
+from collections import Counter
+from hospital import BOOKED, NO_SHOW, CANCELLED
+from scheduler import day_number, day_string
+
+try:
+    import numpy
+except ImportError:  #! optional; the pure-Python columns give the same results, only slower
+    numpy = None
+
+STATUS_CODES = {BOOKED: 0, NO_SHOW: 1, CANCELLED: 2}
+AGE_GROUPS = (("0-17", 0, 17), ("18-39", 18, 39), ("40-64", 40, 64), ("65+", 65, 200))
+
+#? ####################################################
+#? Column operations - NumPy or plain Python
+#? ####################################################
+
+class NumpyColumns:
+    """Grouped aggregates over integer columns with NumPy (one pass in C per aggregate)."""
+    @staticmethod
+    def column(values):
+        return numpy.frombuffer(values, dtype=numpy.int32) if len(values) else numpy.zeros(0, dtype=numpy.int32)
+
+    @staticmethod
+    def select(mask, *columns):
+        return [column[mask] for column in columns]
+
+    @staticmethod
+    def between(column, lo, hi):
+        return (column >= lo) & (column <= hi)
+
+    @staticmethod
+    def differs(column, value):
+        return column != value
+
+    @staticmethod
+    def count(codes, size):
+        return numpy.bincount(codes, minlength=size).tolist()
+
+    @staticmethod
+    def total(codes, values, size):
+        return numpy.bincount(codes, weights=values, minlength=size).tolist()
+
+    @staticmethod
+    def count_pairs(first, second):
+        """{(a, b): rows} for the distinct (first, second) pairs, in sorted order."""
+        keys = first.astype(numpy.int64) << 32 | second.astype(numpy.int64)
+        unique, counts = numpy.unique(keys, return_counts=True)
+        return dict(zip(zip((unique >> 32).tolist(), (unique & 0xFFFFFFFF).tolist()), counts.tolist()))
+
+class PythonColumns:
+    """The same operations over array('i') columns, for installs without NumPy."""
+    @staticmethod
+    def column(values):
+        return values
+
+    @staticmethod
+    def select(mask, *columns):
+        return [array("i", (value for value, keep in zip(column, mask) if keep)) for column in columns]
+
+    @staticmethod
+    def between(column, lo, hi):
+        return [lo <= value <= hi for value in column]
+
+    @staticmethod
+    def differs(column, value):
+        return [item != value for item in column]
+
+    @staticmethod
+    def count(codes, size):
+        counts = [0] * size
+        for code, n in Counter(codes).items():
+            counts[code] = n
+        return counts
+
+    @staticmethod
+    def total(codes, values, size):
+        totals = [0.0] * size
+        for code, value in zip(codes, values):
+            totals[code] += value
+        return totals
+
+    @staticmethod
+    def count_pairs(first, second):
+        return dict(sorted(Counter(zip(first, second)).items()))
+
+#? ####################################################
+#? Start ReportSnapshot Class - columnar copy of records
+#? ####################################################
+
+class ReportSnapshot:
+    """
+    Copies the records once into typed integer columns (categorical fields become codes
+    into small lookup lists), so each report is a handful of grouped aggregates over
+    whole columns instead of a Python loop over objects.
+    Archived appointments are included only from `history_start` (YYYY-MM-DD) to `history_end`.
+    """
+    def __init__(self, hospital, use_numpy=None, history_start=None, history_end=None):
+        use_numpy = numpy is not None and use_numpy is not False
+        self.ops = NumpyColumns if use_numpy else PythonColumns
+
+        self.specializations, specialization_code = [], {}
+        self.doctor_ids, self.doctor_names, doctor_code = [], {}, {}
+        with hospital.lock.read():
+            for doctor_id, doctor in hospital.doctor.items():
+                key = doctor.specialization.strip().lower()
+                specialization_code.setdefault(key, len(specialization_code))
+                doctor_code[doctor] = len(self.doctor_ids)  #! keyed by object: no get_doctor_id() call per row
+                self.doctor_ids.append(doctor_id)
+                self.doctor_names[doctor_id] = doctor.name
+            self.specializations = list(specialization_code)
+            doctor_specialization = [specialization_code[doctor.specialization.strip().lower()] for doctor in doctor_code]
+
+            archived = hospital.archived_appointments(history_start, history_end, include_cancelled=True) if hospital.reaches_archive(history_start) else ()
+            appointments = [a for a in (*archived, *hospital.appointment.values(), *hospital.cancelled.values()) if a.doctor in doctor_code]
+            #! categorical values are converted once per distinct value, not once per row
+            days = {date: day_number(date) for date in {a.date for a in appointments}}
+            appointment_doctor = [doctor_code[a.doctor] for a in appointments]
+            appointment_day = [days[a.date] for a in appointments]
+            appointment_status = [STATUS_CODES[a.status] for a in appointments]
+
+            if hospital.storage.lazy:  #! lazy backends only hold looked-up patients in memory
+                rows = list(hospital.storage.all_patients())
+                patient_age = [int(p["age"]) for p in rows]
+                raw_diseases = [p["disease"] for p in rows]
+            else:
+                patient_age = [p.age for p in hospital.patient.values()]
+                raw_diseases = [p.disaese for p in hospital.patient.values()]
+        disease_code = {}
+        raw_code = {raw: disease_code.setdefault(str(raw).strip().lower(), len(disease_code)) for raw in dict.fromkeys(raw_diseases)}
+        self.diseases = list(disease_code)
+        patient_disease = [raw_code[raw] for raw in raw_diseases]
+
+        column = self.ops.column
+        self.doctor_specialization = column(array("i", doctor_specialization))
+        self.appointment_doctor = column(array("i", appointment_doctor))
+        self.appointment_day = column(array("i", appointment_day))
+        self.appointment_status = column(array("i", appointment_status))
+        self.patient_age = column(array("i", patient_age))
+        self.patient_disease = column(array("i", patient_disease))
+
+    def _appointments(self, start=None, end=None):
+        """(doctor codes, days, statuses) of the appointments between start and end (inclusive)."""
+        columns = (self.appointment_doctor, self.appointment_day, self.appointment_status)
+        if start is None and end is None:
+            return columns
+        lo = day_number(start) if start else -1
+        hi = day_number(end) if end else 1 << 30
+        return self.ops.select(self.ops.between(self.appointment_day, lo, hi), *columns)
+
+    def _active(self, doctors, days, statuses):
+        """Drops the cancelled rows."""
+        return self.ops.select(self.ops.differs(statuses, STATUS_CODES[CANCELLED]), doctors, days)
+
+    #? --- Reports (each returns a list of row dicts) ---
+    def appointments_per_doctor_day(self, start=None, end=None):
+        """Appointments (not cancelled) per doctor per day."""
+        doctors, days = self._active(*self._appointments(start, end))
+        pairs = self.ops.count_pairs(days, doctors)
+        labels = {day: day_string(day) for day in {day for day, _ in pairs}}
+        return [{"doctor_id": self.doctor_ids[doctor], "doctor": self.doctor_names[self.doctor_ids[doctor]],
+                 "date": labels[day], "appointments": count}
+                for (day, doctor), count in pairs.items()]
+
+    def specialization_load(self, start=None, end=None):
+        """Doctors, appointments (not cancelled) and appointments per doctor, per specialization."""
+        doctors, _ = self._active(*self._appointments(start, end))
+        size = len(self.specializations)
+        per_doctor = self.ops.count(doctors, len(self.doctor_ids))
+        appointments = self.ops.total(self.doctor_specialization, self.ops.column(array("i", per_doctor)), size)
+        staff = self.ops.count(self.doctor_specialization, size)
+        return [{"specialization": name, "doctors": staff[code], "appointments": int(appointments[code]),
+                 "per_doctor": round(appointments[code] / staff[code], 2)}
+                for code, name in sorted(enumerate(self.specializations), key=lambda item: -appointments[item[0]])]
+
+    def age_distribution(self):
+        """Patients per disease with mean/min/max age and counts per age group."""
+        #! one grouped count over (disease, age); ages take ~100 values, so the rest is a small loop
+        histogram = self.ops.count_pairs(self.patient_disease, self.patient_age)
+        rows = [{"disease": name, "patients": 0, "mean_age": 0, "min_age": None, "max_age": None,
+                 **{label: 0 for label, _, _ in AGE_GROUPS}} for name in self.diseases]
+        for (code, age), count in histogram.items():  #! sorted by age within each disease
+            row = rows[code]
+            row["patients"] += count
+            row["mean_age"] += age * count
+            row["min_age"] = age if row["min_age"] is None else row["min_age"]
+            row["max_age"] = age
+            row[next(label for label, lo, hi in AGE_GROUPS if lo <= age <= hi)] += count
+        for row in rows:
+            row["mean_age"] = round(row["mean_age"] / row["patients"], 1)
+        return sorted(rows, key=lambda row: -row["patients"])
+
+    def attendance(self, start=None, end=None):
+        """Bookings, cancellations and no-shows with their rates, per specialization and overall."""
+        doctors, _, statuses = self._appointments(start, end)
+        size = len(self.specializations)
+        #! one grouped count over (doctor, status), then folded into specializations
+        per_doctor = self.ops.count_pairs(doctors, statuses)
+        totals = [[0, 0, 0] for _ in range(size)]
+        for (doctor, status), count in per_doctor.items():
+            totals[int(self.doctor_specialization[doctor])][status] += count
+        rows = [self._attendance_row(name, *totals[code]) for code, name in enumerate(self.specializations)]
+        rows.sort(key=lambda row: -row["booked"])
+        rows.append(self._attendance_row("(all)", *(map(sum, zip(*totals)) if totals else (0, 0, 0))))
+        return rows
+
+    @staticmethod
+    def _attendance_row(name, kept, no_shows, cancelled):
+        booked = kept + no_shows + cancelled
+        return {"specialization": name, "booked": booked, "cancelled": cancelled, "no_shows": no_shows,
+                "cancel_rate": round(cancelled / booked, 3) if booked else 0.0,
+                "no_show_rate": round(no_shows / (kept + no_shows), 3) if kept + no_shows else 0.0}
+
+REPORTS = {
+    "doctor_days": ("Appointments per doctor per day", ReportSnapshot.appointments_per_doctor_day, True),
+    "specializations": ("Load per specialization", ReportSnapshot.specialization_load, True),
+    "ages": ("Patient age distribution per disease", ReportSnapshot.age_distribution, False),
+    "attendance": ("Cancellation and no-show rates", ReportSnapshot.attendance, True),
+}
+
+def build_reports(hospital, start=None, end=None, kinds=None, use_numpy=None):
+    """
+    Returns {report name: (title, rows)} computed from one snapshot; `kinds` limits which reports run.
+    Archived months are included when start falls in them.
+    """
+    snapshot = ReportSnapshot(hospital, use_numpy, start, end)
+    results = {}
+    for name, (title, report, dated) in REPORTS.items():
+        if kinds and name not in kinds:
+            continue
+        results[name] = (title, report(snapshot, start, end) if dated else report(snapshot))
+    return results
@@ -0,0 +1,211 @@
+import heapq
+import datetime
+from bisect import bisect_right
+from hospital import date_key
+
+def to_minutes(time):
+    """'HH:MM' (or 'H:MM') -> minutes since midnight."""
+    hours, minutes = time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def to_clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def day_number(date):
+    """YYYY-M-D date string -> proleptic ordinal, so consecutive days are consecutive integers."""
+    return datetime.date.fromisoformat(date_key(date)).toordinal()
+
+def day_string(day):
+    return datetime.date.fromordinal(day).isoformat()
+
+#? ####################################################
+#? Start DoctorSchedule Class - one doctor's booked slots
+#? ####################################################
+
+class DoctorSchedule:
+    """
+    A doctor's slot grid (working hours cut into slot_minutes pieces) plus the slots taken per day.
+    Runs of consecutive fully booked days are kept as sorted [start, end] lists, so a search
+    jumps over any stretch of full days with one bisect.
+    """
+    __slots__ = ("first", "last", "step", "capacity", "booked", "run_starts", "run_ends")
+
+    def __init__(self, doctor):
+        self.step = doctor.slot_minutes
+        self.first = to_minutes(doctor.work_start)
+        self.last = to_minutes(doctor.work_end) - self.step  #! start of the last slot that ends in working hours
+        self.capacity = max(0, (self.last - self.first) // self.step + 1)
+        self.booked = {}  # day -> set of booked slot starts (minutes)
+        self.run_starts = []  # first day of each run of fully booked days, sorted
+        self.run_ends = []  # last day of the same run
+
+    def is_slot(self, minute):
+        return self.first <= minute <= self.last and (minute - self.first) % self.step == 0
+
+    def align(self, minute):
+        """Start of the first slot at or after `minute`."""
+        if minute <= self.first:
+            return self.first
+        return self.first - (self.first - minute) // self.step * self.step
+
+    def _is_full(self, day):
+        return sum(1 for minute in self.booked.get(day, ()) if self.is_slot(minute)) >= self.capacity
+
+    def book(self, day, minute):
+        self.booked.setdefault(day, set()).add(minute)
+        if self._is_full(day):
+            self._mark_full(day)
+
+    def release(self, day, minute):
+        taken = self.booked.get(day)
+        if taken is None:
+            return
+        taken.discard(minute)
+        if not taken:
+            del self.booked[day]
+        self._unmark_full(day)
+
+    def open_day(self, day):
+        """First day on or after `day` that is not fully booked."""
+        i = bisect_right(self.run_starts, day) - 1
+        return self.run_ends[i] + 1 if i >= 0 and self.run_ends[i] >= day else day
+
+    def _mark_full(self, day):
+        starts, ends = self.run_starts, self.run_ends
+        i = bisect_right(starts, day) - 1
+        if i >= 0 and ends[i] >= day:
+            return
+        joins_left = i >= 0 and ends[i] == day - 1
+        joins_right = i + 1 < len(starts) and starts[i + 1] == day + 1
+        if joins_left and joins_right:
+            ends[i] = ends[i + 1]
+            del starts[i + 1], ends[i + 1]
+        elif joins_left:
+            ends[i] = day
+        elif joins_right:
+            starts[i + 1] = day
+        else:
+            starts.insert(i + 1, day)
+            ends.insert(i + 1, day)
+
+    def _unmark_full(self, day):
+        starts, ends = self.run_starts, self.run_ends
+        i = bisect_right(starts, day) - 1
+        if i < 0 or ends[i] < day:
+            return
+        start, end = starts[i], ends[i]
+        if start == end:
+            del starts[i], ends[i]
+        elif day == start:
+            starts[i] = day + 1
+        elif day == end:
+            ends[i] = day - 1
+        else:
+            ends[i] = day - 1
+            starts.insert(i + 1, day + 1)
+            ends.insert(i + 1, end)
+
+    def earliest(self, day, minute=0):
+        """First free (day, minute) at or after `minute` on `day`, or None if the doctor has no slots."""
+        if not self.capacity:
+            return None
+        if self.open_day(day) == day:
+            taken = self.booked.get(day, ())
+            for start in range(self.align(minute), self.last + 1, self.step):
+                if start not in taken:
+                    return day, start
+            day += 1
+        #! a day that is not fully booked has a free slot
+        day = self.open_day(day)
+        taken = self.booked.get(day, ())
+        return day, next(start for start in range(self.first, self.last + 1, self.step) if start not in taken)
+
+#? ####################################################
+#? Start Scheduler Class - availability across doctors
+#? ####################################################
+
+class Scheduler:
+    """
+    Per-doctor slot schedules plus doctors grouped by specialization.
+    Appointments without a time (booked before slots existed) do not occupy a slot.
+    """
+    def __init__(self):
+        self.schedules = {}  # doctor_id -> DoctorSchedule
+        self.specialization_of = {}  # doctor_id -> specialization key
+        self.by_specialization = {}  # specialization key -> set of doctor ids
+
+    @staticmethod
+    def _key(specialization):
+        return specialization.strip().lower()
+
+    def add_doctor(self, doctor):
+        """Registers a doctor, or refreshes one whose hours or specialization changed (bookings are kept)."""
+        doctor_id = doctor.get_doctor_id()
+        old = self.schedules.get(doctor_id)
+        self.remove_doctor(doctor_id)
+        schedule = DoctorSchedule(doctor)
+        if old:
+            schedule.booked = old.booked
+            for day in sorted(old.booked):
+                if schedule._is_full(day):
+                    schedule._mark_full(day)
+        self.schedules[doctor_id] = schedule
+        key = self._key(doctor.specialization)
+        self.specialization_of[doctor_id] = key
+        self.by_specialization.setdefault(key, set()).add(doctor_id)
+
+    def remove_doctor(self, doctor_id):
+        self.schedules.pop(doctor_id, None)
+        key = self.specialization_of.pop(doctor_id, None)
+        if key is not None:
+            doctors = self.by_specialization[key]
+            doctors.discard(doctor_id)
+            if not doctors:
+                del self.by_specialization[key]
+
+    def book(self, appointment):
+        schedule = self.schedules.get(appointment.doctor.get_doctor_id())
+        if schedule and appointment.time:
+            schedule.book(day_number(appointment.date), to_minutes(appointment.time))
+
+    def release(self, appointment):
+        schedule = self.schedules.get(appointment.doctor.get_doctor_id())
+        if schedule and appointment.time:
+            schedule.release(day_number(appointment.date), to_minutes(appointment.time))
+
+    def is_free(self, doctor_id, date, time):
+        """Whether `time` starts one of the doctor's slots on `date` and nobody has booked it."""
+        schedule = self.schedules.get(doctor_id)
+        minute = to_minutes(time)
+        return bool(schedule) and schedule.is_slot(minute) and minute not in schedule.booked.get(day_number(date), ())
+
+    def earliest_for(self, doctor_id, date, time=None):
+        """(date, time) of the doctor's first free slot at or after date/time, or None."""
+        schedule = self.schedules.get(doctor_id)
+        slot = schedule and schedule.earliest(day_number(date), to_minutes(time) if time else 0)
+        return (day_string(slot[0]), to_clock(slot[1])) if slot else None
+
+    def earliest(self, specialization, date, time=None):
+        """
+        (doctor_id, date, time) of the first free slot at or after date/time among the doctors
+        of this specialization, or None. Best-first: each doctor starts at an optimistic bound
+        (their next grid slot, past any fully booked days), and a doctor's slots are only
+        searched while that bound could still beat the best slot found.
+        """
+        day, minute = day_number(date), to_minutes(time) if time else 0
+        heap = []
+        for doctor_id in self.by_specialization.get(self._key(specialization), ()):
+            schedule = self.schedules[doctor_id]
+            if not schedule.capacity:
+                continue
+            start = schedule.align(minute)
+            bound_day = schedule.open_day(day if start <= schedule.last else day + 1)
+            heap.append((bound_day, start if bound_day == day else schedule.first, 1, doctor_id))  #! 1 = bound, 0 = actual free slot
+        heapq.heapify(heap)
+        while heap:
+            slot_day, slot_minute, is_bound, doctor_id = heapq.heappop(heap)
+            if not is_bound:
+                return doctor_id, day_string(slot_day), to_clock(slot_minute)
+            slot = self.schedules[doctor_id].earliest(day, minute)
+            heapq.heappush(heap, (*slot, 0, doctor_id))
+        return None
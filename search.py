@@ -0,0 +1,181 @@
+import re
+import heapq
+from itertools import islice
+from bisect import bisect_left, insort
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+#! score multipliers per kind of match
+EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+MAX_EXPANSIONS = 50  #! vocabulary terms tried per query token for prefix/fuzzy matches
+MAX_CANDIDATES = 1000  #! records scored per query at most, however common its words are
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+def trigrams(term):
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, limit):
+    """
+    Edit distance between a and b counting a swap of adjacent letters as one edit,
+    or limit + 1 as soon as it is known to exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+#? ####################################################
+#? Start SearchIndex Class - inverted index over fields
+#? ####################################################
+
+class SearchIndex:
+    """
+    In-memory inverted index over some text fields of records keyed by ID.
+    Queries match each word exactly, as a prefix of an indexed word, or within a
+    small edit distance (typos), and rank records by field weight and match quality.
+
+    The work per query is bounded: postings are kept grouped by field weight, so each
+    word's best matches are read first (rarest word first), every record read is scored
+    against the whole query at once, and reading stops as soon as no unread record can
+    beat the current top `limit`, or after MAX_CANDIDATES records.
+    """
+    def __init__(self, weights):
+        self.weights = weights  #! field name -> weight, e.g. {"name": 2.0, "disease": 1.0}
+        self.postings = {}  # term -> {weight: set of record_ids}
+        self.record_terms = {}  # record_id -> {term: weight}, for removal and for scoring candidates
+        self.vocabulary = []  # sorted terms, for prefix lookups
+        self.grams = {}  # trigram -> set of terms, for typo-tolerant lookups
+
+    def __len__(self):
+        return len(self.record_terms)
+
+    def add(self, record_id, fields):
+        """Indexes `fields` (field name -> text) under record_id, replacing any previous entry."""
+        self.remove(record_id)
+        terms = {}
+        for field, weight in self.weights.items():
+            for term in tokenize(fields.get(field, "")):
+                terms[term] = max(terms.get(term, 0), weight)
+        for term, weight in terms.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                insort(self.vocabulary, term)
+                for gram in trigrams(term):
+                    self.grams.setdefault(gram, set()).add(term)
+            self.postings[term].setdefault(weight, set()).add(record_id)
+        self.record_terms[record_id] = terms
+
+    def remove(self, record_id):
+        for term, weight in self.record_terms.pop(record_id, {}).items():
+            posting = self.postings[term]
+            posting[weight].discard(record_id)
+            if not posting[weight]:
+                del posting[weight]
+            if not posting:
+                del self.postings[term]
+                del self.vocabulary[bisect_left(self.vocabulary, term)]
+                for gram in trigrams(term):
+                    terms = self.grams[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.grams[gram]
+
+    def _best_group(self, word):
+        """The records with a word's best-scoring match."""
+        _, term, weight = word[1][0]
+        return self.postings[term][weight]
+
+    def _expand(self, token):
+        """Yields (term, match multiplier) for the vocabulary terms a query token matches."""
+        if token in self.postings:
+            yield token, EXACT
+        start = bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            if term != token:
+                yield term, PREFIX
+        #! typo matching only when the word itself is unknown
+        if len(token) < 3 or token in self.postings:
+            return
+        limit = 1 if len(token) <= 5 else 2
+        counts = {}
+        for gram in trigrams(token):
+            for term in self.grams.get(gram, ()):
+                counts[term] = counts.get(term, 0) + 1
+        for term in heapq.nlargest(MAX_EXPANSIONS, counts, key=counts.get):
+            if term != token and not term.startswith(token):
+                distance = edit_distance(token, term, limit)
+                if distance <= limit:
+                    yield term, FUZZY / distance
+
+    def search(self, text, limit=10):
+        """Returns up to `limit` (record_id, score) pairs, best first."""
+        words = []
+        for token in set(tokenize(text)):
+            multipliers = dict(self._expand(token))
+            #! (score, term, weight) for each group of postings, best first
+            groups = sorted(((weight * multiplier, term, weight) for term, multiplier in multipliers.items()
+                             for weight in self.postings[term]), reverse=True)
+            if groups:
+                words.append((multipliers, groups))
+        #! the word with the fewest best matches leads: the records it reads first are the likeliest to match everything
+        words.sort(key=lambda word: len(self._best_group(word)))
+        scores, top, floor = {}, [], 0  #! top: min-heap of the best `limit` scores; floor: its lowest once full
+        if len(words) > 1:
+            #! records in every word's best group score the most a record can; find them first, at C speed
+            matches = islice(self._best_group(words[0]), 10 * MAX_CANDIDATES)
+            for word in words[1:]:
+                matches = filter(self._best_group(word).__contains__, matches)
+            most = sum(groups[0][0] for _, groups in words)
+            for record_id in islice(matches, limit):
+                scores[record_id] = most
+                top.append(most)
+            if len(top) == limit:
+                floor = most
+        for i, (_, groups) in enumerate(words):
+            others = [multipliers for j, (multipliers, _) in enumerate(words) if j != i]
+            #! a record not read yet has none of the earlier words, so it scores at most this much
+            rest = sum(later[0][0] for _, later in words[i + 1:])
+            for score, term, weight in groups:
+                bound = score + rest
+                if floor >= bound or len(scores) >= MAX_CANDIDATES:
+                    break
+                for record_id in self.postings[term][weight]:
+                    if record_id in scores:
+                        continue
+                    #! first read in its best group for this word, so `score` is that match; add its best match of each other word
+                    total = score
+                    terms = self.record_terms[record_id]
+                    for multipliers in others:
+                        best = 0
+                        for other, other_weight in terms.items():
+                            if other in multipliers and other_weight * multipliers[other] > best:
+                                best = other_weight * multipliers[other]
+                        total += best
+                    scores[record_id] = total
+                    if total > floor:
+                        if len(top) < limit:
+                            heapq.heappush(top, total)
+                        else:
+                            heapq.heapreplace(top, total)
+                        if len(top) == limit:
+                            floor = top[0]
+                            if floor >= bound:
+                                break
+                    if len(scores) >= MAX_CANDIDATES:
+                        break
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
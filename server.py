@@ -0,0 +1,330 @@
+import re
+import json
+import logging
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from hospital import Patient, Doctor
+from hospital import WORK_START, WORK_END, SLOT_MINUTES
+from scheduler import to_minutes, to_clock
+from metrics import METRICS
+from exceptions.exceptions import InvalidAgeError, InvalidGenderError, InvalidDateError, AppointmentConflictError, InvalidScheduleError, ReferentialIntegrityError
+from exceptions.main import validate_gender, validate_doctor_age, validate_patient_age, validate_date, validate_time, validate_working_hours, whole_number
+
+ANSI = re.compile(r"\x1b\[[0-9;]*m")
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def plain(error):
+    """Error message without the terminal color codes used by the CLI."""
+    return ANSI.sub("", str(error))
+
+#? ####################################################
+#? Start HospitalAPI Class - JSON operations over HTTP
+#? ####################################################
+
+class HospitalAPI:
+    """
+    Maps (method, path, JSON body) onto HospitalManager calls.
+    GET requests run concurrently under the manager's read lock; every other request
+    runs as one manager transaction, so its checks and changes cannot interleave with another's.
+    """
+    def __init__(self, hospital):
+        self.hospital = hospital
+        self.routes = [
+            ("GET", re.compile(r"^/patients/(\d+)$"), self.get_patient),
+            ("POST", re.compile(r"^/patients$"), self.add_patient),
+            ("PATCH", re.compile(r"^/patients/(\d+)$"), self.update_patient),
+            ("DELETE", re.compile(r"^/patients/(\d+)$"), self.delete_patient),
+            ("POST", re.compile(r"^/patients/delete$"), self.delete_patients),
+            ("GET", re.compile(r"^/doctors/(\d+)$"), self.get_doctor),
+            ("POST", re.compile(r"^/doctors$"), self.add_doctor),
+            ("PATCH", re.compile(r"^/doctors/(\d+)$"), self.update_doctor),
+            ("DELETE", re.compile(r"^/doctors/(\d+)$"), self.delete_doctor),
+            ("POST", re.compile(r"^/doctors/delete$"), self.delete_doctors),
+            ("GET", re.compile(r"^/appointments$"), self.list_appointments),
+            ("POST", re.compile(r"^/appointments$"), self.book_appointment),
+            ("DELETE", re.compile(r"^/appointments/(\d+)$"), self.cancel_appointment),
+            ("POST", re.compile(r"^/appointments/(\d+)/no-show$"), self.mark_no_show),
+            ("GET", re.compile(r"^/slots$"), self.earliest_slot),
+            ("GET", re.compile(r"^/reports$"), self.reports),
+            ("GET", re.compile(r"^/metrics$"), self.metrics),
+        ]
+
+    def dispatch(self, method, url, body):
+        """Returns (HTTP status, JSON-serializable payload)."""
+        parts = urlsplit(url)
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                try:
+                    with METRICS.timer(f"http.{handler.__name__}"), \
+                         self.hospital.lock.read() if method == "GET" else self.hospital.transaction():
+                        return handler(*map(int, match.groups()), body=body, query=query)
+                except APIError as e:
+                    return e.status, {"error": str(e)}
+                except (InvalidAgeError, InvalidGenderError, InvalidDateError, InvalidScheduleError, KeyError, ValueError, TypeError) as e:
+                    return 400, {"error": plain(e)}
+                except (AppointmentConflictError, ReferentialIntegrityError) as e:
+                    return 409, {"error": plain(e)}
+                except Exception as e:
+                    #! e.g. CorruptDataError from reloading the store, or a database error: still answer the request
+                    logging.exception(f"{method} {parts.path} failed")
+                    return 500, {"error": f"Internal error ({type(e).__name__}): {plain(e)}"}
+        return 404, {"error": f"No route for {method} {parts.path}"}
+
+    #? --- Patients ---
+    def get_patient(self, patient_id, body, query):
+        return 200, self.hospital.patient_record(self._patient(patient_id))
+
+    def add_patient(self, body, query):
+        age, patient_id = self._whole_number(body["age"], "age"), self._whole_number(body["id"], "id")
+        validate_patient_age(age)
+        validate_gender(body["gender"])
+        if self.hospital.search_patient_by_id(patient_id):
+            raise APIError(409, f"Patient with ID {patient_id} already exists!")
+        patient = Patient(body["name"].lower().strip(), age, body["gender"], patient_id, body["disease"])
+        self.hospital.add_patient(patient)
+        return 201, self.hospital.patient_record(patient)
+
+    def update_patient(self, patient_id, body, query):
+        self._patient(patient_id)
+        fields = self._fields(body, ("name", "age", "gender", "disease"))
+        if "age" in fields:
+            validate_patient_age(fields["age"])
+        if "gender" in fields:
+            validate_gender(fields["gender"])
+        return 200, self.hospital.patient_record(self.hospital.update_patient(patient_id, **fields))
+
+    def delete_patient(self, patient_id, body, query):
+        """409 while the patient has appointments, unless ?cascade=true deletes them too."""
+        self._patient(patient_id)
+        self.hospital.remove_patient(patient_id, cascade=self._cascade(query))
+        return 200, {"deleted": patient_id}
+
+    def delete_patients(self, body, query):
+        """Bulk delete: {"ids": [...], "cascade": false}; all or nothing, unknown IDs are ignored."""
+        removed = self.hospital.remove_patients(map(int, body["ids"]), cascade=bool(body.get("cascade")))
+        return 200, {"deleted": [patient.get_patient_id() for patient in removed]}
+
+    #? --- Doctors ---
+    def get_doctor(self, doctor_id, body, query):
+        return 200, self.hospital.doctor_record(self._doctor(doctor_id))
+
+    def add_doctor(self, body, query):
+        age, doctor_id = self._whole_number(body["age"], "age"), self._whole_number(body["id"], "id")
+        validate_doctor_age(age)
+        validate_gender(body["gender"])
+        if self.hospital.search_doctor_by_id(doctor_id):
+            raise APIError(409, f"Doctor with ID {doctor_id} already exists!")
+        hours = self._working_hours(body, WORK_START, WORK_END, SLOT_MINUTES)
+        doctor = Doctor(body["name"].lower().strip(), age, body["gender"], doctor_id, body["specialization"], *hours)
+        self.hospital.add_doctor(doctor)
+        return 201, self.hospital.doctor_record(doctor)
+
+    def update_doctor(self, doctor_id, body, query):
+        doctor = self._doctor(doctor_id)
+        fields = self._fields(body, ("name", "age", "gender", "specialization"), ("work_start", "work_end", "slot_minutes"))
+        if "age" in fields:
+            validate_doctor_age(fields["age"])
+        if "gender" in fields:
+            validate_gender(fields["gender"])
+        if any(key in body for key in ("work_start", "work_end", "slot_minutes")):
+            hours = self._working_hours(body, doctor.work_start, doctor.work_end, doctor.slot_minutes)
+            fields.update(zip(("work_start", "work_end", "slot_minutes"), hours))
+        return 200, self.hospital.doctor_record(self.hospital.update_doctor(doctor_id, **fields))
+
+    def delete_doctor(self, doctor_id, body, query):
+        """409 while the doctor has appointments, unless ?cascade=true deletes them too."""
+        self._doctor(doctor_id)
+        self.hospital.remove_doctor(doctor_id, cascade=self._cascade(query))
+        return 200, {"deleted": doctor_id}
+
+    def delete_doctors(self, body, query):
+        """Bulk delete: {"ids": [...], "cascade": false}; all or nothing, unknown IDs are ignored."""
+        removed = self.hospital.remove_doctors(map(int, body["ids"]), cascade=bool(body.get("cascade")))
+        return 200, {"deleted": [doctor.get_doctor_id() for doctor in removed]}
+
+    #? --- Appointments ---
+    def list_appointments(self, body, query):
+        filters = {key: int(query[key]) for key in ("doctor_id", "patient_id") if key in query}
+        for key in ("start", "end"):
+            if key in query:
+                validate_date(query[key])
+                filters[key] = query[key]
+        page, page_size = int(query.get("page", 1)), min(int(query.get("page_size", 20)), 500)
+        rows, has_more = self.hospital.page_appointments(page, page_size, **filters)
+        return 200, {"page": page, "has_more": has_more, "appointments": [self.hospital.appointment_record(a) for a in rows]}
+
+    def book_appointment(self, body, query):
+        """Books with `doctor_id` (at `time`, or that day's first free slot) or with the first free doctor of `specialization`."""
+        validate_date(body["date"])
+        patient = self._patient(int(body["patient_id"]))
+        date, time = body["date"], self._time(body.get("time"))
+        if "doctor_id" in body:
+            doctor = self._doctor(int(body["doctor_id"]))
+        else:
+            doctor, date, time = self._earliest(body["specialization"], date, time)
+        appointment = self.hospital.book_appointment(date, patient, doctor, time=time)
+        return 201, self.hospital.appointment_record(appointment)
+
+    def cancel_appointment(self, appointment_id, body, query):
+        if not self.hospital.cancel_appointment(appointment_id):
+            raise APIError(404, f"Appointment with ID {appointment_id} not found!")
+        return 200, {"cancelled": appointment_id}
+
+    def mark_no_show(self, appointment_id, body, query):
+        if not self.hospital.mark_no_show(appointment_id):
+            raise APIError(404, f"Appointment with ID {appointment_id} not found!")
+        return 200, {"no_show": appointment_id}
+
+    def reports(self, body, query):
+        from reports import build_reports
+        for key in ("start", "end"):
+            if key in query:
+                validate_date(query[key])
+        kinds = query["only"].split(",") if "only" in query else None
+        reports = build_reports(self.hospital, query.get("start"), query.get("end"), kinds)
+        return 200, {name: rows for name, (_, rows) in reports.items()}
+
+    def metrics(self, body, query):
+        """Operation latencies and counters (see metrics.py); empty unless metrics are enabled."""
+        return 200, METRICS.snapshot()
+
+    def earliest_slot(self, body, query):
+        """First free slot at or after date/time, for one doctor (`doctor_id`) or a whole `specialization`."""
+        validate_date(query["date"])
+        time = self._time(query.get("time"))
+        if "doctor_id" in query:
+            doctor = self._doctor(int(query["doctor_id"]))
+            slot = self.hospital.next_free_slot(doctor.get_doctor_id(), query["date"], time)
+            if not slot:
+                raise APIError(404, f"No free slot with doctor {doctor.get_doctor_id()} on or after {query['date']}!")
+            date, time = slot
+        else:
+            doctor, date, time = self._earliest(query["specialization"], query["date"], time)
+        return 200, {"doctor_id": doctor.get_doctor_id(), "date": date, "time": time}
+
+    def _earliest(self, specialization, date, time):
+        slot = self.hospital.earliest_available(specialization, date, time)
+        if not slot:
+            raise APIError(404, f"No doctor with specialization {specialization}!")
+        return slot
+
+    @staticmethod
+    def _cascade(query):
+        return query.get("cascade", "").lower() in ("1", "true", "yes")
+
+    @staticmethod
+    def _time(time):
+        if time is None:
+            return None
+        validate_time(time)
+        return to_clock(to_minutes(time))
+
+    @staticmethod
+    def _fields(body, allowed, also=()):
+        """
+        PATCH body -> update_* fields, coerced as on add: age to int, name trimmed and lowercased, text must be text.
+        `also` lists further accepted keys that the caller handles itself.
+        Raises:
+            APIError: 400 on an unknown field or a value that is not text.
+            ValueError: if age is not a whole number.
+        """
+        unknown = sorted(set(body) - set(allowed) - set(also))
+        if unknown:
+            raise APIError(400, f"Unknown field(s): {', '.join(unknown)}")
+        fields = {}
+        for key in allowed:
+            if key not in body:
+                continue
+            value = body[key]
+            if key == "age":
+                fields[key] = HospitalAPI._whole_number(value, key)
+            elif not isinstance(value, str) or not value.strip():
+                raise APIError(400, f"{key} must be non-empty text")
+            else:
+                fields[key] = value.lower().strip() if key == "name" else value
+        return fields
+
+    @staticmethod
+    def _whole_number(value, field):
+        """
+        A JSON integer or a string of digits -> int, by the rules of the import validation (exceptions.main.whole_number).
+        Raises:
+            ValueError: if value is not a whole number.
+        """
+        number = whole_number(value)
+        if number is None:
+            raise ValueError(f"{field} must be a whole number, not {value!r}")
+        return number
+
+    @staticmethod
+    def _working_hours(body, work_start, work_end, slot_minutes):
+        hours = (body.get("work_start", work_start), body.get("work_end", work_end), int(body.get("slot_minutes", slot_minutes)))
+        validate_working_hours(*hours)
+        return to_clock(to_minutes(hours[0])), to_clock(to_minutes(hours[1])), hours[2]
+
+    def _patient(self, patient_id):
+        patient = self.hospital.search_patient_by_id(patient_id)
+        if not patient:
+            raise APIError(404, f"Patient with ID {patient_id} not found!")
+        return patient
+
+    def _doctor(self, doctor_id):
+        doctor = self.hospital.search_doctor_by_id(doctor_id)
+        if not doctor:
+            raise APIError(404, f"Doctor with ID {doctor_id} not found!")
+        return doctor
+
+#? ####################################
+#? Start HTTP server
+#? ####################################
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  #! keep-alive, so load generators can reuse connections
+    disable_nagle_algorithm = True  #! headers and body go out in separate writes
+    api = None
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else {}
+        except json.JSONDecodeError:
+            status, payload = 400, {"error": "Request body must be JSON"}
+        else:
+            status, payload = self.api.dispatch(self.command, self.path, body)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        logging.debug(f"{self.address_string()} {format % args}")
+
+def make_server(hospital, host="127.0.0.1", port=8080):
+    """Builds the HTTP server for `hospital`; each connection is handled on its own thread."""
+    handler = type("HospitalRequestHandler", (RequestHandler,), {"api": HospitalAPI(hospital)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve(hospital, host="127.0.0.1", port=8080):
+    """Serves the JSON API until interrupted."""
+    server = make_server(hospital, host, port)
+    print(f"Serving the hospital API on http://{host}:{port} (Ctrl+C to stop)")
+    logging.info(f"API server started on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logging.info("API server stopped")
@@ -0,0 +1,385 @@
+import os
+import re
+import json
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from hospital import Patient, date_key
+from manager import HospitalManager
+from storage import storage_for_path, storage_class_for_path
+from exceptions.exceptions import ShardRoutingError
+
+SHARD_MAP = "data/shards.json"
+KINDS = ("patients", "doctors")
+
+#? ####################################################
+#? Start ShardMap Class - which shard holds what
+#? ####################################################
+
+class ShardMap:
+    """
+    The shards of a network and how records are routed to them. Each shard is a
+    separate store (any backend, by file extension) with, optionally:
+      * "patients" / "doctors": [first, last] - the block of patient / doctor IDs it owns (last may be null: no upper bound)
+      * "specializations": the departments whose doctors it holds
+      * "doctor_ids": the doctors it holds, listed when it has no doctor block (doctors are few, so this stays small)
+    Lookups by ID go to the shard whose block or list holds the ID, or to every
+    shard without a block of that kind; specialization queries go to the shards
+    listing it plus those that list none.
+    """
+    def __init__(self, shards, path=SHARD_MAP):
+        self.path = path
+        self.shards = {}
+        for entry in shards:
+            if entry["name"] in self.shards:
+                raise ShardRoutingError(f"Shard {entry['name']} is listed twice in {path}.")
+            self.shards[entry["name"]] = entry
+        self.ranges = {}  # "patients"/"doctors" -> [(first, last, shard name)] sorted
+        self.unranged = {}  # "patients"/"doctors" -> shards without a block of that kind
+        for kind in KINDS:
+            ranges = sorted((entry[kind][0], entry[kind][1], name) for name, entry in self.shards.items() if entry.get(kind))
+            for (_, last, name), (first, _, following) in zip(ranges, ranges[1:]):
+                if last is None or last >= first:
+                    raise ShardRoutingError(f"The {kind[:-1]} ID blocks of shards {name} and {following} overlap.")
+            self.ranges[kind] = ranges
+            self.unranged[kind] = [name for name, entry in self.shards.items() if not entry.get(kind)]
+        self.range_starts = {kind: [first for first, _, _ in ranges] for kind, ranges in self.ranges.items()}
+        self.doctor_directory = {doctor_id: name for name, entry in self.shards.items() for doctor_id in entry.get("doctor_ids") or ()}
+        self.by_specialization = {}  # specialization key -> shard names
+        self.general = []  #! shards that take any specialization
+        for name, entry in self.shards.items():
+            for specialization in entry.get("specializations") or ():
+                self.by_specialization.setdefault(specialization.strip().lower(), []).append(name)
+            if not entry.get("specializations"):
+                self.general.append(name)
+
+    @classmethod
+    def load(cls, path=SHARD_MAP):
+        """
+        Raises:
+            ShardRoutingError: if there is no shard map at `path`.
+        """
+        try:
+            with open(path) as f:
+                return cls(json.load(f)["shards"], path)
+        except FileNotFoundError:
+            raise ShardRoutingError(f"No shard map at {path}. Create one with: python main.py shards split")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"shards": list(self.shards.values())}, f, indent=4)
+
+    def names(self):
+        return list(self.shards)
+
+    def path_of(self, name):
+        """The shard's data file; relative paths are relative to the shard map."""
+        return os.path.join(os.path.dirname(self.path), self.shards[name]["path"])
+
+    def check(self, name):
+        """
+        Raises:
+            ShardRoutingError: if the map has no shard of that name.
+        """
+        if name not in self.shards:
+            raise ShardRoutingError(f"No shard named {name} in {self.path} (shards: {', '.join(self.shards)}).")
+        return name
+
+    def storage(self, name):
+        path = self.path_of(self.check(name))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return storage_for_path(path)
+
+    def is_lazy(self, name):
+        return storage_class_for_path(self.path_of(name)).lazy
+
+    #? --- Routing ---
+    def owner(self, kind, record_id):
+        """The shard whose block (or doctor list) of `kind` ("patients" or "doctors") IDs holds record_id, or None."""
+        i = bisect_right(self.range_starts[kind], record_id) - 1
+        if i >= 0:
+            _, last, name = self.ranges[kind][i]
+            if last is None or record_id <= last:
+                return name
+        return self.doctor_directory.get(record_id) if kind == "doctors" else None
+
+    def register_doctor(self, doctor_id, name):
+        """Lists a doctor under a shard without a doctor block, so lookups by their ID are routed; saves the map."""
+        if self.owner("doctors", doctor_id) is None:
+            self.shards[name].setdefault("doctor_ids", []).append(doctor_id)
+            self.doctor_directory[doctor_id] = name
+            self.save()
+
+    def shards_for_id(self, kind, record_id):
+        """The shards that may hold the patient or doctor with this ID, in lookup order."""
+        owner = self.owner(kind, record_id)
+        return [owner] if owner else self.unranged[kind]
+
+    def shards_for_specialization(self, specialization):
+        return self.by_specialization.get(specialization.strip().lower(), []) + self.general
+
+    def home_shard(self, kind, record_id, specialization=None):
+        """
+        The one shard a new record goes to: the owner of its ID, else the only shard for its specialization.
+        Raises:
+            ShardRoutingError: if no shard, or more than one, could take it.
+        """
+        owner = self.owner(kind, record_id)
+        if owner:
+            return owner
+        candidates = self.unranged[kind]
+        if specialization is not None:
+            candidates = [name for name in self.shards_for_specialization(specialization) if name in candidates]
+        if len(candidates) != 1:
+            where = "no shard" if not candidates else f"shards {', '.join(candidates)}"
+            raise ShardRoutingError(f"{kind[:-1].title()} ID {record_id} could go to {where}; name the shard to add it to.")
+        return candidates[0]
+
+#? ####################################################
+#? Start ShardedHospital Class - routed queries
+#? ####################################################
+
+def _load_shard(path):
+    """Runs in a worker process: loads one shard and returns the manager (pickled back to the caller)."""
+    return HospitalManager(storage_for_path(path))
+
+class ShardedHospital:
+    """
+    HospitalManager calls routed through a ShardMap. A shard is loaded the first
+    time a call needs it and only loaded shards are saved, so startup and save
+    cost grow with the shards touched, not the network. load() brings several
+    shards up in parallel worker processes.
+    An appointment lives in its doctor's shard; a patient booked with a doctor
+    of another shard is copied there (so queries by patient, and updates to one,
+    go to every shard).
+    """
+    def __init__(self, shard_map=None, workers=None):
+        self.map = shard_map or ShardMap.load()
+        self.workers = workers or os.cpu_count() or 1
+        self.managers = {}  # shard name -> loaded HospitalManager
+        self.lock = threading.Lock()
+
+    def shard(self, name):
+        """The shard's HospitalManager, loaded now if it is not yet."""
+        with self.lock:
+            manager = self.managers.get(name)
+            if manager is None:
+                manager = self.managers[name] = HospitalManager(self.map.storage(name))
+            return manager
+
+    def load(self, names=None, workers=None):
+        """
+        Loads the named shards (default: all) that are not loaded yet. Shards whose whole
+        snapshot is parsed at startup (JSON) are loaded by a pool of worker processes;
+        lazy ones (binary, SQLite) only map or open their file, so they load here.
+        """
+        workers = workers or self.workers
+        pending = [name for name in (names or self.map.names()) if name not in self.managers]
+        eager = [name for name in pending if not self.map.is_lazy(name)]
+        if workers > 1 and len(eager) > 1:
+            with ProcessPoolExecutor(min(workers, len(eager))) as pool:
+                for name, manager in zip(eager, pool.map(_load_shard, [self.map.path_of(name) for name in eager])):
+                    with self.lock:
+                        self.managers.setdefault(name, manager)
+        for name in pending:
+            self.shard(name)
+        return [self.managers[name] for name in (names or self.map.names())]
+
+    def loaded(self):
+        return list(self.managers)
+
+    def _find(self, kind, record_id):
+        """(shard name, record) for the first routed shard holding it, or (None, None)."""
+        for name in self.map.shards_for_id(kind, record_id):
+            manager = self.shard(name)
+            record = manager.search_patient_by_id(record_id) if kind == "patients" else manager.search_doctor_by_id(record_id)
+            if record is not None:
+                return name, record
+        return None, None
+
+    #? --- Lookups ---
+    def search_patient_by_id(self, patient_id):
+        return self._find("patients", patient_id)[1]
+
+    def search_doctor_by_id(self, doctor_id):
+        return self._find("doctors", doctor_id)[1]
+
+    def shard_of_doctor(self, doctor_id):
+        return self._find("doctors", doctor_id)[0]
+
+    def appointments_for_doctor(self, doctor_id, start=None, end=None):
+        name = self.shard_of_doctor(doctor_id)
+        return self.shard(name).appointments_for_doctor(doctor_id, start, end) if name else []
+
+    def appointments_for_patient(self, patient_id):
+        """The patient's appointments in every shard, in date order (loads all shards)."""
+        appointments = [a for manager in self.load() for a in manager.appointments_for_patient(patient_id)]
+        return sorted(appointments, key=lambda a: (date_key(a.date), a.time or ""))
+
+    def earliest_available(self, specialization, date, time=None):
+        """(doctor, date, time) of the first free slot across the shards holding this specialization, or None."""
+        slots = [slot for name in self.map.shards_for_specialization(specialization)
+                 if (slot := self.shard(name).earliest_available(specialization, date, time))]
+        return min(slots, key=lambda slot: (slot[1], slot[2]), default=None)
+
+    def search_patients(self, text, limit=10):
+        """Ranked matches from every shard (loads all shards); a patient copied to several shards is listed once."""
+        return self._search(text, limit, "patient_search", "patient")
+
+    def search_doctors(self, text, limit=10):
+        return self._search(text, limit, "doctor_search", "doctor")
+
+    def _search(self, text, limit, index, records):
+        hits = [(score, record_id, manager) for manager in self.load()
+                for record_id, score in getattr(manager, index).search(text, limit)]
+        found = {}
+        for score, record_id, manager in sorted(hits, key=lambda hit: hit[0], reverse=True):
+            found.setdefault(record_id, getattr(manager, records)[record_id])
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+    #? --- Changes ---
+    def add_patient(self, patient, shard=None):
+        """Adds the patient to its home shard (see ShardMap.home_shard) or to `shard`; returns the shard name."""
+        name = self._target("patients", patient.get_patient_id(), None, shard)
+        self.shard(name).add_patient(patient)
+        return name
+
+    def add_doctor(self, doctor, shard=None):
+        name = self._target("doctors", doctor.get_doctor_id(), doctor.specialization, shard)
+        self.shard(name).add_doctor(doctor)
+        self.map.register_doctor(doctor.get_doctor_id(), name)
+        return name
+
+    def _target(self, kind, record_id, specialization, shard):
+        if shard is None:
+            return self.map.home_shard(kind, record_id, specialization)
+        owner = self.map.owner(kind, record_id)
+        if owner and owner != shard:
+            raise ShardRoutingError(f"ID {record_id} belongs to shard {owner}, not {shard}.")
+        return self.map.check(shard)
+
+    def book_appointment(self, date, patient_id, doctor_id, time=None):
+        """
+        Books in the doctor's shard, copying the patient there first if they are registered elsewhere.
+        Returns the appointment, or None if the patient or doctor does not exist.
+        Raises:
+            AppointmentConflictError: as HospitalManager.book_appointment.
+        """
+        name, doctor = self._find("doctors", doctor_id)
+        if doctor is None:
+            return None
+        manager = self.shard(name)
+        patient = manager.search_patient_by_id(patient_id)
+        with manager.batch():
+            if patient is None:
+                home = self.search_patient_by_id(patient_id)
+                if home is None:
+                    return None
+                patient = Patient.from_record(HospitalManager.patient_record(home))
+                manager.add_patient(patient)
+            return manager.book_appointment(date, patient, doctor, time=time)
+
+    def cancel_appointment(self, doctor_id, appointment_id):
+        """Appointment IDs are per shard, so the doctor's ID says where to look."""
+        name = self.shard_of_doctor(doctor_id)
+        return self.shard(name).cancel_appointment(appointment_id) if name else None
+
+    def mark_no_show(self, doctor_id, appointment_id):
+        name = self.shard_of_doctor(doctor_id)
+        return self.shard(name).mark_no_show(appointment_id) if name else None
+
+    def update_patient(self, patient_id, **fields):
+        """Updates the patient and every copy of them (loads all shards); returns the home record."""
+        updated = [patient for manager in self.load() if (patient := manager.update_patient(patient_id, **fields))]
+        return self.search_patient_by_id(patient_id) if updated else None
+
+    def update_doctor(self, doctor_id, **fields):
+        name = self.shard_of_doctor(doctor_id)
+        return self.shard(name).update_doctor(doctor_id, **fields) if name else None
+
+    def save_data(self):
+        """Compacts the loaded shards that have journaled changes; the others have nothing to write."""
+        for manager in list(self.managers.values()):
+            if manager.storage.has_changes():
+                manager.save_data()
+
+    def close(self):
+        for manager in self.managers.values():
+            manager.storage.close()
+        self.managers.clear()
+
+    def status(self):
+        """One row per shard: its routing, and record counts for the loaded ones."""
+        rows = []
+        for name, entry in self.map.shards.items():
+            manager = self.managers.get(name)
+            blocks = {kind: "-".join("" if i is None else str(i) for i in entry[kind]) if entry.get(kind) else "any" for kind in KINDS}
+            rows.append({"shard": name, "path": self.map.path_of(name),
+                         "patient_ids": blocks["patients"], "doctor_ids": blocks["doctors"],
+                         "specializations": ", ".join(entry.get("specializations") or ()) or "any",
+                         "loaded": manager is not None,
+                         "patients": len(manager.patient) if manager else None,
+                         "doctors": len(manager.doctor) if manager else None,
+                         "appointments": len(manager.appointment) if manager else None})
+        return rows
+
+#? ####################################################
+#? --- Splitting one store into shards ---
+#? ####################################################
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.strip().lower()).strip("-") or "shard"
+
+def plan_shards(data, by="department", count=4, extension=".json"):
+    """
+    Shard map entries for `data` (the Storage.load() layout): one shard per specialization
+    (by="department"), or `count` shards each owning an equal block of patient IDs and of doctor IDs (by="ids").
+    """
+    if by == "department":
+        specializations = sorted({d["specialization"].strip().lower() for d in data.get("doctors", [])}) or ["general"]
+        return [{"name": _slug(s), "path": f"shards/{_slug(s)}{extension}", "specializations": [s]} for s in specializations]
+    if by == "ids":
+        blocks = {kind: max((record["id"] for record in data.get(kind, [])), default=0) // count + 1 for kind in KINDS}
+        return [{"name": f"ids-{n + 1}", "path": f"shards/ids-{n + 1}{extension}",
+                 **{kind: [n * block, None if n == count - 1 else (n + 1) * block - 1] for kind, block in blocks.items()}}
+                for n in range(count)]
+    raise ValueError(f"Unknown shard partitioning: {by}")
+
+def split_hospital(data, shard_map):
+    """
+    Writes each shard's store from `data` (the Storage.load() layout) and saves the shard map.
+    Doctors go to their home shard and appointments to their doctor's; a patient goes to the
+    owner of their ID, if any, and is copied to every other shard they have appointments in
+    (patients with no shard yet go to the first). Returns {shard name: record counts}.
+    """
+    doctor_shard = {d["id"]: shard_map.home_shard("doctors", d["id"], d["specialization"]) for d in data.get("doctors", [])}
+    for doctor_id, name in doctor_shard.items():
+        if not shard_map.shards[name].get("doctors"):
+            shard_map.shards[name].setdefault("doctor_ids", []).append(doctor_id)
+    patients = {p["id"]: p for p in data.get("patients", [])}
+    shards = {name: {"patients": {}, "doctors": [], "appointments": []} for name in shard_map.names()}
+    for d in data.get("doctors", []):
+        shards[doctor_shard[d["id"]]]["doctors"].append(d)
+    for a in data.get("appointments", []):
+        name = doctor_shard.get(a["doctor_id"])
+        if name and a["patient_id"] in patients:
+            shards[name]["appointments"].append(a)
+            shards[name]["patients"][a["patient_id"]] = patients[a["patient_id"]]
+    placed = {patient_id for shard in shards.values() for patient_id in shard["patients"]}
+    for patient_id, p in patients.items():
+        owner = shard_map.owner("patients", patient_id)
+        if owner or patient_id not in placed:
+            shards[owner or shard_map.names()[0]]["patients"][patient_id] = p
+
+    counts = {}
+    for name, shard in shards.items():
+        shard["patients"] = list(shard["patients"].values())
+        storage = shard_map.storage(name)
+        storage.save(shard)
+        storage.close()
+        counts[name] = {kind: len(records) for kind, records in shard.items()}
+    shard_map.save()
+    return counts
@@ -0,0 +1,47 @@
+import os
+from .base import Storage
+from .json_storage import JSONStorage
+from .binary_storage import BinaryStorage
+
+__all__ = ["Storage", "JSONStorage", "BinaryStorage", "SQLiteStorage", "open_storage", "storage_for_path", "storage_class_for_path"]
+
+#! file extension -> backend, for tools that take a data file path (see storage_for_path)
+EXTENSIONS = {".json": "json", ".hms": "binary", ".db": "sqlite"}
+
+def open_storage(kind=None, data_dir="data"):
+    """
+    Returns the storage backend named by `kind` (or the HMS_STORAGE environment variable).
+    Supported: "json" (default), "binary" (memory-mapped snapshot) and "sqlite".
+    """
+    kind = (kind or os.environ.get("HMS_STORAGE", "json")).lower()
+    if kind == "json":
+        return JSONStorage(os.path.join(data_dir, "hospital-data.json"))
+    if kind == "binary":
+        return BinaryStorage(os.path.join(data_dir, "hospital-data.hms"))
+    if kind == "sqlite":
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.path.join(data_dir, "hospital-data.db"))
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+def storage_class_for_path(path):
+    """Returns the backend class for a data file, chosen by its extension (.json, .hms or .db), without opening it."""
+    kind = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if kind is None:
+        raise ValueError(f"Unknown data file type: {path} (expected one of {', '.join(EXTENSIONS)})")
+    if kind == "json":
+        return JSONStorage
+    if kind == "binary":
+        return BinaryStorage
+    from .sqlite_storage import SQLiteStorage
+    return SQLiteStorage
+
+def storage_for_path(path):
+    """Returns the backend for a data file, chosen by its extension (.json, .hms or .db)."""
+    return storage_class_for_path(path)(path)
+
+def __getattr__(name):
+    #! sqlite3 is only imported when the SQLite backend is actually used
+    if name == "SQLiteStorage":
+        from .sqlite_storage import SQLiteStorage
+        return SQLiteStorage
+    raise AttributeError(f"module 'storage' has no attribute '{name}'")
@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+
+#? ###############################################
+#? Start Storage Class - interface for backends
+#? ###############################################
+
+class Storage(ABC):
+    """
+    Persistence backend used by HospitalManager.
+    Records are plain dicts in the hospital-data.json layout
+    (patients: name/age/gender/id/disease, doctors: .../specialization,
+    appointments: id/date/patient_id/doctor_id).
+    """
+    lazy = False  #! True when patients are fetched on demand instead of loaded up front
+    row_level = False  #! True when every change is written in place, so there is no snapshot to compact
+
+    @abstractmethod
+    def load(self):
+        """Returns a dict with "patients", "doctors" and "appointments" iterables of records."""
+
+    def changes(self):
+        """Returns the changes recorded since the last snapshot, to be replayed after load()."""
+        return []
+
+    def exclusive(self):
+        """Context manager that keeps other processes from writing to this store."""
+        return nullcontext()
+
+    def sync(self):
+        """
+        Returns the changes other processes have made since this one last read or wrote,
+        or None when the caller has to reload everything.
+        """
+        return []
+
+    @abstractmethod
+    def append(self, change):
+        """Persists a single change (see HospitalManager.apply_change for the format)."""
+
+    def append_many(self, changes):
+        """Persists a batch of changes in one write."""
+        for change in changes:
+            self.append(change)
+
+    def should_compact(self):
+        return False
+
+    def has_changes(self):
+        """Whether changes were persisted since the last snapshot, i.e. whether save() would write anything new."""
+        return True
+
+    @abstractmethod
+    def save(self, data):
+        """Replaces the stored data with a full snapshot in the load() layout."""
+
+    def get_patient(self, patient_id):
+        return None
+
+    def get_doctor(self, doctor_id):
+        return None
+
+    def all_patients(self):
+        """Yields every stored patient record; only lazy backends need it (the others hold all patients in memory)."""
+        return iter(())
+
+    def close(self):
+        pass
@@ -0,0 +1,267 @@
+import os
+import sys
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from storage.json_storage import JSONStorage
+from exceptions.exceptions import CorruptDataError
+
+#! file layout: header, then the sections below in order, each aligned to 8 bytes; all integers little-endian
+MAGIC, VERSION = b"HMSB", 1
+SECTIONS = ("string_offsets", "strings", "patients", "doctors", "appointments",
+            "patient_ids", "patient_rows", "doctor_ids", "doctor_rows")
+HEADER = struct.Struct("<4sI4Q" + "Q" * len(SECTIONS))  # magic, version, patients, doctors, appointments, strings, section offsets
+
+#! fixed-width records; text fields are indexes into the string table (NONE for a missing value)
+PATIENT = struct.Struct("<qIhII")  # id, name, age, gender, disease
+DOCTOR = struct.Struct("<qIhIIIIh")  # id, name, age, gender, specialization, work_start, work_end, slot_minutes
+APPOINTMENT = struct.Struct("<qIIIqq")  # id, date, time, status, patient_id, doctor_id
+NONE = 0xFFFFFFFF
+
+def write_snapshot(path, data):
+    """Writes `data` (the Storage.load() layout) to `path` in the binary snapshot format."""
+    strings = {}
+    def ref(value):
+        return NONE if value is None else strings.setdefault(str(value), len(strings))
+
+    patients, patient_ids = [], array("q")
+    for p in data.get("patients", []):
+        patients.append(PATIENT.pack(p["id"], ref(p["name"]), int(p["age"]), ref(p["gender"]), ref(p["disease"])))
+        patient_ids.append(p["id"])
+    doctors, doctor_ids = [], array("q")
+    for d in data.get("doctors", []):
+        doctors.append(DOCTOR.pack(d["id"], ref(d["name"]), int(d["age"]), ref(d["gender"]), ref(d["specialization"]),
+                                   ref(d.get("work_start")), ref(d.get("work_end")), int(d.get("slot_minutes") or 0)))
+        doctor_ids.append(d["id"])
+    appointments = [APPOINTMENT.pack(a["id"], ref(a["date"]), ref(a.get("time")), ref(a.get("status")), a["patient_id"], a["doctor_id"])
+                    for a in data.get("appointments", [])]
+
+    encoded = [text.encode() for text in strings]
+    patient_order = sorted(range(len(patient_ids)), key=patient_ids.__getitem__)
+    doctor_order = sorted(range(len(doctor_ids)), key=doctor_ids.__getitem__)
+    sections = (
+        _little(array("Q", accumulate(map(len, encoded), initial=0))),
+        b"".join(encoded),
+        b"".join(patients),
+        b"".join(doctors),
+        b"".join(appointments),
+        _little(array("q", (patient_ids[row] for row in patient_order))),
+        _little(array("I", patient_order)),
+        _little(array("q", (doctor_ids[row] for row in doctor_order))),
+        _little(array("I", doctor_order)),
+    )
+    with open(path, "wb") as f:
+        f.write(bytes(HEADER.size))
+        offsets = []
+        for section in sections:
+            f.write(bytes(-f.tell() % 8))
+            offsets.append(f.tell())
+            f.write(section)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(patients), len(doctors), len(appointments), len(encoded), *offsets))
+        f.flush()
+        os.fsync(f.fileno())
+
+def _little(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+#? ##################################################################
+#? Start BinaryStorage Class - memory-mapped snapshot + JSON journal
+#? ##################################################################
+
+class BinaryStorage(JSONStorage):
+    """
+    Same journal, locking and compaction as JSONStorage, but the snapshot is a
+    compact binary file that is memory-mapped instead of parsed: startup only
+    decodes doctors and appointments, and a patient record is decoded the first
+    time it is looked up (through the sorted ID index).
+    The journal's patient/doctor changes are kept in an overlay on top of the
+    mapped records, so lookups never see a stale or deleted record.
+    """
+    lazy = True
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.journal_file = path + ".journal"  #! not the JSON backend's journal when both live in data/
+        self.map = None
+        self.sections = {}
+        self.string_offsets = self.patient_ids = self.patient_rows = self.doctor_ids = self.doctor_rows = None
+        self.counts = dict.fromkeys(("patients", "doctors", "appointments"), 0)
+        self.overrides = {"patients": {}, "doctors": {}}  # id -> record, or None once deleted
+
+    #? --- Mapping ---
+    def _map(self):
+        self._unmap()
+        try:
+            with open(self.path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return False
+        except ValueError:  #! empty file
+            raise CorruptDataError(f"{self.path} is empty. Restore it from a backup; it was not modified.")
+        try:
+            magic, version, patients, doctors, appointments, strings, *offsets = HEADER.unpack_from(self.map)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._unmap()
+            raise CorruptDataError(f"{self.path} is not a version {VERSION} binary snapshot. Restore it from a backup; it was not modified.")
+        self.counts = {"patients": patients, "doctors": doctors, "appointments": appointments}
+        self.sections = dict(zip(SECTIONS, offsets))
+        self.string_offsets = self._integers("string_offsets", strings + 1, "Q")
+        self.patient_ids = self._integers("patient_ids", patients, "q")
+        self.patient_rows = self._integers("patient_rows", patients, "I")
+        self.doctor_ids = self._integers("doctor_ids", doctors, "q")
+        self.doctor_rows = self._integers("doctor_rows", doctors, "I")
+        return True
+
+    def _integers(self, section, count, code):
+        """A section of integers as a sequence, read straight from the mapping (copied only on big-endian hosts)."""
+        start = self.sections[section]
+        view = memoryview(self.map)[start:start + count * struct.calcsize(code)].cast(code)
+        if sys.byteorder == "big":
+            view = array(code, view)
+            view.byteswap()
+        return view
+
+    def _unmap(self):
+        if self.map is not None:
+            #! views into the mapping have to be released before it can be closed
+            for view in (self.string_offsets, self.patient_ids, self.patient_rows, self.doctor_ids, self.doctor_rows):
+                if isinstance(view, memoryview):
+                    view.release()
+            self.map.close()
+            self.map = None
+        self.sections = {}
+        self.string_offsets = self.patient_ids = self.patient_rows = self.doctor_ids = self.doctor_rows = None
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    #? --- Decoding ---
+    def _string(self, index):
+        if index == NONE:
+            return None
+        start = self.sections["strings"]
+        return str(self.map[start + self.string_offsets[index]:start + self.string_offsets[index + 1]], "utf-8")
+
+    def _patient(self, row):
+        patient_id, name, age, gender, disease = PATIENT.unpack_from(self.map, self.sections["patients"] + row * PATIENT.size)
+        text = self._string
+        return {"name": text(name), "age": age, "gender": text(gender), "id": patient_id, "disease": text(disease)}
+
+    def _doctor(self, row):
+        doctor_id, name, age, gender, specialization, work_start, work_end, slot_minutes = DOCTOR.unpack_from(
+            self.map, self.sections["doctors"] + row * DOCTOR.size)
+        text = self._string
+        return {"name": text(name), "age": age, "gender": text(gender), "id": doctor_id, "specialization": text(specialization),
+                "work_start": text(work_start), "work_end": text(work_end), "slot_minutes": slot_minutes or None}
+
+    def _appointments(self):
+        size, start = APPOINTMENT.size, self.sections["appointments"]
+        strings = {}  #! dates, times and statuses repeat: decode each distinct one once
+        def text(index):
+            value = strings.get(index)
+            if value is None:
+                value = strings[index] = self._string(index)
+            return value
+        for row in range(self.counts["appointments"]):
+            appointment_id, date, time, status, patient_id, doctor_id = APPOINTMENT.unpack_from(self.map, start + row * size)
+            yield {"id": appointment_id, "date": text(date), "time": text(time), "status": text(status),
+                   "patient_id": patient_id, "doctor_id": doctor_id}
+
+    def _find(self, ids, rows, record_id):
+        """Row number of record_id in the snapshot, or None. O(log n) over the mapped index."""
+        i = bisect_left(ids, record_id)
+        return rows[i] if i < len(ids) and ids[i] == record_id else None
+
+    #? --- Storage interface ---
+    def load(self):
+        """
+        Maps the snapshot; patients stay on disk until get_patient().
+        Raises:
+            CorruptDataError: if the file is not a binary snapshot (it is left untouched on disk).
+        """
+        self.snapshot_identity = self._stat_snapshot()
+        self.journal_offset = 0  #! as in JSONStorage.load
+        self.overrides = {"patients": {}, "doctors": {}}
+        if not self._map():
+            return {}
+        self.snapshot_size = sum(self.counts.values())
+        return {
+            "patients": [],
+            "doctors": (self._doctor(row) for row in range(self.counts["doctors"])),
+            "appointments": self._appointments(),
+        }
+
+    def _read_journal(self, offset):
+        for change in super()._read_journal(offset):
+            self._track(change)
+            yield change
+
+    def append_many(self, changes):
+        super().append_many(changes)
+        for change in changes:
+            self._track(change)
+
+    def _track(self, change):
+        """Applies a patient/doctor change to the overlay; appointments are kept in memory by HospitalManager."""
+        op = change["op"]
+        kind = "patients" if op.endswith("_patient") else "doctors" if op.endswith("_doctor") else None
+        if kind is None:
+            return
+        if op.startswith("add_"):
+            record = change[kind[:-1]]
+            self.overrides[kind][record["id"]] = dict(record)
+        elif op.startswith("update_"):
+            record = self._get(kind, change["id"])
+            if record:
+                self.overrides[kind][change["id"]] = {**record, **change["fields"]}
+        elif op.startswith("delete_"):
+            self.overrides[kind][change["id"]] = None
+
+    def save(self, data):
+        """Writes a new snapshot next to the old one, renames it into place and maps it; truncates the journal."""
+        with self.exclusive():
+            tmp_file = f"{self.path}.{os.getpid()}.tmp"
+            write_snapshot(tmp_file, data)  #! may still read from the current mapping (all_patients)
+            self._unmap()
+            os.replace(tmp_file, self.path)
+            open(self.journal_file, 'w').close()
+            self.snapshot_identity = self._stat_snapshot()
+            self.overrides = {"patients": {}, "doctors": {}}
+            self._map()
+        self.journal_size = 0
+        self.journal_offset = 0
+        self.snapshot_size = sum(self.counts.values())
+
+    #? --- Lookups ---
+    def _get(self, kind, record_id):
+        overrides = self.overrides[kind]
+        if record_id in overrides:
+            return overrides[record_id]
+        if kind == "patients":
+            row = self._find(self.patient_ids, self.patient_rows, record_id) if self.counts["patients"] else None
+            return None if row is None else self._patient(row)
+        row = self._find(self.doctor_ids, self.doctor_rows, record_id) if self.counts["doctors"] else None
+        return None if row is None else self._doctor(row)
+
+    def get_patient(self, patient_id):
+        return self._get("patients", patient_id)
+
+    def get_doctor(self, doctor_id):
+        return self._get("doctors", doctor_id)
+
+    def all_patients(self):
+        """Yields every patient record: the snapshot's in file order (minus changed ones), then the changed and added ones."""
+        overrides = self.overrides["patients"]
+        for row in range(self.counts["patients"]):
+            record = self._patient(row)
+            if record["id"] not in overrides:
+                yield record
+        yield from (record for record in overrides.values() if record)
+
+    def close(self):
+        self._unmap()
@@ -0,0 +1,131 @@
+import os
+import json
+import logging
+from storage.base import Storage
+from locks import FileLock
+from exceptions.exceptions import CorruptDataError
+
+#? ##########################################################
+#? Start JSONStorage Class - snapshot + append-only journal
+#? ##########################################################
+
+class JSONStorage(Storage):
+    """
+    Several processes may share one data directory: writers take an exclusive
+    lock file, and each process tracks how far it has read the journal and
+    which snapshot it loaded, so sync() can hand it the changes made by others.
+    """
+    compact_every = 500  #! minimum journal entries before the snapshot is rewritten
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)  # safe for nested folders too
+        self.path = path
+        self.journal_file = os.path.splitext(path)[0] + ".journal"
+        self.file_lock = FileLock(os.path.splitext(path)[0] + ".lock")
+        self.journal_size = 0
+        self.journal_offset = 0  #! bytes of the journal already applied by this process
+        self.snapshot_size = 0  #! records in the last snapshot, so compaction stays amortized O(1) per change
+        self.snapshot_identity = None
+
+    def exclusive(self):
+        return self.file_lock.hold()
+
+    def _stat_snapshot(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """
+        Raises:
+            CorruptDataError: if the snapshot is not valid JSON (it is left untouched on disk).
+        """
+        self.snapshot_identity = self._stat_snapshot()
+        self.journal_offset = 0  #! a reloaded snapshot is followed by a journal read from its start
+        try:
+            with open(self.path,'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            raise CorruptDataError(f"{self.path} is not valid JSON ({e}). Restore it from a backup; it was not modified.")
+        self.snapshot_size = sum(len(records) for records in data.values())
+        return data
+
+    def changes(self):
+        """Yields the journal written since the last snapshot."""
+        self.journal_size = 0
+        return self._read_journal(0)
+
+    def sync(self):
+        """
+        Returns the changes other processes appended since this one last read or wrote,
+        or None if another process has rewritten the snapshot (the caller must reload).
+        """
+        if self._stat_snapshot() != self.snapshot_identity:
+            return None
+        try:
+            if os.stat(self.journal_file).st_size == self.journal_offset:
+                return []
+        except FileNotFoundError:
+            self.journal_offset = 0
+            return []
+        return list(self._read_journal(self.journal_offset))
+
+    def _read_journal(self, offset):
+        """
+        Yields journal entries from `offset` on, advancing journal_offset.
+        Must be called under the exclusive lock: a torn last line (crash mid-append)
+        is then known to be dead and is cut off so the next append starts on a clean line.
+        """
+        try:
+            with open(self.journal_file,'rb+') as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        logging.warning(f"Discarding incomplete journal entry: {line!r}")
+                        f.truncate(offset)
+                        break
+                    offset += len(line)
+                    self.journal_offset = offset
+                    self.journal_size += 1
+                    yield json.loads(line)
+        except FileNotFoundError:
+            self.journal_offset = 0
+
+    def append(self, change):
+        self.append_many([change])
+
+    def append_many(self, changes):
+        with self.exclusive(), open(self.journal_file, 'ab') as f:
+            f.write("".join(json.dumps(change) + "\n" for change in changes).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            self.journal_offset = f.tell()
+        self.journal_size += len(changes)
+
+    def should_compact(self):
+        return self.journal_size >= max(self.compact_every, self.snapshot_size)
+
+    def has_changes(self):
+        return self.journal_size > 0
+
+    def save(self, data):
+        """
+        Writes a full snapshot and truncates the journal (compaction).
+        The snapshot is written to a temp file and renamed, so a crash never leaves a half-written file.
+        """
+        with self.exclusive():
+            tmp_file = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.path)
+            open(self.journal_file, 'w').close()
+            self.snapshot_identity = self._stat_snapshot()
+        self.journal_size = 0
+        self.journal_offset = 0
+        self.snapshot_size = sum(len(records) for records in data.values())
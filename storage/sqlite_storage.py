@@ -0,0 +1,238 @@
+import os
+import json
+import sqlite3
+import logging
+from storage.base import Storage
+from locks import FileLock
+from exceptions.exceptions import AppointmentConflictError
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    disease TEXT
+);
+CREATE TABLE IF NOT EXISTS doctors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    specialization TEXT,
+    work_start TEXT,
+    work_end TEXT,
+    slot_minutes INTEGER
+);
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    time TEXT,
+    status TEXT,
+    patient_id INTEGER NOT NULL,
+    doctor_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_doctors_specialization ON doctors (specialization);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments (patient_id);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor ON appointments (doctor_id, date);
+CREATE INDEX IF NOT EXISTS idx_appointments_date ON appointments (date);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    change TEXT NOT NULL
+);
+"""
+
+#! columns that update_* changes are allowed to touch
+PATIENT_COLUMNS = ("name", "age", "gender", "disease")
+DOCTOR_COLUMNS = ("name", "age", "gender", "specialization", "work_start", "work_end", "slot_minutes")
+
+#! columns added after the first release: table -> [(column, type)], added to older databases on open
+MIGRATIONS = {
+    "doctors": [("work_start", "TEXT"), ("work_end", "TEXT"), ("slot_minutes", "INTEGER")],
+    "appointments": [("time", "TEXT"), ("status", "TEXT")],
+}
+
+#? #####################################################
+#? Start SQLiteStorage Class - indexed, row-level writes
+#? #####################################################
+
+class SQLiteStorage(Storage):
+    """
+    Stores each record as a row, so a change is a single-row statement.
+    Patients are not loaded at startup; HospitalManager fetches them by
+    primary key the first time they are needed.
+    Several processes may share one database: writers take an exclusive lock
+    file, and every change is also logged in the changes table, which sync()
+    reads past the last entry this process has seen.
+    """
+    lazy = True
+    row_level = True
+    keep_changes = 10_000  #! logged changes kept for other processes; one further behind reloads instead
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file_lock = FileLock(path + ".lock")
+        self.change_mark = 0  #! highest changes.seq already applied by this process
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        with self.conn:
+            for table, columns in MIGRATIONS.items():
+                existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                for column, kind in columns:
+                    if column not in existing:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+
+    def exclusive(self):
+        return self.file_lock.hold()
+
+    def _last_change(self):
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def load(self):
+        self.change_mark = self._last_change()
+        return {
+            "patients": [],
+            "doctors": self._rows("SELECT * FROM doctors ORDER BY rowid"),
+            "appointments": self._rows("SELECT * FROM appointments ORDER BY id"),
+        }
+
+    def _rows(self, query, params=()):
+        #! stream from the cursor instead of fetchall()
+        for row in self.conn.execute(query, params):
+            yield dict(row)
+
+    def sync(self):
+        """
+        Returns the changes other processes logged since this one last read or wrote,
+        or None if it fell behind the kept log or a snapshot replaced the data (the caller must reload).
+        """
+        rows = self.conn.execute("SELECT seq, change FROM changes WHERE seq > ? ORDER BY seq", (self.change_mark,)).fetchall()
+        if not rows:
+            return []
+        if rows[0]["seq"] != self.change_mark + 1:
+            return None  #! the entries in between were pruned
+        changes = [json.loads(row["change"]) for row in rows]
+        if any(change["op"] == "snapshot" for change in changes):
+            return None
+        self.change_mark = rows[-1]["seq"]
+        return changes
+
+    def append(self, change):
+        self.append_many([change])
+
+    def append_many(self, changes):
+        """
+        Raises:
+            AppointmentConflictError: if an appointment ID is already stored (nothing is written).
+        """
+        with self.exclusive():
+            try:
+                with self.conn:
+                    for change in changes:
+                        self._execute_change(change)
+                    self._log(changes)
+            except sqlite3.IntegrityError as e:
+                raise AppointmentConflictError(f"{self.path} already holds that appointment ID ({e}); nothing was saved.")
+
+    def _log(self, changes):
+        self.conn.executemany("INSERT INTO changes (change) VALUES (?)", ((json.dumps(change),) for change in changes))
+        self.change_mark = self._last_change()
+        if self.change_mark % 1000 < len(changes):
+            self.conn.execute("DELETE FROM changes WHERE seq <= ?", (self.change_mark - self.keep_changes,))
+
+    def _execute_change(self, change):
+        op = change["op"]
+        if op == "add_patient":
+            p = change["patient"]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO patients (id, name, age, gender, disease) VALUES (?, ?, ?, ?, ?)",
+                (p["id"], p["name"], p["age"], p["gender"], p["disease"]))
+        elif op == "add_doctor":
+            d = change["doctor"]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO doctors (id, name, age, gender, specialization, work_start, work_end, slot_minutes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (d["id"], d["name"], d["age"], d["gender"], d["specialization"],
+                 d.get("work_start"), d.get("work_end"), d.get("slot_minutes")))
+        elif op in ("update_patient", "update_doctor"):
+            table, allowed = ("patients", PATIENT_COLUMNS) if op == "update_patient" else ("doctors", DOCTOR_COLUMNS)
+            fields = {k: v for k, v in change["fields"].items() if k in allowed}
+            if fields:
+                assignments = ", ".join(f"{column} = ?" for column in fields)
+                self.conn.execute(f"UPDATE {table} SET {assignments} WHERE id = ?", (*fields.values(), change["id"]))
+        elif op == "delete_patient":
+            #! HospitalManager only deletes once the appointments may go too (cascade, or there were none)
+            self.conn.execute("DELETE FROM appointments WHERE patient_id = ?", (change["id"],))
+            self.conn.execute("DELETE FROM patients WHERE id = ?", (change["id"],))
+        elif op == "delete_doctor":
+            self.conn.execute("DELETE FROM appointments WHERE doctor_id = ?", (change["id"],))
+            self.conn.execute("DELETE FROM doctors WHERE id = ?", (change["id"],))
+        elif op == "book_appointment":
+            app = change["appointment"]
+            #! plain INSERT: an ID another process already used must fail, not overwrite its booking
+            self.conn.execute(
+                "INSERT INTO appointments (id, date, time, status, patient_id, doctor_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (app.get("id"), app["date"], app.get("time"), app.get("status"), app["patient_id"], app["doctor_id"]))
+        elif op == "cancel_appointment":
+            #! cancelled rows are kept for the cancellation reports
+            self.conn.execute("UPDATE appointments SET status = 'cancelled' WHERE id = ?", (change["id"],))
+        elif op == "mark_no_show":
+            self.conn.execute("UPDATE appointments SET status = 'no_show' WHERE id = ?", (change["id"],))
+        elif op == "archive_appointments":
+            #! moved to the compressed monthly archive (see archive.py)
+            self.conn.executemany("DELETE FROM appointments WHERE id = ?", ((appointment_id,) for appointment_id in change["ids"]))
+        else:
+            logging.warning(f"Unknown change operation: {op}")
+
+    def save(self, data):
+        """Replaces every row; other processes see the logged "snapshot" entry and reload."""
+        with self.exclusive(), self.conn:
+            self.conn.execute("DELETE FROM changes")
+            self._log([{"op": "snapshot"}])
+            self.conn.execute("DELETE FROM patients")
+            self.conn.execute("DELETE FROM doctors")
+            self.conn.execute("DELETE FROM appointments")
+            self.conn.executemany(
+                "INSERT INTO patients (id, name, age, gender, disease) VALUES (:id, :name, :age, :gender, :disease)",
+                data.get("patients", []))
+            self.conn.executemany(
+                "INSERT INTO doctors (id, name, age, gender, specialization, work_start, work_end, slot_minutes) "
+                "VALUES (:id, :name, :age, :gender, :specialization, :work_start, :work_end, :slot_minutes)",
+                data.get("doctors", []))
+            self.conn.executemany(
+                "INSERT INTO appointments (id, date, time, status, patient_id, doctor_id) VALUES (?, ?, ?, ?, ?, ?)",
+                ((app.get("id"), app["date"], app.get("time"), app.get("status"), app["patient_id"], app["doctor_id"])
+                 for app in data.get("appointments", [])))
+
+    #? --- Indexed queries ---
+    def get_patient(self, patient_id):
+        row = self.conn.execute("SELECT * FROM patients WHERE id = ?", (patient_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_doctor(self, doctor_id):
+        row = self.conn.execute("SELECT * FROM doctors WHERE id = ?", (doctor_id,)).fetchone()
+        return dict(row) if row else None
+
+    def all_patients(self):
+        return self._rows("SELECT * FROM patients ORDER BY rowid")
+
+    def find_doctors_by_specialization(self, specialization):
+        return self._rows("SELECT * FROM doctors WHERE specialization = ?", (specialization,))
+
+    def find_appointments(self, patient_id=None, doctor_id=None, date=None):
+        clauses, params = ["status IS NOT 'cancelled'"], []
+        for column, value in (("patient_id", patient_id), ("doctor_id", doctor_id), ("date", date)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._rows(f"SELECT * FROM appointments{where} ORDER BY id", params)
+
+    def close(self):
+        self.conn.close()
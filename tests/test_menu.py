@@ -0,0 +1,84 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import main
+import json
+from hospital import Patient, Doctor
+from manager import HospitalManager
+from storage import JSONStorage
+
+
+class TwoDeskAddTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.path = os.path.join(self.directory, "hospital-data.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_menu(self, answers):
+        """Runs the menu on the test store; each answer is typed in turn, or called with the prompt if it is a function."""
+        answers = iter(answers)
+        answer = lambda prompt: (lambda given: given(prompt) if callable(given) else given)(next(answers))
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=answer), redirect_stdout(output), self.assertRaises(SystemExit):
+            main.main(fast=True, storage=JSONStorage(self.path))
+        return output.getvalue()
+
+    def test_id_added_by_another_desk_meanwhile_is_not_overwritten(self):
+        desk_a = HospitalManager(JSONStorage(self.path))
+
+        def disease(prompt):
+            #! desk A adds patient 100 while desk B is still typing theirs
+            desk_a.add_patient(Patient("alice", 30, "female", 100, "flu"))
+            return "cold"
+
+        output = self.run_menu(["1", "1", "bob", "40", "male", "100", disease, "3", "9"])
+
+        self.assertIn("Patient with ID 100 already exists!", output)
+        self.assertEqual(HospitalManager(JSONStorage(self.path)).patient[100].name, "alice")
+
+
+class ReportsMenuTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.path = os.path.join(self.directory, "hospital-data.json")
+        hospital = HospitalManager(JSONStorage(self.path))
+        hospital.add_patient(Patient("first patient", 30, "male", 1, "flu"))
+        for doctor_id in range(1, 31):
+            hospital.add_doctor(Doctor(f"doctor {doctor_id}", 50, "male", doctor_id, "cardiology"))
+            hospital.book_appointment("2025-01-02", hospital.patient[1], hospital.doctor[doctor_id])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_menu(self, answers):
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=answers), redirect_stdout(output), self.assertRaises(SystemExit):
+            main.main(fast=True, storage=JSONStorage(self.path))
+        return output.getvalue()
+
+    def test_reports_are_paged(self):
+        output = self.run_menu(["7", "", "", "n", "s", "9"])
+        self.assertIn("page 1 of 2", output)
+        self.assertIn("page 2 of 2", output)
+        self.assertEqual(output.count("doctor 1 "), 1)  #! listed once, on page 1 of the per-day table
+
+    def test_full_reports_are_exported(self):
+        path = os.path.join(self.directory, "reports.json")
+        self.run_menu(["7", "", "", "e", path, "9"])
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)["doctor_days"]), 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
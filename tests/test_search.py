@@ -0,0 +1,94 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import random
+from hospital import Patient
+from manager import HospitalManager
+from storage import storage_for_path
+from search import SearchIndex, tokenize
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from synthetic import generate, FIRST_NAMES, LAST_NAMES, DISEASES
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex({"name": 2.0, "disease": 1.0})
+        for record in generate(3000, 12, 0)["patients"]:
+            self.index.add(record["id"], record)
+
+    def scored_exhaustively(self, text):
+        """Every record's score, found by matching each query word against all of the record's words."""
+        index, scores = self.index, {}
+        expansions = [dict(index._expand(token)) for token in set(tokenize(text))]
+        for record_id, terms in index.record_terms.items():
+            score = sum(max((weight * multipliers[term] for term, weight in terms.items() if term in multipliers), default=0)
+                        for multipliers in expansions)
+            if score:
+                scores[record_id] = score
+        return scores
+
+    def test_bounded_search_returns_the_best_scores(self):
+        rng = random.Random(3)
+        names = FIRST_NAMES + LAST_NAMES
+        queries = [rng.choice(names) for _ in range(20)] + [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(40)]
+        queries += [f"{rng.choice(names)} {rng.choice(list(DISEASES))}" for _ in range(20)] + ["jo", "sidiqui", "mariam khan", "zzz"]
+        for text in queries:
+            scores = self.scored_exhaustively(text)
+            found = self.index.search(text)
+            self.assertEqual([score for _, score in found], sorted(scores.values(), reverse=True)[:10], text)
+            self.assertTrue(all(scores[record_id] == score for record_id, score in found), text)
+
+    def test_remove_drops_unused_terms_and_trigrams(self):
+        index = SearchIndex({"name": 2.0})
+        index.add(1, {"name": "suleman khan"})
+        index.add(2, {"name": "ayesha khan"})
+        index.remove(1)
+        index.add(2, {"name": "ayesha noor"})
+        self.assertEqual(sorted(index.postings), ["ayesha", "noor"])
+        self.assertEqual(set().union(*index.grams.values()), {"ayesha", "noor"})
+        self.assertTrue(all(index.grams.values()))
+
+
+class LazyPatientSearchTest(unittest.TestCase):
+    """Patients that are only in storage (not looked up yet) must still be found by name."""
+    extension = ".db"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.path = os.path.join(self.directory, "hospital-data" + self.extension)
+        hospital = HospitalManager(storage_for_path(self.path))
+        hospital.add_patient(Patient("suleman khan", 30, "male", 1, "flu"))
+        hospital.add_patient(Patient("ayesha noor", 40, "female", 2, "asthma"))
+        hospital.save_data()
+        hospital.storage.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_stored_patients_are_searchable(self):
+        hospital = HospitalManager(storage_for_path(self.path))
+        self.assertEqual([p.get_patient_id() for p in hospital.search_patients("suleman")], [1])
+        self.assertEqual([p.get_patient_id() for p in hospital.search_patients("asthma")], [2])
+
+    def test_changes_after_the_first_search_are_searchable(self):
+        hospital = HospitalManager(storage_for_path(self.path))
+        hospital.search_patients("suleman")
+        hospital.update_patient(1, name="suleman ahmed")
+        hospital.remove_patient(2)
+        self.assertEqual([p.name for p in hospital.search_patients("ahmed")], ["suleman ahmed"])
+        self.assertEqual(hospital.search_patients("ayesha"), [])
+
+
+class BinaryLazyPatientSearchTest(LazyPatientSearchTest):
+    extension = ".hms"
+
+
+if __name__ == "__main__":
+    unittest.main()
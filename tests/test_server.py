@@ -0,0 +1,86 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from manager import HospitalManager
+from storage import JSONStorage
+from server import HospitalAPI
+from exceptions.exceptions import CorruptDataError
+
+
+class PatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.api = HospitalAPI(HospitalManager(JSONStorage(os.path.join(self.directory, "hospital-data.json"))))
+        self.api.dispatch("POST", "/patients", {"name": "Ann Lee", "age": 30, "gender": "female", "id": 1, "disease": "flu"})
+        self.api.dispatch("POST", "/doctors", {"name": "Bob Khan", "age": 50, "gender": "male", "id": 2, "specialization": "cardiology"})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_patch_coerces_like_add(self):
+        status, patient = self.api.dispatch("PATCH", "/patients/1", {"age": "45", "name": "  Bob "})
+        self.assertEqual((status, patient["age"], patient["name"]), (200, 45, "bob"))
+        status, doctor = self.api.dispatch("PATCH", "/doctors/2", {"age": "60", "name": " Dr X "})
+        self.assertEqual((status, doctor["age"], doctor["name"]), (200, 60, "dr x"))
+        self.api.dispatch("POST", "/appointments", {"date": "2025-01-02", "patient_id": 1, "doctor_id": 2})
+        self.assertEqual(self.api.dispatch("GET", "/reports", {})[0], 200)
+
+    def test_patch_rejects_unknown_or_invalid_fields(self):
+        for body in ({"age": "old"}, {"age": 4.5}, {"agee": 3}, {"disease": 5}, {"name": "  "}, {"gender": "robot"}):
+            self.assertEqual(self.api.dispatch("PATCH", "/patients/1", body)[0], 400, body)
+        self.assertEqual(self.api.dispatch("PATCH", "/doctors/2", {"age": 10})[0], 400)
+        self.assertEqual(self.api.dispatch("GET", "/patients/1", {})[1]["age"], 30)
+
+    def test_add_with_an_id_another_desk_added_is_409(self):
+        desk_b = HospitalAPI(HospitalManager(JSONStorage(os.path.join(self.directory, "hospital-data.json"))))
+        self.api.dispatch("POST", "/patients", {"name": "alice", "age": 30, "gender": "female", "id": 100, "disease": "flu"})
+        status, _ = desk_b.dispatch("POST", "/patients", {"name": "bob", "age": 40, "gender": "male", "id": 100, "disease": "cold"})
+        self.assertEqual(status, 409)
+        self.assertEqual(desk_b.dispatch("GET", "/patients/100", {})[1]["name"], "alice")
+
+    def test_add_rejects_fractional_or_boolean_numbers(self):
+        for field, value in (("age", 45.9), ("age", True), ("id", 3.5), ("id", False)):
+            body = {"name": "Cat Dee", "age": 40, "gender": "female", "id": 3, "disease": "flu", field: value}
+            self.assertEqual(self.api.dispatch("POST", "/patients", body)[0], 400, body)
+        body = {"name": "Dr Y", "age": 40.5, "gender": "male", "id": 4, "specialization": "cardiology"}
+        self.assertEqual(self.api.dispatch("POST", "/doctors", body)[0], 400)
+        self.assertEqual(self.api.dispatch("GET", "/patients/3", {})[0], 404)
+
+    def test_unexpected_error_is_a_500(self):
+        def fail(*args, **kwargs):
+            raise CorruptDataError("hospital-data.json is damaged")
+        self.api.hospital.search_patient_by_id = fail
+        with self.assertLogs(level="ERROR"):
+            status, payload = self.api.dispatch("GET", "/patients/1", {})
+        self.assertEqual(status, 500)
+        self.assertIn("CorruptDataError", payload["error"])
+
+
+class SlotTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.api = HospitalAPI(HospitalManager(JSONStorage(os.path.join(self.directory, "hospital-data.json"))))
+        self.api.dispatch("POST", "/doctors", {"name": "Bob Khan", "age": 50, "gender": "male", "id": 2, "specialization": "cardiology"})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_doctor_slot(self):
+        self.assertEqual(self.api.dispatch("GET", "/slots?doctor_id=2&date=2025-01-02", {}),
+                         (200, {"doctor_id": 2, "date": "2025-01-02", "time": "09:00"}))
+
+    def test_no_free_slot_is_404(self):
+        self.api.hospital.next_free_slot = lambda doctor_id, date, time=None: None  #! e.g. a schedule without capacity
+        status, payload = self.api.dispatch("GET", "/slots?doctor_id=2&date=2025-01-02", {})
+        self.assertEqual(status, 404)
+        self.assertIn("No free slot", payload["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
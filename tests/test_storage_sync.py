@@ -0,0 +1,97 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hospital import Patient, Doctor
+from manager import HospitalManager
+from storage import storage_for_path
+from exceptions.exceptions import AppointmentConflictError
+
+
+def in_other_process(path, code):
+    """Runs `code` with `hospital` opened on `path` in a separate Python process."""
+    script = f"from manager import HospitalManager\nfrom hospital import Patient, Doctor\nfrom storage import storage_for_path\n" \
+             f"hospital = HospitalManager(storage_for_path({path!r}))\n{code}"
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, env=dict(os.environ, PYTHONPATH=ROOT))
+
+
+def stored_patient_ids(path):
+    """Patient IDs a fresh process finds in the store (lazy backends keep them out of .patient until looked up)."""
+    return sorted(record["id"] for record in HospitalManager(storage_for_path(path)).snapshot()["patients"])
+
+
+class TwoProcessSyncTest(unittest.TestCase):
+    extension = ".json"
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="hms-test-")
+        self.path = os.path.join(self.directory, "hospital-data" + self.extension)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_changes_after_another_process_compacts_are_kept(self):
+        a = HospitalManager(storage_for_path(self.path))
+        for patient_id in range(1, 8):
+            a.add_patient(Patient(f"patient {patient_id}", 30, "male", patient_id, "flu"))
+        #! another process compacts, this one reloads from the empty journal, then the other appends again
+        in_other_process(self.path, "hospital.save_data()")
+        with a.transaction():
+            pass
+        in_other_process(self.path, "hospital.add_patient(Patient('late patient', 40, 'female', 101, 'cold'))")
+        a.add_patient(Patient("patient 100", 50, "male", 100, "flu"))
+        a.save_data()
+
+        self.assertEqual(stored_patient_ids(self.path), [1, 2, 3, 4, 5, 6, 7, 100, 101])
+
+    def test_appends_from_both_processes_are_applied(self):
+        a = HospitalManager(storage_for_path(self.path))
+        a.add_patient(Patient("first patient", 30, "male", 1, "flu"))
+        in_other_process(self.path, "hospital.add_patient(Patient('second patient', 40, 'female', 2, 'cold'))")
+        a.add_patient(Patient("third patient", 50, "male", 3, "flu"))
+
+        self.assertEqual(sorted(record["id"] for record in a.snapshot()["patients"]), [1, 2, 3])
+        self.assertEqual(stored_patient_ids(self.path), [1, 2, 3])
+
+    def test_bookings_from_both_processes_keep_distinct_ids_and_slots(self):
+        a = HospitalManager(storage_for_path(self.path))
+        a.add_patient(Patient("first patient", 30, "male", 1, "flu"))
+        a.add_patient(Patient("second patient", 40, "female", 2, "cold"))
+        a.add_doctor(Doctor("some doctor", 50, "male", 7, "cardiology"))
+        in_other_process(self.path, "hospital.book_appointment('2025-01-02', hospital.search_patient_by_id(2), hospital.doctor[7], time='09:00')")
+        booked = a.book_appointment("2025-01-02", a.search_patient_by_id(1), a.doctor[7])
+
+        self.assertNotEqual(booked.time, "09:00")
+        fresh = HospitalManager(storage_for_path(self.path))
+        self.assertEqual(sorted((a.patient.get_patient_id(), a.time) for a in fresh.appointment.values()),
+                         [(1, booked.time), (2, "09:00")])
+        self.assertEqual(len(fresh.appointment), 2)  #! distinct IDs: neither booking replaced the other
+
+    def test_two_managers_in_one_process_do_not_double_book(self):
+        a = HospitalManager(storage_for_path(self.path))
+        a.add_patient(Patient("first patient", 30, "male", 1, "flu"))
+        a.add_patient(Patient("second patient", 40, "female", 2, "cold"))
+        a.add_doctor(Doctor("some doctor", 50, "male", 7, "cardiology"))
+        b = HospitalManager(storage_for_path(self.path))
+        a.book_appointment("2025-01-02", a.search_patient_by_id(1), a.doctor[7], time="09:00")
+
+        with self.assertRaises(AppointmentConflictError):
+            b.book_appointment("2025-01-02", b.search_patient_by_id(2), b.doctor[7], time="09:00")
+
+
+class BinaryTwoProcessSyncTest(TwoProcessSyncTest):
+    extension = ".hms"
+
+
+class SQLiteTwoProcessSyncTest(TwoProcessSyncTest):
+    extension = ".db"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from exceptions.main import check_integers, check_ages, validate_records, whole_number, OK, BAD_NUMBER, BAD_AGE
+
+
+class WholeNumberTest(unittest.TestCase):
+    def test_whole_numbers_are_accepted(self):
+        self.assertEqual([whole_number(value) for value in (7, "7", " 42 ", "-3", "+5")], [7, 7, 42, -3, 5])
+
+    def test_fractions_booleans_and_other_digits_are_refused(self):
+        for value in (1.5, 2.0, True, False, "١", "٤٥", "1.5", "", " ", "seven", None):
+            self.assertIsNone(whole_number(value), repr(value))
+
+    def test_check_integers(self):
+        self.assertEqual(check_integers([1, "2", " 3 ", None, ""]), [OK] * 5)
+        self.assertEqual(check_integers([1.5, True, "١"]), [BAD_NUMBER] * 3)
+
+    def test_check_ages(self):
+        self.assertEqual(check_ages([30, "30", 0, "121"], 1, 120), [OK, OK, BAD_AGE, BAD_AGE])
+        self.assertEqual(check_ages([30.5, True, "٣٠"], 1, 120), [BAD_NUMBER] * 3)
+
+    def test_records_with_fractional_or_boolean_fields_are_invalid(self):
+        row = {"id": "1", "name": "ann lee", "age": "30", "gender": "female", "disease": "flu"}
+        rows = [row, dict(row, id=1.5), dict(row, id=True), dict(row, id="١"), dict(row, age=True), dict(row, age=30.7)]
+        self.assertEqual(validate_records("patients", rows), [OK] + [BAD_NUMBER] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()